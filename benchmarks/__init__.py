@@ -0,0 +1,6 @@
+"""benchmarks
+
+Performance benchmarks for the contacts data layer.
+
+Run with ``python -m benchmarks --size 10k``; see ``python -m benchmarks --help``.
+"""
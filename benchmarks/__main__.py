@@ -0,0 +1,170 @@
+"""benchmarks.__main__
+
+Benchmark runner for the contacts data layer.
+
+Seeds (once) a synthetic dataset of the requested size, times every scenario in
+`benchmarks.scenarios` and records the median wall time, query count and peak
+Python memory as JSON. With ``--baseline`` the results are compared against a
+saved run and the process exits non-zero on a regression::
+
+    python -m benchmarks --size 10k --save-baseline
+    python -m benchmarks --size 10k --baseline benchmarks/baselines/10k.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--size", default="10k", choices=("10k", "100k", "1m"), help="dataset size (default: 10k)")
+    parser.add_argument("--scenario", action="append", help="only run the named scenario(s)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per scenario (default: 5)")
+    parser.add_argument("--output", type=Path, help="write the results JSON to this file instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"save the results to {BASELINE_DIR}/<size>.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown / memory growth (default: 0.25)")
+    parser.add_argument("--reseed", action="store_true", help="drop and re-create the dataset")
+    return parser.parse_args(argv)
+
+
+def setup_django(size: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    os.environ["BENCH_SIZE"] = size
+    import django
+
+    django.setup()
+
+
+def prepare_dataset(size: str, reseed: bool):
+    """Migrate the benchmark database and seed it when its size does not match.
+
+    Returns:
+        the superuser the scenarios run as
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from contacts.models import Contact
+    from .seed import SIZES, seed
+
+    call_command("migrate", verbosity=0)
+    if reseed or Contact.objects.count() != SIZES[size]:
+        Contact.objects.all().delete()
+        started = time.perf_counter()
+        seed(SIZES[size])
+        print(f"seeded {SIZES[size]} contacts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    user, created = get_user_model().objects.get_or_create(
+        username="bench", defaults={"is_staff": True, "is_superuser": True},
+    )
+    return user
+
+
+def measure(func, ctx, repeat: int) -> dict:
+    """Time `func(ctx)` and record its query count and peak memory.
+
+    The first call warms caches and is not timed; query count and memory are
+    taken from dedicated calls so tracing does not distort the timings.
+    """
+    from django.db import connection
+
+    queries: list[str] = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    func(ctx)
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - started)
+    # an execute wrapper survives the `reset_queries` run at each request start
+    with connection.execute_wrapper(record):
+        func(ctx)
+    tracemalloc.start()
+    func(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_time_s": statistics.median(timings),
+        "min_wall_time_s": min(timings),
+        "queries": len(queries),
+        "peak_memory_bytes": peak,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `results` against `baseline`.
+
+    A scenario regresses when it issues more queries than the baseline, or when
+    its fastest wall time or its peak memory exceed the baseline by more than
+    `tolerance`. The fastest run is compared because it is the least noisy.
+
+    Returns:
+        list[str]: one line per regression
+    """
+    failures: list[str] = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            failures.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+        for key in ("min_wall_time_s", "peak_memory_bytes"):
+            if current[key] > previous[key] * (1 + tolerance):
+                failures.append(f"{name}: {key} {previous[key]:.6g} -> {current[key]:.6g} (+{current[key] / previous[key] - 1:.0%})")
+    return failures
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    setup_django(args.size)
+    from django.db import connection
+    from .scenarios import SCENARIOS, Context
+
+    user = prepare_dataset(args.size, args.reseed)
+    ctx = Context(user)
+    names = args.scenario or list(SCENARIOS)
+    results: dict = {
+        "size": args.size,
+        "repeat": args.repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": connection.vendor,
+        },
+        "results": {},
+    }
+    for name in names:
+        results["results"][name] = measure(SCENARIOS[name], ctx, args.repeat)
+        print(f"{name}: {results['results'][name]}", file=sys.stderr)
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload)
+    else:
+        print(payload)
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        (BASELINE_DIR / f"{args.size}.json").write_text(payload)
+    if args.baseline:
+        failures = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""benchmarks.scenarios
+
+The timed code paths. Each scenario is a function of the shared `Context`,
+registered with `@scenario` and called once per repetition.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+
+from django.db import transaction
+from django.test import Client
+
+from contacts.batch import validate_contacts
+from contacts.exports import export_contacts
+from contacts.imports import import_contacts
+from contacts.models import Contact, ContactAddress
+
+
+SCENARIOS: dict = {}
+"""Registered scenarios keyed by name, in definition order."""
+
+
+def scenario(func):
+    """Register `func` as a benchmark scenario named after the function.
+    """
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+class Context:
+    """Shared state prepared once per run.
+
+    Attributes:
+        client (Client): a test client logged in as a superuser
+        contact_pk (int): the primary key of a contact from the middle of the dataset
+        payloads (list[dict]): submitted contacts for the import scenarios
+        import_path (str): the first 100 payloads as a JSON Lines file
+        addresses (list[ContactAddress]): unsaved addresses for the formatting scenario
+    """
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+        count = Contact.objects.count()
+        self.contact_pk = Contact.objects.order_by("pk").values_list("pk", flat=True)[count // 2]
+        self.payloads = [
+            {
+                "first_name": "bench",
+                "last_name": f"import{i}",
+                "job_title": "load tester",
+                "emails": [{"email_address": f"Bench.Import{i}@Example.com"}],
+                "phone_numbers": [{"phone_number": f"+1202555{i % 10000:04d}"}],
+                "addresses": [{"street": f"{i} Main Street", "city": "Springfield", "state": "IL", "zipcode": "62701"}],
+            }
+            for i in range(1000)
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.writelines(json.dumps(payload) + "\n" for payload in self.payloads[:100])
+        self.import_path = f.name
+        atexit.register(os.unlink, f.name)
+        self.addresses = [
+            ContactAddress(street=f"{i} Main St", unit_number=str(i) if i % 5 == 0 else None,
+                           city="Springfield", state="IL", zipcode="62701")
+            for i in range(10_000)
+        ]
+
+    def get(self, url: str, **params):
+        response = self.client.get(url, params)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+        return response
+
+
+@scenario
+def contact_list_view(ctx: Context):
+    response = ctx.get("/contacts/")
+    assert b"<li>" in response.content, "the contact list rendered no summaries"
+
+
+@scenario
+def contact_detail_view(ctx: Context):
+    ctx.get(f"/contacts/{ctx.contact_pk}/")
+
+
+@scenario
+def admin_contact_changelist(ctx: Context):
+    ctx.get("/admin/contacts/contact/")
+
+
+@scenario
+def admin_contact_change_form(ctx: Context):
+    ctx.get(f"/admin/contacts/contact/{ctx.contact_pk}/change/")
+
+
+@scenario
+def admin_address_changelist(ctx: Context):
+    ctx.get("/admin/contacts/contactaddress/")
+
+
+@scenario
+def admin_email_changelist(ctx: Context):
+    ctx.get("/admin/contacts/contactemail/")
+
+
+@scenario
+def admin_phone_changelist(ctx: Context):
+    ctx.get("/admin/contacts/contactphonenumber/")
+
+
+@scenario
+def search_prefix(ctx: Context):
+    list(Contact.objects.autocomplete("smi", 20))
+
+
+@scenario
+def search_autocomplete_view(ctx: Context):
+    ctx.get("/contacts/autocomplete/", term="smi")
+
+
+@scenario
+def search_admin_changelist(ctx: Context):
+    ctx.get("/admin/contacts/contact/", q="smith")
+
+
+@scenario
+def import_validate(ctx: Context):
+    validate_contacts(ctx.payloads)
+
+
+@scenario
+def import_jsonl(ctx: Context):
+    # parsed in-process so the import can be rolled back and repeated
+    with transaction.atomic():
+        report = import_contacts(ctx.import_path, workers=1)
+        assert report.created[Contact] == 100, report.errors
+        transaction.set_rollback(True)
+
+
+@scenario
+def export_jsonl(ctx: Context):
+    with open(os.devnull, "w") as stream:
+        export_contacts(stream)
+
+
+@scenario
+def address_formatting(ctx: Context):
+    for address in ctx.addresses:
+        address.single_line_address()
+        address.multi_line_address()
+        address.short_address()
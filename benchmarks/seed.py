@@ -0,0 +1,23 @@
+"""benchmarks.seed
+
+Deterministic synthetic datasets for the benchmark runner.
+"""
+
+from contacts.seeding import seed_contacts
+
+
+SIZES: dict[str, int] = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+"""Named dataset sizes accepted by `--size`."""
+
+ONE_EACH: dict[int, float] = {1: 1.0}
+
+
+def seed(size: int, seed: int = 0, batch_size: int = 5000) -> None:
+    """Create `size` contacts, each with one email, phone number and address.
+
+    Args:
+        size (int): the number of contacts
+        seed (int, optional): the random seed. Defaults to 0.
+        batch_size (int, optional): contacts per batch. Defaults to 5000.
+    """
+    seed_contacts(size, seed=seed, batch_size=batch_size, emails=ONE_EACH, phone_numbers=ONE_EACH, addresses=ONE_EACH)
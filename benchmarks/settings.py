@@ -0,0 +1,68 @@
+"""benchmarks.settings
+
+Django settings used by the benchmark runner.
+
+The database defaults to a SQLite file per dataset size next to this module.
+Set ``BENCH_DB_ENGINE`` (and ``BENCH_DB_NAME``, ``BENCH_DB_USER``,
+``BENCH_DB_PASSWORD``, ``BENCH_DB_HOST``, ``BENCH_DB_PORT``) to benchmark
+against another backend such as PostgreSQL.
+"""
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+SECRET_KEY = "benchmarks-only"
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+USE_TZ = True
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+ROOT_URLCONF = "benchmarks.urls"
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "localflavor",
+    "phonenumber_field",
+    "simple_history",
+    "contacts",
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": os.environ.get("BENCH_DB_ENGINE", "django.db.backends.sqlite3"),
+        "NAME": os.environ.get("BENCH_DB_NAME", str(BASE_DIR / f"bench_{os.environ.get('BENCH_SIZE', '10k')}.sqlite3")),
+        "USER": os.environ.get("BENCH_DB_USER", ""),
+        "PASSWORD": os.environ.get("BENCH_DB_PASSWORD", ""),
+        "HOST": os.environ.get("BENCH_DB_HOST", ""),
+        "PORT": os.environ.get("BENCH_DB_PORT", ""),
+    }
+}
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,136 @@
+"""benchmarks.startup
+
+Cold-start cost of the contacts app.
+
+Runs ``django.setup()`` in fresh interpreters with ``python -X importtime``
+and reports the setup wall time, the import time attributable to ``contacts``
+modules (including the third-party modules they import) and which of the
+heavy optional imports were loaded. A first, untimed run writes the bytecode
+caches::
+
+    python -m benchmarks.startup --repeat 20 --output before.json
+    python -m benchmarks.startup --repeat 20 --baseline before.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DEFERRED_MODULES: tuple[str, ...] = (
+    "phonenumbers",
+    "phonenumber_field.modelfields",
+    "phonenumber_field.formfields",
+    "localflavor.us.forms",
+)
+"""Modules the app should not need to import during `django.setup()`."""
+
+# garbage collection is off so a collection triggered by earlier allocations is
+# not charged to whichever module happens to be importing at the time
+SETUP_SCRIPT = (
+    "import gc; gc.disable(); import time; t = time.perf_counter(); "
+    "import django; django.setup(); print(time.perf_counter() - t)"
+)
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """The import tree printed by ``-X importtime``.
+
+    Children are printed before their parent, indented two spaces per level.
+
+    Returns:
+        list[dict]: top-level nodes `{"name", "self_us", "cumulative_us", "children"}`
+    """
+    pending: list[tuple[int, dict]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        children = []
+        while pending and pending[-1][0] > level:
+            children.insert(0, pending.pop()[1])
+        node = {"name": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us), "children": children}
+        pending.append((level, node))
+    return [node for _, node in pending]
+
+
+def _walk(nodes: list[dict]):
+    for node in nodes:
+        yield node
+        yield from _walk(node["children"])
+
+
+def contacts_nodes(nodes: list[dict]) -> list[dict]:
+    """The outermost `contacts` modules; their cumulative time is the app's import cost.
+    """
+    found: list[dict] = []
+    for node in nodes:
+        if node["name"] == "contacts" or node["name"].startswith("contacts."):
+            found.append(node)
+        else:
+            found += contacts_nodes(node["children"])
+    return found
+
+
+def run_once(settings_module: str) -> dict:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # measure with bytecode caches, as deployed
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SETUP_SCRIPT],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    tree = parse_importtime(proc.stderr)
+    roots = contacts_nodes(tree)
+    loaded = {node["name"] for node in _walk(tree)}
+    return {
+        "setup_s": float(proc.stdout.strip().splitlines()[-1]),
+        "contacts_import_s": sum(node["cumulative_us"] for node in roots) / 1e6,
+        "deferred_loaded": [name for name in DEFERRED_MODULES if name in loaded],
+        "slowest": sorted(
+            ((node["name"], node["self_us"]) for root in roots for node in _walk([root])),
+            key=lambda item: -item[1],
+        )[:10],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=10, help="interpreters to start (default: 10)")
+    parser.add_argument("--settings", default="benchmarks.settings", help="settings module (default: benchmarks.settings)")
+    parser.add_argument("--output", type=Path, help="write the results JSON to this file instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="print the change against this results file")
+    args = parser.parse_args(argv)
+
+    run_once(args.settings)  # warm the OS file cache and write bytecode caches
+    runs = [run_once(args.settings) for _ in range(args.repeat)]
+    results = {
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "setup_s": {"min": min(r["setup_s"] for r in runs), "median": statistics.median(r["setup_s"] for r in runs)},
+        "contacts_import_s": {
+            "min": min(r["contacts_import_s"] for r in runs),
+            "median": statistics.median(r["contacts_import_s"] for r in runs),
+        },
+        "deferred_loaded": runs[-1]["deferred_loaded"],
+        "slowest_contacts_imports_us": runs[-1]["slowest"],
+    }
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload)
+    else:
+        print(payload)
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        for key in ("setup_s", "contacts_import_s"):
+            before, after = baseline[key]["median"], results[key]["median"]
+            print(f"{key}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms ({after / before - 1:+.0%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
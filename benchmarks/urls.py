@@ -0,0 +1,23 @@
+"""benchmarks.urls
+
+URL patterns for the benchmark runner, including an admin site with the
+contacts admin classes registered.
+"""
+
+from django.contrib import admin
+from django.urls import include, path
+
+from contacts import admin as contacts_admin
+from contacts.models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+
+
+site = admin.AdminSite(name="bench_admin")
+site.register(Contact, contacts_admin.ContactAdmin)
+site.register(ContactAddress, contacts_admin.ContactAddressAdmin)
+site.register(ContactEmail, contacts_admin.ContactEmailAdmin)
+site.register(ContactPhoneNumber, contacts_admin.ContactPhoneNumberAdmin)
+
+urlpatterns = [
+    path("admin/", site.urls),
+    path("contacts/", include("contacts.urls")),
+]
@@ -0,0 +1,214 @@
+"""contacts.addresses
+
+USPS-style address normalization and offline ZIP-centroid geocoding.
+
+The normalized forms follow the abbreviations of USPS Publication 28 (street
+suffixes, directionals and secondary unit designators) so that variants such as
+"123 Main Street" and "123 MAIN ST." compare equal. Geocoding looks the ZIP code
+up in a local gazetteer, by default the bundled `data/zip_centroids.csv.gz`,
+so no network service is involved.
+"""
+
+import csv
+import gzip
+import math
+import re
+from pathlib import Path
+from threading import Lock
+
+from .conf import app_settings
+
+
+STREET_SUFFIXES: dict[str, str] = {
+    "ALLEY": "ALY", "ALLEE": "ALY", "ALLY": "ALY",
+    "AVENUE": "AVE", "AV": "AVE", "AVEN": "AVE", "AVENU": "AVE", "AVN": "AVE", "AVNUE": "AVE",
+    "BOULEVARD": "BLVD", "BOUL": "BLVD", "BOULV": "BLVD",
+    "CIRCLE": "CIR", "CIRC": "CIR", "CIRCL": "CIR", "CRCL": "CIR", "CRCLE": "CIR",
+    "COURT": "CT", "CRT": "CT",
+    "COVE": "CV",
+    "CREEK": "CRK",
+    "CROSSING": "XING", "CRSSNG": "XING",
+    "DRIVE": "DR", "DRIV": "DR", "DRV": "DR",
+    "EXPRESSWAY": "EXPY", "EXPRESS": "EXPY", "EXPW": "EXPY",
+    "FREEWAY": "FWY", "FREEWY": "FWY", "FRWAY": "FWY", "FRWY": "FWY",
+    "HEIGHTS": "HTS", "HT": "HTS",
+    "HIGHWAY": "HWY", "HIGHWY": "HWY", "HIWAY": "HWY", "HIWY": "HWY", "HWAY": "HWY",
+    "HILL": "HL",
+    "LANE": "LN",
+    "LOOP": "LOOP", "LOOPS": "LOOP",
+    "PARKWAY": "PKWY", "PARKWY": "PKWY", "PKWAY": "PKWY", "PKY": "PKWY",
+    "PLACE": "PL",
+    "PLAZA": "PLZ", "PLZA": "PLZ",
+    "POINT": "PT",
+    "ROAD": "RD",
+    "ROUTE": "RTE",
+    "SQUARE": "SQ", "SQR": "SQ", "SQRE": "SQ", "SQU": "SQ",
+    "STREET": "ST", "STR": "ST", "STRT": "ST",
+    "TERRACE": "TER", "TERR": "TER",
+    "TRAIL": "TRL", "TRAILS": "TRL", "TRLS": "TRL",
+    "TURNPIKE": "TPKE", "TRNPK": "TPKE", "TURNPK": "TPKE",
+    "WAY": "WAY", "WY": "WAY",
+}
+"""Street suffix variants mapped to their USPS standard abbreviation."""
+
+DIRECTIONALS: dict[str, str] = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+    "N": "N", "S": "S", "E": "E", "W": "W", "NE": "NE", "NW": "NW", "SE": "SE", "SW": "SW",
+}
+"""Directional variants mapped to their USPS abbreviation."""
+
+UNIT_DESIGNATORS: dict[str, str] = {
+    "APARTMENT": "APT", "APT": "APT",
+    "BUILDING": "BLDG", "BLDG": "BLDG",
+    "DEPARTMENT": "DEPT", "DEPT": "DEPT",
+    "FLOOR": "FL", "FL": "FL",
+    "HANGAR": "HNGR",
+    "LOT": "LOT",
+    "OFFICE": "OFC",
+    "PO BOX": "PO BOX", "P O BOX": "PO BOX", "POBOX": "PO BOX", "BOX": "PO BOX",
+    "ROOM": "RM", "RM": "RM",
+    "SPACE": "SPC",
+    "SUITE": "STE", "STE": "STE",
+    "TRAILER": "TRLR",
+    "UNIT": "UNIT",
+    "#": "#",
+}
+"""Secondary unit designator variants mapped to their USPS abbreviation."""
+
+_PUNCTUATION = re.compile(r"[^\w\s#-]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clean(value: str | None) -> str:
+    """Uppercases `value`, strips punctuation and collapses whitespace.
+    """
+    value = _PUNCTUATION.sub(" ", (value or "").upper())
+    return _WHITESPACE.sub(" ", value).strip()
+
+
+def normalize_street(street: str | None) -> str:
+    """USPS-style canonical form of a street line.
+
+    Examples:
+        `"123 North Main Street."` -> `"123 N MAIN ST"`
+
+    Args:
+        street (str): the building number and street name
+
+    Returns:
+        str: the normalized street line
+    """
+    tokens: list[str] = _clean(street).split(" ")
+    if not tokens[0]:
+        return ""
+    # the suffix is the last token, or the one before a trailing directional
+    suffix_at = len(tokens) - 1
+    if len(tokens) > 2 and tokens[-1] in DIRECTIONALS:
+        tokens[-1] = DIRECTIONALS[tokens[-1]]
+        suffix_at -= 1
+    if suffix_at >= 1 and tokens[suffix_at] in STREET_SUFFIXES:
+        tokens[suffix_at] = STREET_SUFFIXES[tokens[suffix_at]]
+    # a leading directional follows the building number
+    if len(tokens) > 2 and tokens[1] in DIRECTIONALS:
+        tokens[1] = DIRECTIONALS[tokens[1]]
+    return " ".join(tokens)
+
+
+def normalize_unit(unit_type: str | None, unit_number: str | None) -> str:
+    """USPS-style canonical form of a secondary unit.
+
+    Examples:
+        `("Suite", "#105")` -> `"STE 105"`
+
+    Args:
+        unit_type (str): the unit designator, e.g. "Suite"
+        unit_number (str): the unit identifier
+
+    Returns:
+        str: the normalized unit, or `""` without a unit number
+    """
+    number: str = _clean(unit_number).lstrip("# ")
+    if not number:
+        return ""
+    designator: str = _clean(unit_type)
+    return f"{UNIT_DESIGNATORS.get(designator, designator or 'UNIT')} {number}"
+
+
+def normalize_city(city: str | None) -> str:
+    """Uppercased city name without punctuation.
+    """
+    return _clean(city)
+
+
+def normalize_zipcode(zipcode: str | None) -> str:
+    """The five-digit ZIP code of a ZIP or ZIP+4 value.
+    """
+    digits: str = re.sub(r"\D", "", zipcode or "")
+    return digits[:5] if len(digits) >= 5 else ""
+
+
+class ZipGazetteer:
+    """An in-memory ZIP code to centroid table, loaded on first use.
+
+    The source is a CSV file, optionally gzip compressed, with `zipcode`, `lat`
+    and `lon` columns. It defaults to the bundled table and can be replaced with
+    the `CONTACTS_ZIP_GAZETTEER` setting.
+    """
+
+    default_path: Path = Path(__file__).parent / "data" / "zip_centroids.csv.gz"
+
+    def __init__(self, path: str | Path | None = None):
+        self._path = path
+        self._table: dict[str, tuple[float, float]] | None = None
+        self._lock = Lock()
+
+    @property
+    def path(self) -> Path:
+        return Path(self._path or app_settings.ZIP_GAZETTEER or self.default_path)
+
+    def rows(self) -> list[dict[str, str]]:
+        """Every row of the source file, with all of its columns.
+        """
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        with opener(self.path, "rt", newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _load(self) -> dict[str, tuple[float, float]]:
+        return {row["zipcode"]: (float(row["lat"]), float(row["lon"])) for row in self.rows()}
+
+    @property
+    def table(self) -> dict[str, tuple[float, float]]:
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self._load()
+        return self._table
+
+    def lookup(self, zipcode: str | None) -> tuple[float, float] | None:
+        """The `(lat, lon)` centroid of a ZIP code, or `None` when unknown.
+        """
+        return self.table.get(normalize_zipcode(zipcode))
+
+
+gazetteer = ZipGazetteer()
+"""The process-wide gazetteer used by `USAddressMixin`."""
+
+
+def bounding_box(lat: float, lon: float, radius_miles: float) -> tuple[float, float, float, float]:
+    """A lat/lon box enclosing a circle, for index-friendly proximity filters.
+
+    Returns:
+        tuple[float, float, float, float]: `(min_lat, max_lat, min_lon, max_lon)`
+    """
+    lat_delta: float = radius_miles / 69.0
+    lon_delta: float = radius_miles / max(69.0 * math.cos(math.radians(lat)), 0.01)
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 3958.8 * 2 * math.asin(math.sqrt(a))
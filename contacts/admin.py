@@ -4,8 +4,26 @@ Django admin models for the contacts app
 """
 
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import NoReverseMatch, path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from .models import ContactAddress, ContactEmail, ContactPhoneNumber
+from . import tasks
+from .instrumentation import span
+from .slowqueries import clear_slow_queries, get_slow_queries
+from .models import (
+    ConsentEvent, ConsentStatus, ContactAddress, ContactEmail, ContactJob, ContactPhoneNumber, ContactRelationship,
+    Organization, Segment, Tag,
+)
+
+
+PURGE_PREVIEW_SIZE: int = 100
+"""How many of the selected contacts the purge confirmation page lists."""
 
 
 # Inlines
@@ -59,32 +77,62 @@ class ContactPhoneNumberInline(admin.StackedInline):
     )
 
 
+class ContactRelationshipInline(admin.TabularInline):
+    '''Tabular Inline View for a contact's ContactRelationships'''
+
+    model = ContactRelationship
+    fk_name = 'contact'
+    min_num = 0
+    extra = 0
+    classes = ['collapse']
+    fields = ('kind', 'organization', 'manager', 'title')
+    raw_id_fields = ('organization', 'manager')
+
+
 # Models
 
 class BaseAdmin(admin.ModelAdmin):
     """Provides standard save methods for the tracking fields `created_by` and `updated_by`
+
+    Both run inside `admin.<ClassName>.save_*` instrumentation spans.
     """
     def save_formset(self, request, form, formset, change):
-        instances = formset.save(commit=False)
-        for instance in instances:
-            if not change:  #: new instance
-                instance.created_by = request.user
-            instance.updated_by = request.user
-            instance.save()
-        formset.save_m2m()
+        with span(f"admin.{type(self).__name__}.save_formset"):
+            instances = formset.save(commit=False)
+            for instance in instances:
+                if not change:  #: new instance
+                    instance.created_by = request.user
+                instance.updated_by = request.user
+                instance.save()
+            formset.save_m2m()
 
     def save_model(self, request, obj, form, change):
         if not change:
             obj.created_by = request.user
         obj.updated_by = request.user
-        return super().save_model(request, obj, form, change)
+        with span(f"admin.{type(self).__name__}.save_model"):
+            return super().save_model(request, obj, form, change)
+
+    def enqueue_job(self, request, name: str, **arguments) -> ContactJob:
+        """Queue a `contacts.tasks` job and tell the user where to follow its progress.
+        """
+        job = tasks.enqueue(name, user=request.user, **arguments)
+        try:
+            url = reverse(f"{self.admin_site.name}:contacts_contactjob_change", args=(job.pk,))
+        except NoReverseMatch:  # ContactJobAdmin is not registered
+            self.message_user(request, _("Queued %(job)s.") % {"job": job})
+        else:
+            self.message_user(request, format_html(_("Queued <a href=\"{}\">{}</a>."), url, job))
+        return job
 
 
 class ContactAdmin(BaseAdmin):
     list_display = ('full_name','job_title','created_on',)
     list_filter = ('job_title','created_on',)
-    search_fields = ('first_name','last_name','job_title',)
-    inlines = (ContactEmailInline, ContactPhoneNumberInline, ContactAddressInline)
+    search_fields = ('sort_name','first_name','last_name','job_title',)
+    ordering = ('sort_name',)
+    inlines = (ContactEmailInline, ContactPhoneNumberInline, ContactAddressInline, ContactRelationshipInline)
+    actions = ("archive_contacts", "purge_contacts", "refresh_summaries", "export_contacts")
 
     fieldsets = (
         (None, {
@@ -96,6 +144,79 @@ class ContactAdmin(BaseAdmin):
         }),
     )
 
+    @admin.action(description=_("Archive selected contacts"), permissions=["delete"])
+    def archive_contacts(self, request, queryset):
+        """Soft-delete the selected contacts and their channels.
+        """
+        count: int = queryset.archive()
+        self.message_user(request, _("Archived %(count)d contact(s).") % {"count": count})
+
+    @admin.action(description=_("Permanently delete selected contacts in the background"), permissions=["delete"])
+    def purge_contacts(self, request, queryset):
+        """Queue a ``purge_contacts`` job for the selected contacts, once confirmed
+        on an intermediate page like the one of ``delete_selected``.
+        """
+        if request.POST.get("post") != "yes":
+            count: int = queryset.count()
+            context = {
+                **self.admin_site.each_context(request),
+                "opts": self.opts,
+                "media": self.media,
+                "title": _("Permanently delete contacts"),
+                "count": count,
+                "preview": queryset[:PURGE_PREVIEW_SIZE],
+                "more": max(count - PURGE_PREVIEW_SIZE, 0),
+                "select_across": request.POST.get("select_across") == "1",
+                "selected": request.POST.getlist(ACTION_CHECKBOX_NAME),
+                "action_checkbox_name": ACTION_CHECKBOX_NAME,
+            }
+            return TemplateResponse(request, "admin/contacts/purge_contacts_confirmation.html", context)
+        self.enqueue_job(request, "purge_contacts", pks=list(queryset.values_list("pk", flat=True)))
+
+    @admin.action(description=_("Refresh summaries of selected contacts in the background"), permissions=["change"])
+    def refresh_summaries(self, request, queryset):
+        """Queue a ``refresh_contact_summaries`` job for the selected contacts.
+        """
+        self.enqueue_job(request, "refresh_contact_summaries", pks=list(queryset.values_list("pk", flat=True)))
+
+    @admin.action(description=_("Export selected contacts in the background"), permissions=["view"])
+    def export_contacts(self, request, queryset):
+        """Queue an ``export_contacts`` job writing the selected contacts to the default storage.
+        """
+        file_name = f"contacts/exports/contacts-{timezone.now():%Y%m%d-%H%M%S}.jsonl"
+        self.enqueue_job(request, "export_contacts", file_name=file_name, pks=list(queryset.values_list("pk", flat=True)))
+
+    def get_search_results(self, request, queryset, search_term):
+        """Use the indexed prefix search for the `autocomplete_fields` of the
+        channel admins, and the default search everywhere else.
+        """
+        if request.path.endswith("/autocomplete/") and search_term:
+            return queryset.prefix_search(search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path("slow-queries/", self.admin_site.admin_view(self.slow_queries_view), name="%s_%s_slow_queries" % info),
+        ] + super().get_urls()
+
+    def slow_queries_view(self, request):
+        """Superuser-only page listing the slow contacts queries and plans captured
+        by `contacts.slowqueries`. POST empties the buffer.
+        """
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        if request.method == "POST":
+            clear_slow_queries()
+            return redirect(request.path)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": _("Slow queries"),
+            "entries": get_slow_queries(),
+        }
+        return TemplateResponse(request, "admin/contacts/slow_queries.html", context)
+
 
 class ContactAddressAdmin(BaseAdmin):
     '''Admin View for ContactAddress'''
@@ -117,8 +238,8 @@ class ContactAddressAdmin(BaseAdmin):
             in the right sidebar.
             """
             return [
-                (True, True),
-                (False, False),
+                ("1", _("yes")),
+                ("0", _("no")),
             ]
 
         def queryset(self, request, queryset):
@@ -127,15 +248,17 @@ class ContactAddressAdmin(BaseAdmin):
             provided in the query string and retrievable via
             `self.value()`.
             """
-            if self.value() == True:
+            if self.value() == "1":
                 return queryset.filter(
-                    has_unit=True
+                    unit_number__isnull=False
                 )
-            if self.value() == False:
+            if self.value() == "0":
                 return queryset.filter(
-                    has_unit=False
+                    unit_number__isnull=True
                 )
 
+    autocomplete_fields = ('contact',)
+    actions = ("normalize_addresses",)
     list_display = (
         'short_address',
         'contact',
@@ -146,13 +269,11 @@ class ContactAddressAdmin(BaseAdmin):
         'zipcode',
     )
     list_filter = (
-        'contact',
         HasUnitFilter,
         'city',
         'state',
     )
     search_fields = (
-        'name',
         'street',
         'city',
         'state',
@@ -168,7 +289,6 @@ class ContactAddressAdmin(BaseAdmin):
         (None, {
             "fields": (
                 'contact',
-                'name',
             ),
         }),
         ("Address", {
@@ -180,12 +300,19 @@ class ContactAddressAdmin(BaseAdmin):
     )
 
 
+    @admin.action(description=_("Normalize selected addresses in the background"), permissions=["change"])
+    def normalize_addresses(self, request, queryset):
+        """Queue a ``normalize_addresses`` job for the selected addresses.
+        """
+        self.enqueue_job(request, "normalize_addresses", pks=list(queryset.values_list("pk", flat=True)))
+
+
 class ContactEmailAdmin(BaseAdmin):
     '''Admin View for ContactEmail'''
 
-    list_display = ('email_address','name','contact')
-    list_filter = ('name','contact',)
-    search_fields = ('name','email_address','contact',)
+    autocomplete_fields = ('contact',)
+    list_display = ('email_address','contact')
+    search_fields = ('email_address','contact__sort_name',)
     ordering = ('contact','email_address',)
     fieldsets = (
         (None, {
@@ -204,19 +331,164 @@ class ContactEmailAdmin(BaseAdmin):
 class ContactPhoneNumberAdmin(BaseAdmin):
     '''Admin View for ContactPhoneNumber'''
 
-    list_display = ('email_address','name','contact')
-    list_filter = ('name','contact',)
-    search_fields = ('name','email_address','contact',)
-    ordering = ('contact','email_address',)
+    autocomplete_fields = ('contact',)
+    list_display = ('phone_number','contact')
+    search_fields = ('phone_number','contact__sort_name',)
+    ordering = ('contact','phone_number',)
     fieldsets = (
         (None, {
             "fields": (
                 'contact',
             ),
         }),
-        ("Email Address", {
+        ("Phone Number", {
             "fields": (
-                'email_address',
+                'phone_number',
             )
         })
     )
+
+
+class OrganizationAdmin(BaseAdmin):
+    '''Admin View for Organization'''
+
+    list_display = ('name', 'parent')
+    search_fields = ('name',)
+    ordering = ('name',)
+    autocomplete_fields = ('parent',)
+    fieldsets = (
+        (None, {
+            "fields": (
+                'name',
+                'parent',
+            ),
+        }),
+    )
+
+
+class TagAdmin(admin.ModelAdmin):
+    '''Admin View for Tag'''
+
+    list_display = ('name',)
+    search_fields = ('name',)
+    ordering = ('name',)
+
+
+class SegmentAdmin(admin.ModelAdmin):
+    """Segments with their sizes as of the last bitmap refresh.
+    """
+
+    list_display = ('name', 'expression', 'size')
+    search_fields = ('name',)
+    ordering = ('name',)
+    fields = ('name', 'expression')
+
+    @admin.display(description=_("contacts"))
+    def size(self, obj):
+        return len(obj.contact_ids())
+
+
+class ConsentEventAdmin(admin.ModelAdmin):
+    """The consent ledger; events can be added but never changed or deleted.
+    """
+
+    list_display = ('address', 'channel', 'purpose', 'status', 'source', 'recorded_on', 'recorded_by')
+    list_select_related = ('recorded_by',)
+    list_filter = ('channel', 'purpose', 'status')
+    search_fields = ('=address',)
+    ordering = ('-recorded_on',)
+    raw_id_fields = ('contact',)
+    fields = (
+        ('channel', 'address'),
+        ('purpose', 'status'),
+        'source',
+        'contact',
+    )
+
+    def get_readonly_fields(self, request, obj=None):
+        return self.fields if obj is not None else ()
+
+    def has_change_permission(self, request, obj=None):
+        return obj is None and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        obj.recorded_by = request.user
+        ConsentEvent.objects.record_many([obj])
+
+
+class ConsentStatusAdmin(admin.ModelAdmin):
+    """The current consent of each address, derived from the ledger.
+    """
+
+    list_display = ('address', 'channel', 'purpose', 'status', 'changed_on')
+    list_filter = ('channel', 'purpose', 'status')
+    search_fields = ('=address',)
+    ordering = ('address',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ContactJobAdmin(admin.ModelAdmin):
+    """Progress of the `contacts.tasks` jobs queued from the admin actions or code.
+
+    Jobs are read-only; the actions cancel them or resume them from their checkpoint.
+    """
+
+    list_display = ('__str__', 'status', 'progress', 'created_by', 'created_on', 'finished_on')
+    list_select_related = ('created_by',)
+    list_filter = ('status', 'name')
+    actions = ("resume_jobs", "cancel_jobs")
+    fields = (
+        ('name', 'status'),
+        'progress',
+        'download',
+        'arguments',
+        'checkpoint',
+        ('created_by', 'created_on', 'started_on', 'heartbeat_on', 'finished_on'),
+        'error',
+    )
+    readonly_fields = (
+        'name', 'status', 'progress', 'download', 'arguments', 'checkpoint',
+        'created_by', 'created_on', 'started_on', 'heartbeat_on', 'finished_on', 'error',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description=_("progress"))
+    def progress(self, obj):
+        if obj.percent is None:
+            return obj.done
+        return format_html('<progress value="{}" max="100"></progress> {} / {}', obj.percent, obj.done, obj.total)
+
+    @admin.display(description=_("file"))
+    def download(self, obj):
+        """A link to the file an ``export_contacts`` job saved.
+        """
+        if "file" not in obj.checkpoint:
+            return "-"
+        return format_html('<a href="{}">{}</a>', default_storage.url(obj.checkpoint["file"]), obj.checkpoint["file"])
+
+    @admin.action(description=_("Resume selected jobs"), permissions=["change"])
+    def resume_jobs(self, request, queryset):
+        """Queue failed, cancelled and stale running jobs again from their checkpoints.
+        """
+        count: int = sum(tasks.resume(job) for job in queryset)
+        self.message_user(request, _("Resumed %(count)d job(s).") % {"count": count})
+
+    @admin.action(description=_("Cancel selected jobs"), permissions=["change"])
+    def cancel_jobs(self, request, queryset):
+        """Cancel queued and running jobs; running jobs stop at their next checkpoint.
+        """
+        count: int = sum(tasks.cancel(job) for job in queryset)
+        self.message_user(request, _("Cancelled %(count)d job(s).") % {"count": count})
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ContactsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "contacts"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import orgchart, summary
+        from .slowqueries import install_sampler
+
+        connection_created.connect(install_sampler, dispatch_uid="contacts_slow_query_sampler")
+        summary.connect()
+        orgchart.connect()
@@ -0,0 +1,190 @@
+"""contacts.batch
+
+Batch validation of submitted contact payloads.
+
+Validating thousands of rows through `ContactModelForm` and the channel
+ModelForms builds a form per row and runs a uniqueness query per email address.
+`validate_contacts` runs the same model field cleaners and `clean()` hooks on
+plain model instances instead, and checks email uniqueness with one `IN` query
+per batch.
+
+A payload is a dict of `Contact` fields plus optional lists of channel payloads::
+
+    {
+        "first_name": "Jack",
+        "last_name": "Hoff",
+        "emails": [{"email_address": "jack@example.com"}],
+        "phone_numbers": [{"phone_number": "+12025550123"}],
+        "addresses": [{"street": "123 Main St", "city": "Springfield", "state": "IL", "zipcode": "62701"}],
+    }
+"""
+
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+from .instrumentation import instrument
+from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+
+
+CHANNELS: dict[str, type] = {
+    "emails": ContactEmail,
+    "phone_numbers": ContactPhoneNumber,
+    "addresses": ContactAddress,
+}
+"""Maps the payload keys for channel lists to their models."""
+
+CONTACT_FIELDS: tuple[str, ...] = ("first_name", "last_name", "job_title", "description")
+"""The `Contact` fields accepted from a payload, matching `ContactModelForm`."""
+
+CHANNEL_FIELDS: dict[str, tuple[str, ...]] = {
+    "emails": ("email_address",),
+    "phone_numbers": ("phone_number",),
+    "addresses": ("street", "unit_type", "unit_number", "city", "state", "zipcode"),
+}
+"""The fields accepted from each channel payload, matching the channel ModelForms."""
+
+
+@dataclass
+class RowResult:
+    """The validation outcome of a single payload.
+
+    Attributes:
+        index (int): the payload's position in the submitted list
+        contact (Contact): the cleaned, unsaved contact
+        channels (dict[str, list]): the cleaned, unsaved channel instances keyed like `CHANNELS`
+        errors (dict[str, list[str]]): messages keyed by field path, e.g. `"emails.0.email_address"`
+    """
+
+    index: int
+    contact: Contact
+    channels: dict[str, list] = field(default_factory=dict)
+    errors: dict[str, list[str]] = field(default_factory=dict)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def add_error(self, path: str, messages: list[str]) -> None:
+        self.errors.setdefault(path, []).extend(str(m) for m in messages)
+
+
+@dataclass
+class BatchReport:
+    """The validation outcome of a batch of payloads.
+
+    Attributes:
+        rows (list[RowResult]): one result per payload, in submission order
+    """
+
+    rows: list[RowResult] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return all(row.is_valid for row in self.rows)
+
+    @property
+    def valid_rows(self) -> list[RowResult]:
+        return [row for row in self.rows if row.is_valid]
+
+    @property
+    def errors(self) -> dict[int, dict[str, list[str]]]:
+        """Per-row errors keyed by payload index, omitting valid rows.
+        """
+        return {row.index: row.errors for row in self.rows if row.errors}
+
+
+def _clean_instance(instance, row: RowResult, prefix: str, exclude: list[str]) -> None:
+    """Runs the model's field cleaners and `clean()`, recording errors on `row`.
+
+    Uniqueness is left to `check_unique_emails` so no per-row queries are issued.
+    """
+    try:
+        instance.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        for name, messages in e.message_dict.items():
+            row.add_error(f"{prefix}{name}", messages)
+
+
+def build_row(index: int, payload: dict) -> RowResult:
+    """Clean one payload into an unsaved contact and channels, without checking email uniqueness.
+
+    Args:
+        index (int): the payload's position, recorded on the result
+        payload (dict): the submitted contact, see the module docstring for the shape
+
+    Returns:
+        RowResult: the cleaned instances and the payload's errors
+    """
+    contact = Contact(**{name: payload.get(name) for name in CONTACT_FIELDS if name in payload})
+    row = RowResult(index=index, contact=contact)
+    _clean_instance(contact, row, "", [])
+    for key, model in CHANNELS.items():
+        row.channels[key] = []
+        for position, data in enumerate(payload.get(key) or ()):
+            if not isinstance(data, dict):
+                row.add_error(f"{key}.{position}", [_("Expected an object.")])
+                continue
+            unknown = sorted(set(data) - set(CHANNEL_FIELDS[key]))
+            if unknown:
+                row.add_error(f"{key}.{position}", [_("Unknown field(s): %(fields)s") % {"fields": ", ".join(unknown)}])
+                continue
+            instance = model(**data)
+            _clean_instance(instance, row, f"{key}.{position}.", ["contact"])
+            row.channels[key].append(instance)
+    return row
+
+
+def check_unique_emails(rows: list[RowResult], seen: dict[str, str], using: str | None = None) -> None:
+    """Flags email addresses repeated in the submission or already on file, using
+    a single `IN` query for the batch.
+
+    Args:
+        rows (list[RowResult]): the batch's rows
+        seen (dict[str, str]): email addresses from earlier batches, mapped to where they first appeared
+        using (str, optional): the database alias. Defaults to the router's choice for reads.
+    """
+    submitted: dict[str, list[tuple[RowResult, str]]] = {}
+    for row in rows:
+        for position, email in enumerate(row.channels.get("emails", ())):
+            path = f"emails.{position}.email_address"
+            if path in row.errors or not email.email_address:
+                continue
+            if email.email_address in seen:
+                row.add_error(path, [_("Duplicate email address in this submission (first seen at %(ref)s).") % {"ref": seen[email.email_address]}])
+                continue
+            seen[email.email_address] = f"{row.index}.{path}"
+            submitted.setdefault(email.email_address, []).append((row, path))
+    if not submitted:
+        return
+    # the default manager is scoped to the current tenant, which the new rows also belong to
+    existing = ContactEmail.objects.using(using).filter(email_address__in=submitted).values_list("email_address", flat=True)
+    for email in existing:
+        for row, path in submitted[email]:
+            row.add_error(path, [_("A contact with this email address already exists.")])
+
+
+@instrument()
+def validate_contacts(payloads: list[dict], batch_size: int = 500) -> BatchReport:
+    """Validate a list of contact payloads without building a form per row.
+
+    Each payload's contact and channels are cleaned with the same field cleaners
+    and `clean()` hooks the ModelForms use, including the `PersonMixin.clean`
+    title-casing and `EmailMixin.clean` normalization. Email uniqueness is then
+    checked with one `IN` query per `batch_size` payloads.
+
+    Args:
+        payloads (list[dict]): the submitted contacts, see the module docstring for the shape
+        batch_size (int, optional): payloads per uniqueness query. Defaults to 500.
+
+    Returns:
+        BatchReport: the cleaned, unsaved instances and per-row errors
+    """
+    report = BatchReport()
+    seen: dict[str, str] = {}
+    for start in range(0, len(payloads), batch_size):
+        rows = [build_row(start + offset, payload) for offset, payload in enumerate(payloads[start:start + batch_size])]
+        check_unique_emails(rows, seen)
+        report.rows.extend(rows)
+    return report
@@ -0,0 +1,257 @@
+"""contacts.carddav
+
+A CardDAV-style address book of the current tenant's contacts.
+
+The collection answers ``PROPFIND`` with its members' ETags and ``REPORT``
+with ``addressbook-multiget`` and ``sync-collection`` (RFC 6578), and each
+member is a vCard at ``<pk>.vcf``. A sync token is a point in time: a sync
+returns the contacts whose `ContactSummary` changed since then, which covers
+changes to their channels, and the `ContactTombstone`s of contacts deleted,
+archived or purged since then. Tokens are issued
+`CONTACTS_SYNC_TOKEN_OVERLAP_SECONDS` in the past so transactions still in
+flight are not missed; clients may see a few unchanged cards twice. Tokens
+older than `CONTACTS_TOMBSTONE_RETENTION_DAYS` are refused, and the client
+starts over with a full sync.
+
+Only reads are supported; clients cannot create or edit contacts.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Max
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from . import vcard
+from .conf import app_settings
+from .instrumentation import InstrumentedViewMixin
+from .models import ContactSummary, ContactTombstone
+
+
+DAV: str = "DAV:"
+CARDDAV: str = "urn:ietf:params:xml:ns:carddav"
+CALENDARSERVER: str = "http://calendarserver.org/ns/"
+
+ET.register_namespace("d", DAV)
+ET.register_namespace("card", CARDDAV)
+ET.register_namespace("cs", CALENDARSERVER)
+
+TOKEN_PREFIX: str = "urn:contacts:sync:"
+
+
+def _qname(namespace: str, name: str) -> str:
+    return f"{{{namespace}}}{name}"
+
+
+def make_sync_token(moment: datetime) -> str:
+    """The sync token for changes after `moment`."""
+    return f"{TOKEN_PREFIX}{int(moment.timestamp() * 1_000_000)}"
+
+
+def parse_sync_token(token: str) -> datetime | None:
+    """The moment of a sync token; None for the empty token of an initial sync.
+
+    Raises:
+        ValueError: the token is malformed or too old
+    """
+    if not token:
+        return None
+    if not token.startswith(TOKEN_PREFIX):
+        raise ValueError(token)
+    try:
+        moment = datetime.fromtimestamp(int(token[len(TOKEN_PREFIX):]) / 1_000_000, tz=dt_timezone.utc)
+    except OverflowError as e:  # more digits than a timestamp can hold
+        raise ValueError(token) from e
+    if moment < timezone.now() - timedelta(days=app_settings.TOMBSTONE_RETENTION_DAYS):
+        raise ValueError(token)
+    return moment
+
+
+class _Multistatus:
+    """Builds a DAV ``multistatus`` response body."""
+
+    def __init__(self):
+        self.root = ET.Element(_qname(DAV, "multistatus"))
+
+    def response(self, href: str, found: dict[str, object] | None = None, missing=(), status: int | None = None) -> None:
+        element = ET.SubElement(self.root, _qname(DAV, "response"))
+        ET.SubElement(element, _qname(DAV, "href")).text = href
+        if status is not None:
+            ET.SubElement(element, _qname(DAV, "status")).text = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}"
+            return
+        for props, code in ((found or {}, 200), ({name: None for name in missing}, 404)):
+            if not props:
+                continue
+            propstat = ET.SubElement(element, _qname(DAV, "propstat"))
+            prop = ET.SubElement(propstat, _qname(DAV, "prop"))
+            for name, value in props.items():
+                child = ET.SubElement(prop, name)
+                if isinstance(value, ET.Element):
+                    child.append(value)
+                elif isinstance(value, list):
+                    child.extend(value)
+                elif value is not None:
+                    child.text = str(value)
+            ET.SubElement(propstat, _qname(DAV, "status")).text = f"HTTP/1.1 {code} {'OK' if code == 200 else 'Not Found'}"
+
+    def http_response(self) -> HttpResponse:
+        body = ET.tostring(self.root, encoding="utf-8", xml_declaration=True)
+        return HttpResponse(body, status=207, content_type='application/xml; charset="utf-8"')
+
+
+@method_decorator(csrf_exempt, name="dispatch")  # DAV clients authenticate each request and send no CSRF token
+class AddressBookView(InstrumentedViewMixin, LoginRequiredMixin, View):
+    """The address book collection; see the module docstring.
+    """
+
+    http_method_names = ["options", "propfind", "report"]
+    raise_exception: bool = True
+
+    def options(self, request, *args, **kwargs):
+        response = super().options(request, *args, **kwargs)
+        response["DAV"] = "1, 3, addressbook"
+        return response
+
+    def member_href(self, contact_id: int) -> str:
+        return reverse("contacts:carddav_contact", args=(contact_id,))
+
+    def _requested(self, root) -> list[str] | None:
+        """The property names asked for, or None for ``allprop`` and empty bodies."""
+        if root is None or root.find(_qname(DAV, "prop")) is None:
+            return None
+        return [child.tag for child in root.find(_qname(DAV, "prop"))]
+
+    def _parse(self, request):
+        if not request.body:
+            return None
+        try:
+            return ET.fromstring(request.body)
+        except ET.ParseError:
+            return False
+
+    def _props(self, available: dict[str, object], requested: list[str] | None) -> tuple[dict, list]:
+        if requested is None:
+            return available, []
+        return {name: available[name] for name in requested if name in available}, [name for name in requested if name not in available]
+
+    def _member_props(self, tags: dict[int, str], requested: list[str] | None, with_data: bool):
+        data = vcard.cards(tags) if with_data else {}
+        for pk, tag in tags.items():
+            props = {_qname(DAV, "getetag"): tag, _qname(DAV, "getcontenttype"): "text/vcard; charset=utf-8"}
+            if with_data:
+                props[_qname(CARDDAV, "address-data")] = data.get(pk)
+            yield pk, self._props(props, requested)
+
+    def propfind(self, request, *args, **kwargs):
+        root = self._parse(request)
+        if root is False:
+            return HttpResponseBadRequest()
+        requested = self._requested(root)
+        latest = max(
+            filter(None, (
+                ContactSummary.objects.aggregate(latest=Max("updated_on"))["latest"],
+                ContactTombstone.objects.aggregate(latest=Max("deleted_on"))["latest"],
+            )),
+            default=None,
+        )
+        collection = {
+            _qname(DAV, "resourcetype"): [ET.Element(_qname(DAV, "collection")), ET.Element(_qname(CARDDAV, "addressbook"))],
+            _qname(DAV, "displayname"): "Contacts",
+            _qname(CALENDARSERVER, "getctag"): make_sync_token(latest) if latest else "",
+            _qname(DAV, "sync-token"): make_sync_token(self.token_moment()),
+        }
+        status = _Multistatus()
+        status.response(request.path, *self._props(collection, requested))
+        if request.headers.get("Depth", "1") != "0":
+            tags = {pk: vcard.etag(pk, updated_on) for pk, updated_on in ContactSummary.objects.order_by("pk").values_list("pk", "updated_on")}
+            for pk, props in self._member_props(tags, requested, with_data=False):
+                status.response(self.member_href(pk), *props)
+        return status.http_response()
+
+    def token_moment(self) -> datetime:
+        return timezone.now() - timedelta(seconds=app_settings.SYNC_TOKEN_OVERLAP_SECONDS)
+
+    def report(self, request, *args, **kwargs):
+        root = self._parse(request)
+        if root is None or root is False:
+            return HttpResponseBadRequest()
+        if root.tag == _qname(DAV, "sync-collection"):
+            return self.sync_collection(root)
+        if root.tag == _qname(CARDDAV, "addressbook-multiget"):
+            return self.multiget(root)
+        return HttpResponseBadRequest()
+
+    def multiget(self, root) -> HttpResponse:
+        """Answer an ``addressbook-multiget`` for the requested member hrefs."""
+        requested = self._requested(root)
+        hrefs = {}
+        for element in root.findall(_qname(DAV, "href")):
+            match = re.search(r"/(\d+)\.vcf$", element.text or "")
+            hrefs[element.text] = int(match[1]) if match else None
+        found = dict(ContactSummary.objects.filter(pk__in=[pk for pk in hrefs.values() if pk]).values_list("pk", "updated_on"))
+        tags = {pk: vcard.etag(pk, found[pk]) for pk in hrefs.values() if pk in found}
+        members = dict(self._member_props(tags, requested, with_data=True))
+        status = _Multistatus()
+        for href, pk in hrefs.items():
+            if pk in members:
+                status.response(href, *members[pk])
+            else:
+                status.response(href, status=404)
+        return status.http_response()
+
+    def sync_collection(self, root) -> HttpResponse:
+        """Answer a ``sync-collection`` report with the changes since its token."""
+        token = root.find(_qname(DAV, "sync-token"))
+        try:
+            since = parse_sync_token((token.text or "").strip() if token is not None else "")
+        except ValueError:
+            error = ET.Element(_qname(DAV, "error"))
+            ET.SubElement(error, _qname(DAV, "valid-sync-token"))
+            return HttpResponse(ET.tostring(error, encoding="utf-8", xml_declaration=True), status=403, content_type="application/xml")
+        requested = self._requested(root)
+        moment = self.token_moment()
+        summaries = ContactSummary.objects.order_by("pk")
+        deleted = []
+        if since is not None:
+            summaries = summaries.filter(updated_on__gt=since)
+            deleted = (
+                ContactTombstone.objects.filter(deleted_on__gt=since)
+                .exclude(contact_id__in=ContactSummary.objects.values("pk"))
+                .order_by("contact_id").values_list("contact_id", flat=True).distinct()
+            )
+        tags = {pk: vcard.etag(pk, updated_on) for pk, updated_on in summaries.values_list("pk", "updated_on")}
+        with_data = requested is not None and _qname(CARDDAV, "address-data") in requested
+        status = _Multistatus()
+        for pk, props in self._member_props(tags, requested, with_data):
+            status.response(self.member_href(pk), *props)
+        for pk in deleted:
+            status.response(self.member_href(pk), status=404)
+        ET.SubElement(status.root, _qname(DAV, "sync-token")).text = make_sync_token(moment)
+        return status.http_response()
+
+
+class VCardView(InstrumentedViewMixin, LoginRequiredMixin, View):
+    """One contact's vCard, with its ETag and cached rendering.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    raise_exception: bool = True
+
+    def get(self, request, pk: int, *args, **kwargs):
+        updated_on = get_object_or_404(ContactSummary.objects.values_list("updated_on", flat=True), pk=pk)
+        tag = vcard.etag(pk, updated_on)
+        if tag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            card = vcard.cards({pk: tag}).get(pk)
+            response = HttpResponse(card, content_type="text/vcard; charset=utf-8")
+        response["ETag"] = tag
+        return response
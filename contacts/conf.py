@@ -0,0 +1,57 @@
+"""contacts.conf
+
+App-level settings for the contacts app.
+
+Every setting is read from the project's settings module using the
+``CONTACTS_`` prefix and falls back to the defaults defined in `DEFAULTS`.
+"""
+
+from django.conf import settings
+
+
+DEFAULTS: dict = {
+    "AUTOCOMPLETE_LIMIT": 20,
+    "AUTOCOMPLETE_MIN_LENGTH": 2,
+    "AUTOCOMPLETE_CACHE_TIMEOUT": 30,
+    "PHONE_CACHE_SIZE": 4096,
+    "PHONE_REGIONS": None,
+    "ZIP_GAZETTEER": None,
+    "INSTRUMENTATION_HOOKS": (),
+    "SLOW_QUERY_THRESHOLD_MS": None,
+    "SLOW_QUERY_SAMPLE_RATE": 0.1,
+    "SLOW_QUERY_EXPLAIN_ANALYZE": False,
+    "SLOW_QUERY_BUFFER_SIZE": 50,
+    "SLOW_QUERY_CACHE": "default",
+    "ARCHIVE_RETENTION_DAYS": 365,
+    "PRIMARY_DATABASE": "default",
+    "READ_REPLICAS": (),
+    "REPLICA_PIN_SECONDS": 5,
+    "TENANT_DATABASES": {},
+    "TASK_BACKEND": None,
+    "TASK_WORKERS": 2,
+    "TASK_STALE_SECONDS": 600,
+    "SYNC_TOKEN_OVERLAP_SECONDS": 5,
+    "TOMBSTONE_RETENTION_DAYS": 90,
+}
+"""Default values for the app's settings, keyed without the ``CONTACTS_`` prefix.
+"""
+
+
+class ContactsSettings:
+    """Lazy accessor for the app's settings.
+
+    Values are looked up on every access so `override_settings` works in tests.
+
+    Example:
+        `app_settings.AUTOCOMPLETE_LIMIT` reads `settings.CONTACTS_AUTOCOMPLETE_LIMIT`
+    """
+
+    prefix: str = "CONTACTS_"
+
+    def __getattr__(self, name: str):
+        if name not in DEFAULTS:
+            raise AttributeError(f"Invalid contacts setting: '{name}'")
+        return getattr(settings, f"{self.prefix}{name}", DEFAULTS[name])
+
+
+app_settings = ContactsSettings()
@@ -0,0 +1,106 @@
+"""contacts.exports
+
+Bulk export of contacts to JSON Lines, the format `contacts.imports` reads.
+
+On PostgreSQL the payloads are built by the database, one `json_build_object`
+per contact with its channels aggregated by correlated subqueries, and
+streamed with `COPY (...) TO STDOUT`, so no model instances are created.
+Other databases page through the contacts in primary key order with their
+channels prefetched.
+"""
+
+import json
+
+from django.db import connections
+from django.db.models import Prefetch
+
+from . import pgcopy
+from .batch import CHANNEL_FIELDS, CHANNELS, CONTACT_FIELDS
+from .instrumentation import instrument
+from .models import Contact
+
+
+EXPORT_FIELDS: dict[str, tuple[str, ...]] = CHANNEL_FIELDS
+"""The fields written for each channel list, the same ones an import accepts."""
+
+RELATED_NAMES: dict[str, str] = {
+    "emails": "contact_email_addresses",
+    "phone_numbers": "contact_phone_numbers",
+    "addresses": "contact_addresses",
+}
+"""The `Contact` relation of each channel list."""
+
+
+def _json_object(connection, alias: str, model, names) -> str:
+    quote = connection.ops.quote_name
+    return "json_build_object({})".format(", ".join(
+        f"'{name}', {alias}.{quote(model._meta.get_field(name).column)}" for name in names
+    ))
+
+
+def export_sql(connection, queryset) -> tuple[str, list]:
+    """The PostgreSQL query selecting one JSON payload per contact of `queryset`.
+
+    Returns:
+        tuple[str, list]: the SQL and its parameters
+    """
+    quote = connection.ops.quote_name
+    channels = []
+    for key, model in CHANNELS.items():
+        fk = quote(model._meta.get_field("contact").column)
+        channels.append(
+            f"'{key}', COALESCE((SELECT json_agg({_json_object(connection, 'ch', model, EXPORT_FIELDS[key])} ORDER BY ch.id) "
+            f"FROM {quote(model._meta.db_table)} ch WHERE ch.{fk} = c.id AND ch.archived_on IS NULL), '[]'::json)"
+        )
+    fields = ", ".join(f"'{name}', c.{quote(Contact._meta.get_field(name).column)}" for name in CONTACT_FIELDS)
+    subquery, params = queryset.order_by().values("pk").query.sql_with_params()
+    sql = (
+        f"SELECT json_build_object({fields}, {', '.join(channels)}) "
+        f"FROM {quote(Contact._meta.db_table)} c WHERE c.id IN ({subquery}) ORDER BY c.id"
+    )
+    return sql, list(params)
+
+
+def payload(contact: Contact) -> dict:
+    """The import payload of a contact with its channels prefetched.
+    """
+    data = {name: getattr(contact, name) for name in CONTACT_FIELDS}
+    for key, related_name in RELATED_NAMES.items():
+        fields = [CHANNELS[key]._meta.get_field(name) for name in EXPORT_FIELDS[key]]
+        data[key] = [
+            {field.name: field.get_prep_value(field.value_from_object(instance)) for field in fields}
+            for instance in getattr(contact, related_name).all()
+        ]
+    return data
+
+
+@instrument()
+def export_contacts(stream, queryset=None, batch_size: int = 5000, use_copy: bool | None = None) -> int:
+    """Write the contacts of `queryset` to `stream` as JSON Lines, in primary key order.
+
+    Args:
+        stream (TextIO): receives one payload per line
+        queryset (QuerySet[Contact], optional): the contacts. Defaults to `Contact.objects.all()`.
+        batch_size (int, optional): contacts per query without `COPY`. Defaults to 5000.
+        use_copy (bool, optional): force or disable `COPY`. Defaults to using it when supported.
+
+    Returns:
+        int: the number of contacts written
+    """
+    queryset = Contact.objects.all() if queryset is None else queryset
+    connection = connections[queryset.db]
+    if use_copy is None:
+        use_copy = pgcopy.supports_copy(connection)
+    if use_copy:
+        return pgcopy.copy_to(connection, *export_sql(connection, queryset), stream)
+    queryset = queryset.order_by("pk").prefetch_related(*(
+        Prefetch(related_name, CHANNELS[key].objects.order_by("pk")) for key, related_name in RELATED_NAMES.items()
+    ))
+    count = 0
+    last_pk = None
+    while contacts := list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:batch_size]):
+        last_pk = contacts[-1].pk
+        for contact in contacts:
+            stream.write(json.dumps(payload(contact)) + "\n")
+        count += len(contacts)
+    return count
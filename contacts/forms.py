@@ -1,8 +1,56 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from localflavor.us.forms import USZipCodeField, USStateField
-from phonenumber_field.formfields import PhoneNumberField
+from django.urls import reverse_lazy
 from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+from .services import create_contact
+from .utils import normalize_email
+
+
+class ContactAutocompleteSelect(forms.Select):
+    """A `<select>` for `Contact` foreign keys that only renders the selected option.
+
+    The remaining options are fetched on demand from the `contacts:autocomplete`
+    endpoint by ``contacts/autocomplete.js``, which adds a search box before the
+    select, so the page size no longer grows with the contacts table.
+    """
+
+    url = reverse_lazy("contacts:autocomplete")
+
+    class Media:
+        js = ("contacts/autocomplete.js",)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.setdefault("data-autocomplete-url", str(self.url))
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Only query and render the currently selected contact(s).
+        """
+        selected = {str(v) for v in value if v not in ("", None)}
+        choices = [("", "---------")]
+        if selected:
+            choices.extend(
+                (contact.pk, str(contact))
+                for contact in Contact.objects.filter(pk__in=selected).only("first_name", "last_name")
+            )
+        original, self.choices = self.choices, choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = original
+
+
+class ContactAutocompleteMixin:
+    """Swaps the widget of each field named in `Meta.autocomplete_fields` for
+    `ContactAutocompleteSelect`, mirroring `ModelAdmin.autocomplete_fields`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in getattr(self.Meta, "autocomplete_fields", ()):
+            self.fields[name].widget = ContactAutocompleteSelect(attrs=self.fields[name].widget.attrs)
 
 
 class ContactModelForm(forms.ModelForm):
@@ -15,17 +63,18 @@ class ContactModelForm(forms.ModelForm):
         fields = ('first_name','last_name','job_title', 'description')
 
 
-class ContactAddressModelForm(forms.ModelForm):
+class ContactAddressModelForm(ContactAutocompleteMixin, forms.ModelForm):
     """ModelForm definition for ContactAddress."""
 
     class Meta:
         """Meta definition for ContactAddressModelForm."""
 
         model = ContactAddress
-        fields = ('contact', 'building_number', 'street_name', 'unit_type','unit_number', 'city', 'state', 'zipcode')
+        fields = ('contact', 'street', 'unit_type','unit_number', 'city', 'state', 'zipcode')
+        autocomplete_fields = ('contact',)
 
 
-class ContactEmailModelForm(forms.ModelForm):
+class ContactEmailModelForm(ContactAutocompleteMixin, forms.ModelForm):
     """ModelForm definition for ContactEmail."""
 
     class Meta:
@@ -33,9 +82,10 @@ class ContactEmailModelForm(forms.ModelForm):
 
         model = ContactEmail
         fields = ('contact','email_address')
+        autocomplete_fields = ('contact',)
 
 
-class ContactPhoneNumberForm(forms.ModelForm):
+class ContactPhoneNumberForm(ContactAutocompleteMixin, forms.ModelForm):
     """ModelForm definition for ContactPhoneNumber."""
 
     class Meta:
@@ -43,6 +93,7 @@ class ContactPhoneNumberForm(forms.ModelForm):
 
         model = ContactPhoneNumber
         fields = ('contact','phone_number',)
+        autocomplete_fields = ('contact',)
 
 
 class ContactFormWithAEP(forms.Form):
@@ -68,16 +119,57 @@ class ContactFormWithAEP(forms.Form):
         zipcode (USZipCodeField): address postal code or zipcode
     """
 
-    first_name = forms.CharField(_("first name"), max_length=50, required=True)
-    last_name = forms.CharField(_("last name"), max_length=50, required=True)
-    job_title = forms.CharField(_("job title"), max_length=250, required=False)
-    contact_desc = forms.CharField(_("additional information about the contact"), widget=forms.Textarea, required=False)
-    email_addr = forms.EmailField(_("email address"), required=True)
-    phone = PhoneNumberField(_("phone number"))
-    building_no = forms.CharField(_("building number"), max_length=50, required=True)
-    street_name = forms.CharField(_("street name"), max_length=150, required=True)
-    unit_type = forms.CharField(_("unit type"), max_length=20, required=False, help_text=_("Suite, Box, Unit, etc."))
-    unit_no = forms.CharField(_("unit number"), max_length=20, required=False, help_text=_("unit identifier ex: 105"))
-    city = forms.CharField(_("city"), max_length=150, required=True)
-    state = USStateField(_("state"))
-    zipcode = USZipCodeField(_("zipcode"))
+    first_name = forms.CharField(label=_("first name"), max_length=50, required=True)
+    last_name = forms.CharField(label=_("last name"), max_length=50, required=True)
+    job_title = forms.CharField(label=_("job title"), max_length=50, required=False)
+    contact_desc = forms.CharField(label=_("additional information about the contact"), widget=forms.Textarea, required=False)
+    email_addr = forms.EmailField(label=_("email address"), required=True)
+    phone = ContactPhoneNumber._meta.get_field("phone_number").formfield(label=_("phone number"))
+    building_no = forms.CharField(label=_("building number"), max_length=50, required=True)
+    street_name = forms.CharField(label=_("street name"), max_length=150, required=True)
+    unit_type = forms.CharField(label=_("unit type"), max_length=20, required=False, help_text=_("Suite, Box, Unit, etc."))
+    unit_no = forms.CharField(label=_("unit number"), max_length=20, required=False, help_text=_("unit identifier ex: 105"))
+    city = forms.CharField(label=_("city"), max_length=150, required=True)
+    state = USStateField(label=_("state"))
+    zipcode = USZipCodeField(label=_("zipcode"))
+
+    def clean_email_addr(self) -> str:
+        """Normalize the email address and reject addresses already on file.
+        """
+        email: str = normalize_email(self.cleaned_data["email_addr"])
+        if ContactEmail.objects.filter(email_address=email).exists():
+            raise forms.ValidationError(_("A contact with this email address already exists."), code="unique")
+        return email
+
+    def save(self, user=None) -> Contact:
+        """Create the contact, email address, phone number and address in one transaction.
+
+        Args:
+            user (optional): the user recorded in the tracking fields
+
+        Returns:
+            Contact: the new contact with its channels prefetched
+        """
+        data: dict = self.cleaned_data
+        contact = Contact(
+            first_name=data["first_name"],
+            last_name=data["last_name"],
+            job_title=data["job_title"] or None,
+            description=data["contact_desc"] or None,
+        )
+        contact.clean()
+        address = ContactAddress(
+            street=f"{data['building_no']} {data['street_name']}",
+            unit_type=data["unit_type"] or "unit",
+            unit_number=data["unit_no"] or None,
+            city=data["city"],
+            state=data["state"],
+            zipcode=data["zipcode"],
+        )
+        return create_contact(
+            contact,
+            emails=[ContactEmail(email_address=data["email_addr"])],
+            phone_numbers=[ContactPhoneNumber(phone_number=data["phone"])],
+            addresses=[address],
+            user=user,
+        )
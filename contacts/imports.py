@@ -0,0 +1,268 @@
+"""contacts.imports
+
+Parallel bulk import of contacts from JSON Lines files.
+
+Each line holds one payload in the shape `contacts.batch` validates. The file
+is split into byte ranges that end on line boundaries, and a
+`ProcessPoolExecutor` parses, cleans and normalizes each range: JSON decoding,
+the model field cleaners, phone number parsing and address normalization are
+CPU-bound and need no database. A single writer in the calling process then
+consumes the ranges in file order, checks email uniqueness with one query per
+batch and inserts each batch, so the rows, their ids and the reported errors
+do not depend on the number of workers.
+
+On PostgreSQL each batch is streamed with `COPY` into staging tables and
+merged into the live tables with one `INSERT ... ON CONFLICT DO NOTHING
+RETURNING` per channel table; a line whose email address another writer
+added since the uniqueness check is not returned by the merge, and it is
+reported as a duplicate. Other databases use `bulk_create`, and a batch that
+collides is rolled back, checked again and written without the lines now
+rejected.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.db import IntegrityError, connections, router, transaction
+from django.utils.translation import gettext_lazy as _
+
+from . import pgcopy
+from .batch import CHANNELS, RowResult, build_row, check_unique_emails
+from .instrumentation import instrument, span
+from .models import Contact
+from .services import insert_contacts, tracking_user
+from .tenants import get_current_tenant, use_tenant
+from .utils import make_sort_name
+
+
+MAX_PARTITION_BYTES = 8 * 1024 * 1024
+"""The largest byte range parsed as one partition, short of a single longer line."""
+
+
+@dataclass
+class ImportReport:
+    """The outcome of `import_contacts`.
+
+    Attributes:
+        created (dict[type, int]): rows created per model
+        errors (dict[int, dict[str, list[str]]]): messages of the rejected lines, keyed
+            by line number and then by field path as in `contacts.batch`
+        lines (int): the last line of the last batch written; an import resumed
+            from the next line neither repeats nor misses a line
+    """
+
+    created: dict[type, int] = field(default_factory=dict)
+    errors: dict[int, dict[str, list[str]]] = field(default_factory=dict)
+    lines: int = 0
+
+
+def partition_file(path: str, parts: int) -> list[tuple[int, int]]:
+    """Split a file into at most `parts` byte ranges of about equal size, each ending on a line boundary.
+
+    Args:
+        path (str): the file
+        parts (int): the number of ranges wanted
+
+    Returns:
+        list[tuple[int, int]]: `(start, end)` offsets in file order; empty for an empty file
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for part in range(1, parts):
+            target = size * part // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # to the start of the line after the one holding `target - 1`
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    return [(start, end) for start, end in zip(bounds, bounds[1:] + [size]) if start < end]
+
+
+def prepare_partition(path: str, start: int, end: int, tenant: str) -> tuple[int, list[RowResult]]:
+    """Parse, clean and normalize the lines of a byte range; run in the pool's workers.
+
+    Args:
+        path (str): the file
+        start (int): offset of the range's first line
+        end (int): offset just past the range's last line
+        tenant (str): the tenant of the new rows
+
+    Returns:
+        tuple[int, list[RowResult]]: the number of lines in the range, and a result per
+        non-blank line whose `index` is the line's position in the range
+    """
+    rows: list[RowResult] = []
+    lines = 0
+    with open(path, "rb") as f, use_tenant(tenant):
+        f.seek(start)
+        position = start
+        for line in f:
+            if position >= end:
+                break
+            position += len(line)
+            index, lines = lines, lines + 1
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                payload = e
+            if not isinstance(payload, dict):
+                row = RowResult(index=index, contact=Contact())
+                row.add_error("", [_("Not a JSON object: %(error)s") % {"error": payload}])
+                rows.append(row)
+                continue
+            row = build_row(index, payload)
+            if row.is_valid:
+                row.contact.sort_name = make_sort_name(row.contact.first_name, row.contact.last_name)
+                for instances in row.channels.values():
+                    for instance in instances:
+                        instance.refresh_derived_fields()
+            rows.append(row)
+    return lines, rows
+
+
+def _insert_batch(rows: list[RowResult], using: str, use_copy: bool, user) -> dict[type, int]:
+    channels: dict[type, list] = {model: [] for model in CHANNELS.values()}
+    for row in rows:
+        for key, model in CHANNELS.items():
+            for instance in row.channels[key]:
+                instance.contact = row.contact
+                channels[model].append(instance)
+    contacts = [row.contact for row in rows]
+    created = insert_contacts(contacts, channels, using=using, use_copy=use_copy, merge=use_copy, user=user)
+    if use_copy:
+        # the merge leaves the rows it skipped without an id; only email addresses are unique
+        for row in rows:
+            for position, email in enumerate(row.channels["emails"]):
+                if email.pk is None:
+                    row.add_error(f"emails.{position}.email_address", [_("A contact with this email address already exists.")])
+    return created
+
+
+def _reset_ids(rows: list[RowResult]) -> None:
+    """Forget the ids a rolled back batch assigned to its rows' instances.
+    """
+    for row in rows:
+        row.contact.pk = None
+        for instances in row.channels.values():
+            for instance in instances:
+                instance.pk = None
+
+
+def _worker_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _prepared(path: str, workers: int, tenant: str):
+    """Yield `(lines, rows)` per partition in file order, keeping at most two
+    partitions per worker in flight.
+
+    Partitions hold at most `MAX_PARTITION_BYTES` of the file, so the parsed
+    rows held at once grow with the number of workers, not with the file.
+    """
+    parts = max(workers * 4, math.ceil(os.path.getsize(path) / MAX_PARTITION_BYTES))
+    partitions = partition_file(path, parts)
+    if workers == 1:
+        for start, end in partitions:
+            yield prepare_partition(path, start, end, tenant)
+        return
+    # forked workers would inherit the open database connections, and this process may be
+    # inside a transaction that cannot close them, so the workers start from a fresh interpreter
+    with ProcessPoolExecutor(workers, mp_context=_worker_context(), initializer=django.setup) as executor:
+        pending = deque()
+        for start, end in partitions:
+            pending.append(executor.submit(prepare_partition, path, start, end, tenant))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+@instrument()
+def import_contacts(
+    path: str,
+    workers: int | None = None,
+    batch_size: int = 5000,
+    using: str | None = None,
+    use_copy: bool | None = None,
+    user=None,
+    progress=None,
+    start_line: int = 1,
+) -> ImportReport:
+    """Import the contacts of a JSON Lines file, parsing on `workers` processes.
+
+    Valid lines are inserted in file order, one transaction per `batch_size`
+    contacts; lines that fail validation, or repeat an email address of an
+    earlier line or of the database, are skipped and reported. Errors are
+    found before their batch is written, so an interrupted import leaves whole
+    batches behind; pass `start_line=report.lines + 1` to continue after them.
+
+    Args:
+        path (str): the file, one payload per line
+        workers (int, optional): parsing processes. Defaults to the number of CPUs; 1 parses in-process.
+        batch_size (int, optional): contacts per transaction. Defaults to 5000.
+        using (str, optional): the database alias. Defaults to the router's choice for `Contact`.
+        use_copy (bool, optional): force or disable `COPY`. Defaults to using it when supported.
+        user (optional): the user recorded in `created_by` and `updated_by`
+        progress (callable, optional): called with the `ImportReport` so far after each batch
+        start_line (int, optional): skip the lines before this one. Defaults to 1.
+
+    Returns:
+        ImportReport: the rows created and the rejected lines
+    """
+    using = using or router.db_for_write(Contact)
+    if use_copy is None:
+        use_copy = pgcopy.supports_copy(connections[using])
+    workers = workers or os.cpu_count() or 1
+    user = tracking_user(user)
+    report = ImportReport(created={Contact: 0, **{model: 0 for model in CHANNELS.values()}})
+    seen: dict[str, str] = {}
+    batch: list[RowResult] = []
+
+    def flush():
+        check_unique_emails(batch, seen, using)
+        while valid := [row for row in batch if row.is_valid]:
+            try:
+                with span("contacts.imports.import_contacts.batch"), transaction.atomic(using=using):
+                    created = _insert_batch(valid, using, use_copy, user)
+            except IntegrityError:
+                # another writer added one of the email addresses since the check
+                check_unique_emails(valid, {}, using)
+                if all(row.is_valid for row in valid):
+                    raise
+                _reset_ids(valid)
+                continue
+            for model, count in created.items():
+                report.created[model] += count
+            break
+        for row in batch:
+            if row.errors:
+                report.errors[row.index] = row.errors
+        report.lines = batch[-1].index
+        batch.clear()
+        if progress:
+            progress(report)
+
+    first_line = 1
+    for lines, rows in _prepared(path, workers, get_current_tenant()):
+        for row in rows:
+            row.index += first_line
+            if row.index < start_line:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        first_line += lines
+    if batch:
+        flush()
+    return report
@@ -0,0 +1,28 @@
+"""contacts.indexes
+
+Index classes for the contacts models.
+"""
+
+from django.contrib.postgres.indexes import OpClass
+from django.db import models
+
+
+class PatternIndex(models.Index):
+    """An index whose `OpClass` expressions only keep their operator class on PostgreSQL.
+
+    Case-insensitive prefix lookups such as `email_address__istartswith`
+    compile to ``UPPER(...) LIKE 'TERM%'`` on PostgreSQL, which can only use an
+    index over ``UPPER(...) text_pattern_ops`` unless the database uses the C
+    collation. Other backends index the bare expression, since they have no
+    operator classes.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql" and self.expressions:
+            index = self.clone()
+            index.expressions = tuple(
+                expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression
+                for expression in self.expressions
+            )
+            return super(PatternIndex, index).create_sql(model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
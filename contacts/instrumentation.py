@@ -0,0 +1,326 @@
+"""contacts.instrumentation
+
+Timing and query-count spans around the contacts app's hot paths.
+
+Code paths are wrapped with `span()` or the `instrument()` decorator. A
+finished span is passed to every hook listed in `CONTACTS_INSTRUMENTATION_HOOKS`
+and, while `ContactsQueryMiddleware` is active, collected for the current
+request. With no hooks and no middleware a span costs one context variable
+lookup, so the instrumentation can stay in place in production.
+
+Bundled hooks:
+
+- `LoggingHook` logs each span to the ``contacts.instrumentation`` logger.
+- `CounterHook` keeps Prometheus-style call, duration and query counters.
+- `OpenTelemetryHook` exports spans through OpenTelemetry when it is installed.
+"""
+
+import functools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .conf import app_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A finished, timed unit of work.
+
+    Attributes:
+        name (str): the instrumented code path, e.g. `"view.ContactList"`
+        start (float): the `time.time()` at which it started
+        duration (float): wall time in seconds
+        queries (int): SQL statements run, including those of nested spans
+        depth (int): the nesting level; 0 for outermost spans
+        error (str | None): the exception class name if the span raised
+    """
+
+    name: str
+    start: float
+    duration: float = 0.0
+    queries: int = 0
+    depth: int = 0
+    error: str | None = None
+
+
+class Hook(ABC):
+    """Receives every finished span. Subclasses implement `record`.
+
+    A hook that raises is logged and skipped, so it cannot fail the
+    instrumented call or replace its exception.
+    """
+
+    @abstractmethod
+    def record(self, span: Span) -> None:
+        """Handle a finished span."""
+
+
+class LoggingHook(Hook):
+    """Log each span at DEBUG level, or WARNING when slower than `slow_ms`.
+    """
+
+    def __init__(self, slow_ms: float = 500.0):
+        self.slow_ms = slow_ms
+
+    def record(self, span: Span) -> None:
+        ms = span.duration * 1000
+        level = logging.WARNING if ms >= self.slow_ms else logging.DEBUG
+        logger.log(level, "%s took %.1fms and %d queries", span.name, ms, span.queries,
+                   extra={"span": span.name, "duration_ms": ms, "queries": span.queries})
+
+
+class CounterHook(Hook):
+    """In-process Prometheus-style counters per span name.
+
+    `render()` returns the counters in the Prometheus text exposition format,
+    ready to serve from a metrics endpoint.
+    """
+
+    metrics: tuple[tuple[str, str], ...] = (
+        ("contacts_span_calls_total", "Instrumented calls."),
+        ("contacts_span_seconds_total", "Wall time spent in instrumented calls."),
+        ("contacts_span_queries_total", "SQL queries run by instrumented calls."),
+        ("contacts_span_errors_total", "Instrumented calls that raised."),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, list] = defaultdict(lambda: [0, 0.0, 0, 0])
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            counter = self.counters[span.name]
+            counter[0] += 1
+            counter[1] += span.duration
+            counter[2] += span.queries
+            counter[3] += span.error is not None
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for i, (metric, help_text) in enumerate(self.metrics):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{span="{name}"}} {values[i]}' for name, values in sorted(self.counters.items())]
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook(Hook):
+    """Export spans with the OpenTelemetry tracer, or do nothing if it is not installed.
+    """
+
+    def __init__(self, tracer_name: str = "contacts"):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("OpenTelemetryHook configured but opentelemetry is not installed")
+            self.tracer = None
+        else:
+            self.tracer = trace.get_tracer(tracer_name)
+
+    def record(self, span: Span) -> None:
+        if self.tracer is None:
+            return
+        start_ns = int(span.start * 1e9)
+        otel_span = self.tracer.start_span(span.name, start_time=start_ns, attributes={
+            "contacts.queries": span.queries,
+            "contacts.depth": span.depth,
+        })
+        if span.error:
+            otel_span.set_attribute("error.type", span.error)
+        otel_span.end(end_time=start_ns + int(span.duration * 1e9))
+
+
+_hooks: list[Hook] | None = None
+_collector: ContextVar[list[Span] | None] = ContextVar("contacts_spans", default=None)
+_depth: ContextVar[int] = ContextVar("contacts_span_depth", default=0)
+
+
+def get_hooks() -> list[Hook]:
+    """The configured hooks, instantiated once from `CONTACTS_INSTRUMENTATION_HOOKS`.
+
+    Each entry is a dotted path to a `Hook` subclass, or a `(path, kwargs)` pair.
+    """
+    global _hooks
+    if _hooks is None:
+        hooks = []
+        for entry in app_settings.INSTRUMENTATION_HOOKS:
+            path, kwargs = (entry, {}) if isinstance(entry, str) else entry
+            hooks.append(import_string(path)(**kwargs))
+        _hooks = hooks
+    return _hooks
+
+
+@receiver(setting_changed)
+def _reset_hooks(setting, **kwargs):
+    global _hooks
+    if setting == "CONTACTS_INSTRUMENTATION_HOOKS":
+        _hooks = None
+
+
+def enabled() -> bool:
+    """Whether spans are currently recorded.
+    """
+    return bool(get_hooks()) or _collector.get() is not None
+
+
+@contextmanager
+def _record(name: str):
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    span = Span(name=name, start=time.time(), depth=_depth.get())
+    token = _depth.set(span.depth + 1)
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            # every alias, not just those already open in this thread: execute_wrapper opens no connection
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count))
+            yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        span.duration = time.perf_counter() - started
+        span.queries = queries[0]
+        _depth.reset(token)
+        collected = _collector.get()
+        if collected is not None:
+            collected.append(span)
+        for hook in get_hooks():
+            try:
+                hook.record(span)
+            except Exception:
+                logger.exception("Instrumentation hook %r failed on span %s", hook, span.name)
+
+
+def span(name: str):
+    """Time the enclosed block and count its queries.
+
+    Example:
+        `with span("export.csv"): ...`
+
+    Returns:
+        a context manager yielding the `Span`, or `None` when instrumentation is off
+    """
+    if not enabled():
+        return nullcontext()
+    return _record(name)
+
+
+def instrument(name: str | None = None):
+    """Decorate a function to run it inside a `span`.
+
+    Args:
+        name (str, optional): the span name. Defaults to the function's module and qualified name.
+    """
+
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            with _record(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class InstrumentedViewMixin:
+    """Run a class-based view's `dispatch` inside a `view.<ClassName>` span.
+
+    A template response's deferred rendering gets its own `view.<ClassName>.render` span.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        name = f"view.{type(self).__name__}"
+        with span(name):
+            response = super().dispatch(request, *args, **kwargs)
+        if enabled() and not getattr(response, "is_rendered", True):
+            # template responses render after dispatch returns, and that is where lazy querysets run
+            response.render = instrument(f"{name}.render")(response.render)
+        return response
+
+
+@contextmanager
+def collect_spans():
+    """Collect the spans finished inside the block, whatever the configured hooks.
+
+    Yields:
+        list[Span]: the spans, in the order they finished
+    """
+    spans: list[Span] = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+
+def summarize(spans: list[Span]) -> dict:
+    """Totals for a request: the outermost spans' time and queries, and per-name counts.
+    """
+    by_name: dict[str, dict] = {}
+    for s in spans:
+        entry = by_name.setdefault(s.name, {"calls": 0, "duration": 0.0, "queries": 0})
+        entry["calls"] += 1
+        entry["duration"] += s.duration
+        entry["queries"] += s.queries
+    outermost = [s for s in spans if s.depth == 0]
+    return {
+        "duration": sum(s.duration for s in outermost),
+        "queries": sum(s.queries for s in outermost),
+        "spans": by_name,
+    }
+
+
+class ContactsQueryMiddleware:
+    """Debug middleware summarizing the contacts app's cost for each request.
+
+    Adds a ``Server-Timing`` header with the time and queries spent in
+    instrumented contacts code and logs a per-span breakdown. Only active when
+    `DEBUG` is true.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_spans() as spans:
+            response = self.get_response(request)
+        if spans:
+            summary = summarize(spans)
+            response["Server-Timing"] = (
+                f'contacts;dur={summary["duration"] * 1000:.1f};desc="{summary["queries"]} queries"'
+            )
+            logger.debug(
+                "%s %s: contacts %.1fms, %d queries; %s",
+                request.method, request.path, summary["duration"] * 1000, summary["queries"],
+                ", ".join(f'{name} x{v["calls"]} {v["queries"]}q' for name, v in summary["spans"].items()),
+            )
+        return response
@@ -0,0 +1,40 @@
+"""contacts.management.commands.archive_contacts
+
+Move long-archived contacts and their channels into the cold `ArchivedContact*` tables.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import router
+from django.utils import timezone
+from contacts.conf import app_settings
+from contacts.models import Contact
+from contacts.services import move_archived_contacts
+
+
+class Command(BaseCommand):
+    help = "Move contacts archived longer than the retention period out of the live tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None,
+            help="move contacts archived more than this many days ago (default: CONTACTS_ARCHIVE_RETENTION_DAYS)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="contacts per transaction (default: 1000)")
+        parser.add_argument("--dry-run", action="store_true", help="only count the contacts that would be moved")
+        parser.add_argument("--database", default=None, help="database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        days: int = options["days"] if options["days"] is not None else app_settings.ARCHIVE_RETENTION_DAYS
+        before = timezone.now() - timedelta(days=days)
+        using: str = options["database"] or router.db_for_write(Contact)
+        if options["dry_run"]:
+            count = Contact.all_objects.using(using).filter(archived_on__lt=before).count()
+            self.stdout.write(f"Would move {count} contact(s).")
+            return
+        started = time.perf_counter()
+        counts = move_archived_contacts(before, batch_size=options["batch_size"], using=using)
+        moved = ", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in counts.items()) or "nothing"
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,60 @@
+"""contacts.management.commands.import_contacts
+
+Import contacts from a JSON Lines file, parsing on several processes.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from contacts.imports import import_contacts
+from contacts.models import Contact
+from contacts.tenants import use_tenant
+
+
+class Command(BaseCommand):
+    help = "Import contacts from a JSON Lines file, one contacts.batch payload per line."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="the file to import")
+        parser.add_argument("--workers", type=int, default=None, help="parsing processes (default: one per CPU)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="contacts per transaction (default: 5000)")
+        parser.add_argument("--tenant", default="", help="tenant of the imported contacts (default: none)")
+        parser.add_argument("--user", help="username recorded as the contacts' creator")
+        parser.add_argument("--no-copy", action="store_true", help="use bulk_create even on PostgreSQL")
+        parser.add_argument("--database", default=None, help="database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        using: str = options["database"] or router.db_for_write(Contact)
+        user = None
+        if options["user"]:
+            User = get_user_model()
+            try:
+                user = User._default_manager.db_manager(using).get_by_natural_key(options["user"])
+            except User.DoesNotExist as e:
+                raise CommandError(f"unknown user {options['user']!r}") from e
+        progress = None
+        if options["verbosity"] > 1:
+            progress = lambda report: self.stdout.write(f"  {report.created[Contact]} contacts (line {report.lines})")
+        started = time.perf_counter()
+        try:
+            with use_tenant(options["tenant"]):
+                report = import_contacts(
+                    options["path"],
+                    workers=options["workers"],
+                    batch_size=options["batch_size"],
+                    using=using,
+                    use_copy=False if options["no_copy"] else None,
+                    user=user,
+                    progress=progress,
+                )
+        except OSError as e:
+            raise CommandError(e) from e
+        for line, errors in report.errors.items():
+            for path, messages in errors.items():
+                self.stderr.write(f"line {line}: {path + ': ' if path else ''}{' '.join(messages)}")
+        created = ", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in report.created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} in {time.perf_counter() - started:.1f}s; rejected {len(report.errors)} line(s)."
+        ))
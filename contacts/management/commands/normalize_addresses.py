@@ -0,0 +1,22 @@
+"""contacts.management.commands.normalize_addresses
+
+Backfill the normalized address fields and zipcode centroids in batches.
+"""
+
+from django.core.management.base import BaseCommand
+from contacts.models import ContactAddress
+
+
+class Command(BaseCommand):
+    help = "Recompute normalized address fields and zipcode centroids for contact addresses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="rows per batch (default: 1000)")
+        parser.add_argument("--all", action="store_true", help="refresh every address, not only those never normalized")
+
+    def handle(self, *args, **options):
+        queryset = ContactAddress.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(normalized_street="")
+        count: int = queryset.refresh_derived_fields(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Normalized {count} address(es)."))
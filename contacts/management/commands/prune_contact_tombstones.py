@@ -0,0 +1,25 @@
+"""contacts.management.commands.prune_contact_tombstones
+
+Delete the deletion markers that CardDAV sync tokens can no longer reach.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import router
+from django.utils import timezone
+from contacts.conf import app_settings
+from contacts.models import ContactTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete contact tombstones older than CONTACTS_TOMBSTONE_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=None, help="database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=app_settings.TOMBSTONE_RETENTION_DAYS)
+        using: str = options["database"] or router.db_for_write(ContactTombstone)
+        count = ContactTombstone._base_manager.using(using).filter(deleted_on__lt=before)._raw_delete(using)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} tombstone(s)."))
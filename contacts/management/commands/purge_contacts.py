@@ -0,0 +1,51 @@
+"""contacts.management.commands.purge_contacts
+
+Delete stale contacts and their channels in set-based chunks.
+"""
+
+import time
+from datetime import datetime, time as dt_time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.utils import timezone
+from contacts.models import Contact
+from contacts.services import purge_contacts
+
+
+class Command(BaseCommand):
+    help = "Delete the contacts not updated since a date, with their emails, phone numbers and addresses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--updated-before", required=True, help="delete contacts last updated before this date (YYYY-MM-DD)")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="contacts per transaction (default: 1000)")
+        parser.add_argument("--send-signals", action="store_true", help="delete through Django's collector, running delete receivers")
+        parser.add_argument("--user", help="username recorded in the admin log")
+        parser.add_argument("--dry-run", action="store_true", help="only count the contacts that would be deleted")
+        parser.add_argument("--database", default=None, help="database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        try:
+            before = timezone.make_aware(datetime.combine(datetime.strptime(options["updated_before"], "%Y-%m-%d"), dt_time.min))
+        except ValueError as e:
+            raise CommandError(f"--updated-before: {e}") from e
+        using: str = options["database"] or router.db_for_write(Contact)
+        user = None
+        if options["user"]:
+            User = get_user_model()
+            try:
+                user = User._default_manager.db_manager(using).get_by_natural_key(options["user"])
+            except User.DoesNotExist as e:
+                raise CommandError(f"unknown user {options['user']!r}") from e
+        queryset = Contact.objects.using(using).filter(updated_on__lt=before)
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {queryset.count()} contact(s).")
+            return
+        started = time.perf_counter()
+        try:
+            counts = purge_contacts(queryset, chunk_size=options["chunk_size"], send_signals=options["send_signals"], user=user)
+        except ValueError as e:
+            raise CommandError(e) from e
+        deleted = ", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in counts.items()) or "nothing"
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,18 @@
+"""contacts.management.commands.refresh_address_rollup
+
+Refresh the materialized address counts behind `ContactAddress.objects.rollup(use_summary=True)`.
+"""
+
+from django.core.management.base import BaseCommand
+from contacts.models import AddressRollup
+
+
+class Command(BaseCommand):
+    help = "Recount the address rollup groups changed since the last refresh."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="rebuild every group")
+
+    def handle(self, *args, **options):
+        count: int = AddressRollup.objects.refresh(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} group(s)."))
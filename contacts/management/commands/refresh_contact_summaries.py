@@ -0,0 +1,20 @@
+"""contacts.management.commands.refresh_contact_summaries
+
+Rebuild the `ContactSummary` rows behind the contact list.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import router
+from contacts.models import ContactSummary
+
+
+class Command(BaseCommand):
+    help = "Recompute the summary row of every contact."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="contacts per upsert (default: 1000)")
+        parser.add_argument("--database", default=None, help="the database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        count: int = ContactSummary.objects.db_manager(options["database"] or router.db_for_write(ContactSummary)).rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} contact summar{'y' if count == 1 else 'ies'}."))
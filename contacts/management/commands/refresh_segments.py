@@ -0,0 +1,18 @@
+"""contacts.management.commands.refresh_segments
+
+Refresh the contact id bitmaps that `contacts.segments` evaluates segments against.
+"""
+
+from django.core.management.base import BaseCommand
+from contacts.models import SegmentBitmap
+
+
+class Command(BaseCommand):
+    help = "Recompute the segment bitmaps of the contacts changed since the last refresh."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="rebuild every bitmap")
+
+    def handle(self, *args, **options):
+        count: int = SegmentBitmap.objects.refresh(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} bitmap(s)."))
@@ -0,0 +1,53 @@
+"""contacts.management.commands.seed_contacts
+
+Generate deterministic synthetic contacts for load testing.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from contacts.models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+from contacts.seeding import parse_distribution, seed_contacts
+
+
+def _distribution(value: str) -> dict[int, float]:
+    try:
+        return parse_distribution(value)
+    except ValueError as e:
+        raise CommandError(f"{e}; expected COUNT:WEIGHT pairs such as 0:0.1,1:0.7,2:0.2") from e
+
+
+class Command(BaseCommand):
+    help = "Create synthetic contacts with emails, phone numbers and addresses for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="number of contacts to create")
+        parser.add_argument("--seed", type=int, default=0, help="random seed; equal seeds give equal data (default: 0)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="contacts per batch (default: 5000)")
+        parser.add_argument("--emails", default="0:0.1,1:0.7,2:0.2", help="weights of emails per contact (default: 0:0.1,1:0.7,2:0.2)")
+        parser.add_argument("--phones", default="0:0.1,1:0.7,2:0.2", help="weights of phone numbers per contact")
+        parser.add_argument("--addresses", default="0:0.1,1:0.7,2:0.2", help="weights of addresses per contact")
+        parser.add_argument("--no-copy", action="store_true", help="use bulk_create even on PostgreSQL")
+        parser.add_argument("--database", default=None, help="database alias (default: the router's choice for writes)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        progress = None
+        if options["verbosity"] > 1:
+            progress = lambda written: self.stdout.write(f"  {written} contacts")
+        totals = seed_contacts(
+            options["count"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            emails=_distribution(options["emails"]),
+            phone_numbers=_distribution(options["phones"]),
+            addresses=_distribution(options["addresses"]),
+            using=options["database"],
+            use_copy=False if options["no_copy"] else None,
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {totals[Contact]} contact(s), {totals[ContactEmail]} email(s), "
+            f"{totals[ContactPhoneNumber]} phone number(s) and {totals[ContactAddress]} address(es) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,43 @@
+"""contacts.management.commands.slow_queries
+
+Show or clear the buffer of slow contacts queries and their sampled plans.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+from contacts.slowqueries import clear_slow_queries, get_slow_queries
+
+
+class Command(BaseCommand):
+    help = "List slow contacts queries captured by the sampler, with their EXPLAIN plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="entries to show (default: 20)")
+        parser.add_argument("--json", action="store_true", help="print the entries as JSON")
+        parser.add_argument("--clear", action="store_true", help="empty the buffer")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            clear_slow_queries()
+            self.stdout.write(self.style.SUCCESS("Cleared the slow query buffer."))
+            return
+        entries = get_slow_queries()[:options["limit"]]
+        if options["json"]:
+            self.stdout.write(json.dumps(entries, indent=2))
+            return
+        if not entries:
+            self.stdout.write("No slow queries recorded.")
+            return
+        for entry in entries:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{entry['count']}x, max {entry['max_ms']:.1f}ms, last {entry['last_ms']:.1f}ms "
+                f"at {entry['last_seen']} ({entry['database']})"
+            ))
+            self.stdout.write(entry["fingerprint"])
+            if entry["plan"]:
+                self.stdout.write(("EXPLAIN ANALYZE" if entry["analyze"] else "EXPLAIN") + ":")
+                self.stdout.write(entry["plan"])
+            elif entry.get("plan_error"):
+                self.stdout.write(f"EXPLAIN failed: {entry['plan_error']}")
+            self.stdout.write("")
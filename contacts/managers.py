@@ -0,0 +1,1015 @@
+"""contacts.managers
+
+Custom querysets and managers for the contacts app's models.
+"""
+
+import operator
+import re
+from datetime import timedelta
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from .bitmaps import FORMAT, Bitmap
+from .conf import app_settings
+from .instrumentation import instrument
+from .tenants import get_current_tenant
+from .addresses import bounding_box, distance_miles, normalize_city, normalize_street, normalize_zipcode
+from .utils import normalize_email
+
+
+CHANNELS: tuple[str, ...] = ("contact_email_addresses", "contact_phone_numbers", "contact_addresses")
+"""The related names of a contact's channels."""
+
+MAX_ORG_DEPTH: int = 50
+"""How deep the recursive org chart queries follow `reports_to` and `Organization.parent` links."""
+
+
+def _write_db(rows) -> str:
+    """The alias writes through the manager or queryset `rows` go to: its `using()` alias, else the router's."""
+    return rows._db or router.db_for_write(rows.model, **rows._hints)
+
+
+def _refresh_summaries(model, contact_ids, using: str) -> None:
+    model._meta.apps.get_model("contacts", "ContactSummary").objects.db_manager(using).refresh(contact_ids)
+
+
+def _organization_tree(connection, organization, pk: int, depth: int) -> models.expressions.RawSQL:
+    """A subquery of the ids of organization `pk` and its live sub-organizations down to `depth` levels.
+    """
+    quote = connection.ops.quote_name
+    table = quote(organization._meta.db_table)
+    return models.expressions.RawSQL(
+        f"WITH RECURSIVE tree (id, depth) AS ("
+        f"SELECT o.id, 0 FROM {table} o WHERE o.id = %s "
+        f"UNION ALL SELECT o.id, tree.depth + 1 FROM tree JOIN {table} o ON o.parent_id = tree.id "
+        f"WHERE o.archived_on IS NULL AND tree.depth < %s) SELECT id FROM tree",
+        (pk, depth),
+    )
+
+
+class ArchivableQuerySet(models.QuerySet):
+    """QuerySet definition for `ObjectTrackingMixin` models, which are soft-deleted by setting `archived_on`
+    """
+
+    def _contact_ids(self) -> set:
+        """The contacts whose derived rows `archive()` and `restore()` of these rows affect."""
+        return set(self.values_list("contact_id", flat=True))
+
+    def _contacts_changed(self, contact_ids) -> None:
+        """Bring the contacts' derived rows up to date after `archive()` or `restore()`."""
+        _refresh_summaries(self.model, contact_ids, self.db)
+
+    def archive(self) -> int:
+        """Soft-delete the rows with one `UPDATE`, refreshing their contacts' summaries.
+
+        Returns:
+            int: the number of rows archived
+        """
+        rows = self.using(_write_db(self))
+        with transaction.atomic(using=rows.db):
+            contact_ids = rows._contact_ids()
+            now = timezone.now()
+            count = rows.filter(archived_on__isnull=True).update(archived_on=now, updated_on=now)
+            rows._contacts_changed(contact_ids)
+        return count
+
+    def restore(self) -> int:
+        """Undo `archive()`. Use an `all_objects` queryset; the default managers exclude archived rows.
+
+        Returns:
+            int: the number of rows restored
+        """
+        rows = self.using(_write_db(self))
+        with transaction.atomic(using=rows.db):
+            contact_ids = rows._contact_ids()
+            count = rows.filter(archived_on__isnull=False).update(archived_on=None, updated_on=timezone.now())
+            rows._contacts_changed(contact_ids)
+        return count
+
+
+class TenantManager(models.Manager):
+    """Manager returning only the current tenant's rows, see `contacts.tenants`.
+
+    The composite indexes on the contacts tables lead with `tenant` to match.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(tenant=get_current_tenant())
+
+
+class ArchivableManager(TenantManager.from_queryset(ArchivableQuerySet)):
+    """Default manager for `ObjectTrackingMixin` models: the current tenant's rows, excluding archived ones.
+
+    The partial indexes on the contacts tables share its `archived_on IS NULL` condition.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_on__isnull=True)
+
+
+class ContactQuerySet(ArchivableQuerySet):
+    """QuerySet definition for `contacts.models.Contact`
+    """
+
+    def _related_model(self, related_name: str) -> type[models.Model]:
+        return self.model._meta.get_field(related_name).related_model
+
+    def prefix_search(self, term: str) -> "ContactQuerySet":
+        """Filter contacts whose sort name, an email address or a phone number
+        starts with `term`.
+
+        Every branch is a left-anchored match against an indexed column, and the
+        channel tables are searched through `IN` subqueries so no join fans out
+        the result rows.
+
+        Args:
+            term (str): the search prefix
+
+        Returns:
+            ContactQuerySet: the matching contacts
+        """
+        term = (term or "").strip().lower()
+        if not term:
+            return self.none()
+        query = models.Q(sort_name__startswith=term)
+        emails = self._related_model("contact_email_addresses").objects.filter(email_address__istartswith=term)
+        query |= models.Q(pk__in=emails.values("contact_id"))
+        digits = re.sub(r"\D", "", term)
+        if len(digits) >= 3:
+            phones = self._related_model("contact_phone_numbers").objects.filter(
+                models.Q(phone_number__startswith=f"+{digits}") | models.Q(phone_number__startswith=f"+1{digits}")
+            )
+            query |= models.Q(pk__in=phones.values("contact_id"))
+        return self.filter(query)
+
+    def autocomplete(self, term: str, limit: int) -> "ContactQuerySet":
+        """A limited, ordered `prefix_search` for picker widgets.
+
+        Args:
+            term (str): the search prefix
+            limit (int): the maximum number of results
+
+        Returns:
+            ContactQuerySet: at most `limit` contacts ordered by `sort_name`
+        """
+        return self.prefix_search(term).order_by("sort_name", "pk")[:limit]
+
+    def org_members(self, organization, depth: int | None = 0) -> "ContactQuerySet":
+        """Contacts who work at `organization` or, down to `depth` levels, at its sub-organizations.
+
+        The organization tree is walked by a recursive CTE inside the query, and
+        each contact is annotated with `reports_to_id`, the contact they report
+        to, so an org chart renders from this one query.
+
+        Args:
+            organization (Organization | int): the organization or its primary key
+            depth (int, optional): levels of sub-organizations to include; None for
+                all of them. Defaults to 0, the organization's own members.
+
+        Returns:
+            ContactQuerySet: the members, annotated with `reports_to_id`
+        """
+        relationship = self._related_model("relationships")
+        tree = _organization_tree(
+            connections[self.db], relationship._meta.get_field("organization").related_model,
+            getattr(organization, "pk", organization), MAX_ORG_DEPTH if depth is None else depth,
+        )
+        members = relationship.objects.filter(kind=relationship.Kind.WORKS_AT, organization__in=tree)
+        manager = relationship.objects.filter(kind=relationship.Kind.REPORTS_TO, contact=models.OuterRef("pk"))
+        return self.filter(pk__in=members.values("contact_id")).annotate(
+            reports_to_id=models.Subquery(manager.values("manager_id")[:1]),
+        )
+
+    def reports_to_chain(self, contact) -> list:
+        """The contacts above `contact` in the reporting lines, nearest first, with one query.
+
+        Follows the `reports_to` relationships with a recursive CTE, so it does
+        not depend on the `ReportingLine` closure being current. Contacts
+        excluded from this queryset, such as archived ones, are skipped.
+
+        Args:
+            contact (Contact | int): the contact or its primary key
+
+        Returns:
+            list[Contact]: the managers, each annotated with `depth` (1 for the direct manager)
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        relationship = self._related_model("relationships")
+        table = quote(relationship._meta.db_table)
+        kind = relationship.Kind.REPORTS_TO
+        chain = (
+            f"WITH RECURSIVE chain (contact_id, depth) AS ("
+            f"SELECT r.manager_id, 1 FROM {table} r WHERE r.contact_id = %s AND r.kind = %s AND r.archived_on IS NULL "
+            f"UNION ALL SELECT r.manager_id, chain.depth + 1 FROM chain JOIN {table} r ON r.contact_id = chain.contact_id "
+            f"WHERE r.kind = %s AND r.archived_on IS NULL AND chain.depth < %s)"
+        )
+        sql, params = self.order_by().query.sql_with_params()
+        return list(self.raw(
+            f"{chain} SELECT c.*, chain.depth FROM ({sql}) c JOIN chain ON c.{quote(self.model._meta.pk.column)} = chain.contact_id "
+            f"ORDER BY chain.depth",
+            [getattr(contact, "pk", contact), kind, kind, MAX_ORG_DEPTH, *params],
+        ))
+
+    def reports(self, manager, depth: int | None = None) -> "ContactQuerySet":
+        """The contacts reporting to `manager`, directly or down to `depth` levels,
+        from the `ReportingLine` closure in one indexed join.
+
+        Args:
+            manager (Contact | int): the manager or its primary key
+            depth (int, optional): levels to include; 1 for direct reports. Defaults to all.
+
+        Returns:
+            ContactQuerySet: the reports
+        """
+        lookups = {"manager_lines__ancestor": manager}
+        if depth is not None:
+            lookups["manager_lines__depth__lte"] = depth
+        return self.filter(**lookups)
+
+    def archive(self) -> int:
+        """Soft-delete the contacts with their channels, and drop their summaries.
+
+        Each table gets one `UPDATE` and the contacts are selected by subquery,
+        so nothing is loaded.
+
+        Returns:
+            int: the number of contacts archived
+        """
+        now = timezone.now()
+        using = _write_db(self)
+        contacts = self.using(using).filter(archived_on__isnull=True)
+        with transaction.atomic(using=using):
+            for related_name in CHANNELS:
+                self._related_model(related_name)._base_manager.using(using).filter(
+                    contact__in=contacts.values("pk"), archived_on__isnull=True,
+                ).update(archived_on=now, updated_on=now)
+            self._related_model("summary")._default_manager.db_manager(using).discard(contacts.values("pk"))
+            return contacts.update(archived_on=now, updated_on=now)
+
+    def restore(self) -> int:
+        """Undo `archive()` for contacts still in the live tables, with the
+        channels archived along with them, and rebuild their summaries.
+
+        Channels archived on their own before the contact stay archived. Use
+        `Contact.all_objects`; `Contact.objects` excludes archived contacts.
+
+        Returns:
+            int: the number of contacts restored
+        """
+        using = _write_db(self)
+        with transaction.atomic(using=using):
+            ids = list(self.using(using).filter(archived_on__isnull=False).values_list("pk", flat=True))
+            now = timezone.now()
+            for related_name in CHANNELS:
+                self._related_model(related_name)._base_manager.using(using).filter(
+                    contact__in=ids, archived_on__gte=models.F("contact__archived_on"),
+                ).update(archived_on=None, updated_on=now)
+            count = self.model._base_manager.using(using).filter(pk__in=ids).update(archived_on=None, updated_on=now)
+            _refresh_summaries(self.model, ids, using)
+        return count
+
+
+class ContactManager(ArchivableManager.from_queryset(ContactQuerySet)):
+    """Default manager for `contacts.models.Contact`, excluding archived contacts"""
+
+
+class ContactAddressQuerySet(ArchivableQuerySet):
+    """QuerySet definition for `contacts.models.ContactAddress`
+    """
+
+    def matching(self, street: str, city: str = "", zipcode: str = "") -> "ContactAddressQuerySet":
+        """Filter addresses equal to the given one after USPS-style normalization.
+
+        Args:
+            street (str): the building number and street name
+            city (str, optional): the city
+            zipcode (str, optional): the zipcode
+
+        Returns:
+            ContactAddressQuerySet: the matching addresses
+        """
+        lookups: dict = {"normalized_street": normalize_street(street)}
+        if zipcode:
+            lookups["normalized_zipcode"] = normalize_zipcode(zipcode)
+        if city:
+            lookups["normalized_city"] = normalize_city(city)
+        return self.filter(**lookups)
+
+    def near(self, lat: float, lon: float, radius_miles: float) -> "ContactAddressQuerySet":
+        """Filter geocoded addresses within the bounding box of a radius.
+
+        The box is an indexed range filter; use `within()` for exact distances.
+
+        Args:
+            lat (float): latitude of the center
+            lon (float): longitude of the center
+            radius_miles (float): the search radius
+
+        Returns:
+            ContactAddressQuerySet: addresses inside the bounding box
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+        return self.filter(lat__range=(min_lat, max_lat), lon__range=(min_lon, max_lon))
+
+    @instrument()
+    def within(self, lat: float, lon: float, radius_miles: float) -> list:
+        """Addresses within `radius_miles`, nearest first.
+
+        Returns:
+            list[ContactAddress]: the addresses, each annotated with `distance`
+        """
+        results: list = []
+        for address in self.near(lat, lon, radius_miles):
+            address.distance = distance_miles(lat, lon, address.lat, address.lon)
+            if address.distance <= radius_miles:
+                results.append(address)
+        return sorted(results, key=lambda address: address.distance)
+
+    @instrument()
+    def refresh_derived_fields(self, batch_size: int = 1000) -> int:
+        """Recompute the normalized fields and centroids in batches of `bulk_update`.
+
+        Args:
+            batch_size (int, optional): rows per read and write batch. Defaults to 1000.
+
+        Returns:
+            int: the number of addresses updated
+        """
+        fields: tuple[str, ...] = self.model.DERIVED_FIELDS
+        using = _write_db(self)
+        rows = self.using(using)
+        count: int = 0
+        last_pk = 0
+        # keyset pagination, so rows written by one batch are never re-read by the next
+        while batch := list(rows.filter(pk__gt=last_pk).order_by("pk")[:batch_size]):
+            for address in batch:
+                address.refresh_derived_fields()
+            # the base manager, so rows of another tenant or archived ones are written too
+            count += self.model._base_manager.using(using).bulk_update(batch, fields)
+            last_pk = batch[-1].pk
+        return count
+
+    def rollup(self, levels: tuple[str, ...] = ("state", "city"), use_summary: bool = False) -> list[dict]:
+        """Address counts grouped by each prefix of `levels`, like SQL `GROUP BY ROLLUP`.
+
+        Uses `ROLLUP` on PostgreSQL and one grouped query per level elsewhere.
+        Cities and zipcodes are grouped on their normalized forms.
+
+        Examples:
+            `rollup(("state",))` ->
+            `[{"state": "IL", "level": 1, "count": 2}, ..., {"state": None, "level": 0, "count": 9}]`
+
+        Args:
+            levels (tuple[str, ...], optional): names from `ROLLUP_LEVELS`, outermost first. Defaults to `("state", "city")`.
+            use_summary (bool, optional): read the `AddressRollup` summary table instead
+                of the addresses; only valid on an unfiltered default-manager queryset. Defaults to False.
+
+        Raises:
+            ValueError: an unknown level, or `use_summary` on a filtered queryset
+
+        Returns:
+            list[dict]: one row per group with its level values, `level` (the number
+            of levels grouped on; 0 for the grand total) and `count`, ordered by
+            the level values with each subtotal after its group
+        """
+        unknown = [level for level in levels if level not in ROLLUP_LEVELS]
+        if unknown or not levels:
+            raise ValueError(f"rollup levels must be a non-empty subset of {tuple(ROLLUP_LEVELS)}, got {levels!r}")
+        if use_summary:
+            if self.query.where != self.model._default_manager.all().query.where:
+                raise ValueError("the rollup summary covers all live addresses and cannot be filtered")
+            summary = self.model._meta.apps.get_model("contacts", "AddressRollup")
+            return _rollup(summary.objects.using(self.db), {level: level for level in levels}, models.F("count"))
+        return _rollup(self, {level: ROLLUP_LEVELS[level] for level in levels}, models.Value(1))
+
+
+ROLLUP_LEVELS: dict[str, str] = {"state": "state", "city": "normalized_city", "zipcode": "normalized_zipcode"}
+"""`rollup()` level names and the address fields they group on."""
+
+
+def _rollup_key(row: dict, names: list[str]) -> tuple:
+    # each subtotal sorts after the groups it totals
+    return tuple(part for i, name in enumerate(names) for part in (i >= row["level"], row[name] or ""))
+
+
+def _rollup(queryset: models.QuerySet, columns: dict[str, str], measure) -> list[dict]:
+    names = list(columns)
+    aliases = [f"rollup_{name}" for name in names]  # values() aliases may not shadow field names
+    source = queryset.order_by().values(
+        **{alias: models.F(field) for alias, field in zip(aliases, columns.values())}, rollup_measure=measure,
+    )
+    rows: list[dict] = []
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = source.query.sql_with_params()
+        quoted = ", ".join(connection.ops.quote_name(alias) for alias in aliases)
+        grouping = ", ".join(f"GROUPING({connection.ops.quote_name(alias)})" for alias in aliases)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {quoted}, SUM(rollup_measure), {grouping} FROM ({sql}) AS rollup GROUP BY ROLLUP ({quoted})",
+                params,
+            )
+            for record in cursor.fetchall():
+                rolled_up = record[len(names) + 1:]
+                row = dict(zip(names, record))
+                row["level"] = rolled_up.index(1) if 1 in rolled_up else len(names)
+                row["count"] = int(record[len(names)] or 0)
+                rows.append(row)
+    else:
+        for level in range(len(names), 0, -1):
+            grouped = source.values(*aliases[:level]).annotate(rollup_count=models.Sum("rollup_measure"))
+            rows += [
+                {**dict.fromkeys(names), **{name: row[alias] for name, alias in zip(names[:level], aliases)},
+                 "level": level, "count": row["rollup_count"]}
+                for row in grouped
+            ]
+        total = source.aggregate(rollup_count=models.Sum("rollup_measure"))["rollup_count"]
+        rows.append({**dict.fromkeys(names), "level": 0, "count": total or 0})
+    return sorted(rows, key=lambda row: _rollup_key(row, names))
+
+
+class ContactAddressManager(ArchivableManager.from_queryset(ContactAddressQuerySet)):
+    """Default manager for `contacts.models.ContactAddress`, excluding archived addresses"""
+
+
+class AddressRollupManager(TenantManager):
+    """Manager for `contacts.models.AddressRollup`, holding the current tenant's groups
+    """
+
+    def refresh(self, full: bool = False) -> int:
+        """Bring the summary up to date with the addresses.
+
+        Only the (state, city, zipcode) groups of addresses whose `updated_on`
+        is past the summary's watermark are recounted. Deleted or moved addresses
+        leave their old group overcounted, so when the summary's total no longer
+        matches the address count it is rebuilt in full. Writes that bypass
+        `updated_on`, such as `QuerySet.update()`, need `full=True`.
+
+        Args:
+            full (bool, optional): rebuild every group. Defaults to False.
+
+        Returns:
+            int: the number of groups written
+        """
+        using = _write_db(self)
+        rollups = self.using(using)
+        addresses = self.model._meta.apps.get_model("contacts", "ContactAddress")._default_manager.using(using)
+        fields = list(ROLLUP_LEVELS.values())
+        with transaction.atomic(using=using):
+            watermark = rollups.aggregate(models.Max("refreshed_through"))["refreshed_through__max"]
+            through = addresses.aggregate(models.Max("updated_on"))["updated_on__max"]
+            if through is None:
+                rollups.delete()
+                return 0
+            if full or watermark is None:
+                rollups.delete()
+                return self._write(addresses, through)
+            changed = addresses.filter(updated_on__gt=watermark, updated_on__lte=through)
+            keys = set(changed.values_list(*fields).distinct())
+            written = 0
+            if keys:
+                zipcodes = {zipcode for _, _, zipcode in keys}
+                stale = [
+                    pk for pk, *key in rollups.filter(zipcode__in=zipcodes).values_list("pk", "state", "city", "zipcode")
+                    if tuple(key) in keys
+                ]
+                rollups.filter(pk__in=stale).delete()
+                written = self._write(addresses.filter(normalized_zipcode__in=zipcodes), through, keys)
+            if (rollups.aggregate(models.Sum("count"))["count__sum"] or 0) != addresses.count():
+                rollups.delete()
+                return self._write(addresses, through)
+            return written
+
+    def _write(self, addresses: models.QuerySet, through, keys: set | None = None) -> int:
+        fields = list(ROLLUP_LEVELS.values())
+        groups = addresses.order_by().values_list(*fields).annotate(count=models.Count("pk"))
+        rows = [
+            self.model(state=state, city=city, zipcode=zipcode, count=count, refreshed_through=through)
+            for state, city, zipcode, count in groups
+            if keys is None or (state, city, zipcode) in keys
+        ]
+        self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class ContactSummaryManager(TenantManager):
+    """Manager for `contacts.models.ContactSummary`, returning the current tenant's summaries
+
+    `refresh()` and `rebuild()` work across tenants.
+    """
+
+    def refresh(self, contact_ids) -> int:
+        """Recompute the summaries of `contact_ids` with one upsert.
+
+        Summaries of contacts that no longer exist are deleted.
+
+        Args:
+            contact_ids (Iterable[int]): the contacts to refresh
+
+        Returns:
+            int: the number of summaries written
+        """
+        ids = set(contact_ids)
+        if not ids:
+            return 0
+        get_model = self.model._meta.apps.get_model
+        using = _write_db(self)
+
+        def live(model_name: str) -> models.QuerySet:
+            return get_model("contacts", model_name)._base_manager.using(using).filter(archived_on__isnull=True)
+
+        channels = {
+            "contact_email_addresses": live("ContactEmail").only("contact_id", "email_address"),
+            "contact_phone_numbers": live("ContactPhoneNumber").only("contact_id", "phone_number", "national_format"),
+            "contact_addresses": live("ContactAddress"),
+        }
+        contacts = live("Contact").filter(pk__in=ids).only("tenant", "first_name", "last_name", "sort_name").prefetch_related(
+            *(models.Prefetch(name, queryset=queryset.order_by("pk")) for name, queryset in channels.items())
+        )
+        summaries = [self.model.from_contact(contact) for contact in contacts]
+        self.db_manager(using).bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["contact"],
+            update_fields=[field.name for field in self.model._meta.concrete_fields if not field.primary_key],
+        )
+        missing = ids - {summary.contact_id for summary in summaries}
+        if missing:
+            self.db_manager(using).discard(missing)
+        return len(summaries)
+
+    def bury(self, contact_ids) -> int:
+        """Leave a `ContactTombstone` for each contact of `contact_ids` that has a summary,
+        with one `INSERT ... SELECT`. Call it before deleting the summaries.
+
+        Args:
+            contact_ids (Iterable[int] | QuerySet): the contacts leaving the live tables
+
+        Returns:
+            int: the number of tombstones written
+        """
+        tombstone = self.model._meta.apps.get_model("contacts", "ContactTombstone")
+        using = _write_db(self)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        summaries = self.model._base_manager.using(using).filter(contact_id__in=contact_ids).annotate(
+            deleted_on=models.Value(timezone.now(), output_field=models.DateTimeField()),
+        )
+        sql, params = summaries.order_by().values_list("tenant", "contact_id", "deleted_on").query.sql_with_params()
+        columns = ", ".join(quote(tombstone._meta.get_field(name).column) for name in ("tenant", "contact_id", "deleted_on"))
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {quote(tombstone._meta.db_table)} ({columns}) {sql}", params)
+            return cursor.rowcount
+
+    def discard(self, contact_ids) -> int:
+        """Delete the summaries of `contact_ids`, leaving tombstones for sync clients.
+
+        Returns:
+            int: the number of summaries deleted
+        """
+        using = _write_db(self)
+        with transaction.atomic(using=using):
+            self.db_manager(using).bury(contact_ids)
+            return self.model._base_manager.using(using).filter(contact_id__in=contact_ids)._raw_delete(using)
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Refresh every contact's summary in batches.
+
+        Returns:
+            int: the number of summaries written
+        """
+        Contact = self.model._meta.apps.get_model("contacts", "Contact")
+        summaries = self.db_manager(_write_db(self))
+        count: int = 0
+        last_pk = 0
+        while ids := list(Contact._base_manager.using(summaries.db).filter(pk__gt=last_pk, archived_on__isnull=True).order_by("pk").values_list("pk", flat=True)[:batch_size]):
+            count += summaries.refresh(ids)
+            last_pk = ids[-1]
+        return count
+
+
+class OrganizationQuerySet(ArchivableQuerySet):
+    """QuerySet definition for `contacts.models.Organization`
+    """
+
+    def _contact_ids(self) -> set:
+        """Organizations belong to no contact; the org chart queries skip archived ones on their own."""
+        return set()
+
+    def _contacts_changed(self, contact_ids) -> None:
+        """No contact derives anything from its organizations' archived state."""
+
+
+class OrganizationManager(ArchivableManager.from_queryset(OrganizationQuerySet)):
+    """Default manager for `contacts.models.Organization`, excluding archived organizations"""
+
+
+class ContactRelationshipQuerySet(ArchivableQuerySet):
+    """QuerySet definition for `contacts.models.ContactRelationship`
+    """
+
+    def _contacts_changed(self, contact_ids) -> None:
+        """Recompute the reporting lines of the contacts after `archive()` or `restore()`."""
+        get_model = self.model._meta.apps.get_model
+        get_model("contacts", "ReportingLine").objects.db_manager(self.db).rebuild(contact_ids)
+
+
+class ContactRelationshipManager(ArchivableManager.from_queryset(ContactRelationshipQuerySet)):
+    """Default manager for `contacts.models.ContactRelationship`, excluding archived relationships"""
+
+
+class ReportingLineManager(TenantManager):
+    """Manager for `contacts.models.ReportingLine`, the closure of the `reports_to` relationships
+
+    `rebuild()` with contact ids works across tenants.
+    """
+
+    def is_above(self, manager, contact) -> bool:
+        """Whether `contact` reports to `manager`, directly or not, with one indexed lookup.
+
+        Args:
+            manager (Contact | int): the manager or its primary key
+            contact (Contact | int): the contact or its primary key
+        """
+        return self.filter(ancestor=manager, descendant=contact).exists()
+
+    def rebuild(self, contact_ids=None) -> int:
+        """Recompute the lines of the contacts in `contact_ids` and of everyone
+        reporting to them, or every line of the current tenant.
+
+        The contacts' old lines are deleted and their new ones written with one
+        `INSERT ... SELECT` from a recursive CTE over the `reports_to`
+        relationships. `ContactRelationship.save()`, deletes and `archive()`
+        call it; writes that bypass them, such as `QuerySet.update()`, need a
+        rebuild of the contacts they changed.
+
+        Args:
+            contact_ids (Iterable[int], optional): the contacts whose managers changed. Defaults to all.
+
+        Returns:
+            int: the number of lines written
+
+        Raises:
+            ValueError: the relationships form a reporting cycle
+        """
+        relationship = self.model._meta.apps.get_model("contacts", "ContactRelationship")
+        using = _write_db(self)
+        lines = self.model._base_manager.using(using)
+        edges = relationship._base_manager.using(using).filter(
+            kind=relationship.Kind.REPORTS_TO, archived_on__isnull=True,
+        ).annotate(line_depth=models.Value(1))
+        ids = None if contact_ids is None else set(contact_ids)
+        if ids == set():
+            return 0
+        with transaction.atomic(using=using):
+            if ids is None:
+                self.using(using)._raw_delete(using)
+                edges = edges.filter(tenant=get_current_tenant())
+            else:
+                # the lines below the contacts are unaffected, so they give their subtrees
+                ids |= set(lines.filter(ancestor__in=ids).values_list("descendant_id", flat=True))
+                lines.filter(descendant__in=ids)._raw_delete(using)
+                edges = edges.filter(contact_id__in=ids)
+            connection = connections[using]
+            quote = connection.ops.quote_name
+            table = quote(relationship._meta.db_table)
+            anchor, params = edges.order_by().values_list("tenant", "contact_id", "manager_id", "line_depth").query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {quote(self.model._meta.db_table)} (tenant, descendant_id, ancestor_id, depth) "
+                    f"WITH RECURSIVE up (tenant, descendant_id, ancestor_id, depth) AS ({anchor} "
+                    f"UNION ALL SELECT up.tenant, up.descendant_id, r.manager_id, up.depth + 1 FROM up "
+                    f"JOIN {table} r ON r.contact_id = up.ancestor_id "
+                    f"WHERE r.kind = %s AND r.archived_on IS NULL AND up.depth < %s) "
+                    f"SELECT tenant, descendant_id, ancestor_id, MIN(depth) FROM up GROUP BY tenant, descendant_id, ancestor_id",
+                    [*params, relationship.Kind.REPORTS_TO, MAX_ORG_DEPTH],
+                )
+                count = cursor.rowcount
+            if lines.filter(ancestor=models.F("descendant")).exists():
+                raise ValueError("the reports_to relationships form a cycle")
+        return count
+
+
+_loaded_bitmaps: dict[tuple[str, str], tuple] = {}
+"""`SegmentBitmapManager.load()` results per (database, tenant), with the refresh they are from."""
+
+
+class SegmentBitmapManager(TenantManager):
+    """Manager for `contacts.models.SegmentBitmap`, holding the current tenant's bitmaps
+    """
+
+    def _attributes(self, contact_ids: list[int], using: str) -> dict[str, list[int]]:
+        """The live contacts among `contact_ids` under each attribute, with three queries on `using`."""
+        get_model = self.model._meta.apps.get_model
+        summaries = get_model("contacts", "ContactSummary")._base_manager.using(using).filter(pk__in=contact_ids)
+        found: dict[str, list[int]] = {self.model.ALL: []}
+        for pk, emails, phones, addresses in summaries.values_list("pk", "email_count", "phone_count", "address_count"):
+            found[self.model.ALL].append(pk)
+            for channel, count in (("email", emails), ("phone", phones), ("address", addresses)):
+                if count:
+                    found.setdefault(f"has:{channel}", []).append(pk)
+        addresses = get_model("contacts", "ContactAddress")._base_manager.using(using).filter(
+            contact_id__in=found[self.model.ALL], archived_on__isnull=True,
+        )
+        for pk, state in addresses.order_by().values_list("contact_id", "state").distinct():
+            found.setdefault(f"state:{state}", []).append(pk)
+        tags = get_model("contacts", "ContactTag")._base_manager.using(using).filter(contact_id__in=found[self.model.ALL])
+        for pk, tag_id in tags.values_list("contact_id", "tag_id"):
+            found.setdefault(f"tag:{tag_id}", []).append(pk)
+        return found
+
+    def refresh(self, full: bool = False, batch_size: int = 5000) -> int:
+        """Bring the bitmaps up to date with the contacts.
+
+        Only contacts whose `ContactSummary.updated_on` is past the last
+        refresh, which saves of their channels and tags bump, and contacts
+        that left a `ContactTombstone` since, are recomputed; the window starts
+        `CONTACTS_SYNC_TOKEN_OVERLAP_SECONDS` early so transactions still in
+        flight at the last refresh are not missed. Writes that bypass the
+        summaries need `full=True`.
+
+        Args:
+            full (bool, optional): rebuild every bitmap. Defaults to False.
+            batch_size (int, optional): contacts read per batch. Defaults to 5000.
+
+        Returns:
+            int: the number of bitmaps written
+        """
+        get_model = self.model._meta.apps.get_model
+        using = _write_db(self)
+        stored = self.db_manager(using)
+        summaries = get_model("contacts", "ContactSummary").objects.db_manager(using)
+        tombstones = get_model("contacts", "ContactTombstone").objects.db_manager(using)
+        with transaction.atomic(using=using):
+            through = timezone.now()
+            current = stored.filter(attribute=self.model.ALL, format=FORMAT).values_list("refreshed_through", flat=True).first()
+            if full or current is None:
+                bitmaps: dict[str, Bitmap] = {}
+                ids = summaries.order_by("pk").values_list("pk", flat=True)
+                last_pk = 0
+                while batch := list(ids.filter(pk__gt=last_pk)[:batch_size]):
+                    for attribute, members in self._attributes(batch, using).items():
+                        bitmaps.setdefault(attribute, Bitmap()).update(members)
+                    last_pk = batch[-1]
+                bitmaps.setdefault(self.model.ALL, Bitmap())
+                stored.all()._raw_delete(using)
+            else:
+                since = current - timedelta(seconds=app_settings.SYNC_TOKEN_OVERLAP_SECONDS)
+                changed = set(summaries.filter(updated_on__gt=since).values_list("pk", flat=True))
+                changed |= set(tombstones.filter(deleted_on__gt=since).values_list("contact_id", flat=True))
+                bitmaps = {row.attribute: row.load() for row in stored.all()}
+                removed = Bitmap(changed)
+                touched = {attribute for attribute, bitmap in bitmaps.items() if bitmap & removed}
+                for attribute in touched:
+                    bitmaps[attribute] = bitmaps[attribute] - removed
+                changed = sorted(changed)
+                for start in range(0, len(changed), batch_size):
+                    for attribute, members in self._attributes(changed[start:start + batch_size], using).items():
+                        bitmaps.setdefault(attribute, Bitmap()).update(members)
+                        touched.add(attribute)
+                tags = set(get_model("contacts", "Tag").objects.db_manager(using).values_list("pk", flat=True))
+                gone = {attribute for attribute in bitmaps if attribute.startswith("tag:") and int(attribute[4:]) not in tags}
+                gone |= {attribute for attribute in touched if not bitmaps[attribute] and attribute != self.model.ALL}
+                stored.filter(attribute__in=gone).delete()
+                bitmaps = {attribute: bitmaps[attribute] for attribute in touched - gone}
+                stored.filter(attribute=self.model.ALL).update(refreshed_through=through)
+            rows = [
+                self.model(attribute=attribute, bitmap=bitmap.serialize(), format=FORMAT, size=len(bitmap), refreshed_through=through)
+                for attribute, bitmap in bitmaps.items()
+            ]
+            stored.bulk_create(
+                rows, batch_size=100, update_conflicts=True, unique_fields=["tenant", "attribute"],
+                update_fields=["bitmap", "format", "size", "refreshed_through"],
+            )
+        return len(rows)
+
+    def load(self) -> dict:
+        """The current tenant's bitmaps by attribute, cached in the process until the next refresh.
+
+        Checking the cache takes one query that reads no bitmap; loading them takes one more.
+        Every attribute is loaded and kept, so each process holds all of the
+        tenant's bitmaps once it has evaluated a segment.
+
+        Returns:
+            dict[str, Bitmap]: the bitmaps, including `SegmentBitmap.ALL`
+        """
+        key = (self.db, get_current_tenant())
+        refreshed = self.filter(attribute=self.model.ALL).values_list("refreshed_through", flat=True).first()
+        cached = _loaded_bitmaps.get(key)
+        if cached is not None and cached[0] == refreshed:
+            return cached[1]
+        bitmaps = {row.attribute: row.load() for row in self.all()}
+        _loaded_bitmaps[key] = (refreshed, bitmaps)
+        return bitmaps
+
+
+CONSENT_CHANNELS: dict[str, tuple[str, str]] = {
+    "email": ("ContactEmail", "email_address"),
+    "phone": ("ContactPhoneNumber", "phone_number"),
+}
+"""The channel model and address field of each `ConsentEvent.Channel`."""
+
+
+class ConsentEventQuerySet(models.QuerySet):
+    """QuerySet definition for `contacts.models.ConsentEvent`, whose rows are never changed
+    """
+
+    def update(self, **kwargs):
+        raise ValueError("consent events are append-only; record a new event instead")
+
+
+class ConsentEventManager(TenantManager.from_queryset(ConsentEventQuerySet)):
+    """Default manager for `contacts.models.ConsentEvent`, returning the current tenant's events
+    """
+
+    def normalize_address(self, channel: str, address) -> str:
+        """The stored form of an email address or phone number, as the channel tables keep it.
+
+        Raises:
+            ValueError: an unknown channel
+        """
+        if channel not in CONSENT_CHANNELS:
+            raise ValueError(f"Unknown consent channel: {channel!r}")
+        model_name, field_name = CONSENT_CHANNELS[channel]
+        field = self.model._meta.apps.get_model("contacts", model_name)._meta.get_field(field_name)
+        return normalize_email(address) if channel == "email" else field.get_prep_value(field.to_python(address))
+
+    def record(self, channel: str, address, purpose: str, status: str, **fields):
+        """Append a consent event and bring the address's `ConsentStatus` up to date.
+
+        Args:
+            channel (str): a `ConsentEvent.Channel`
+            address (str): the email address or phone number, normalized here
+            purpose (str): what the consent covers, e.g. ``"newsletter"``
+            status (str): a `ConsentEvent.Status`
+            **fields: other `ConsentEvent` fields, such as `source`, `contact`,
+                `recorded_by` or a past `recorded_on`
+
+        Returns:
+            ConsentEvent: the saved event
+        """
+        return self.record_many([self.model(channel=channel, address=address, purpose=purpose, status=status, **fields)])[0]
+
+    def record_many(self, events: list) -> list:
+        """Append unsaved events with one `bulk_create` and refresh the statuses they touch.
+
+        Events may arrive out of order; each status follows the latest `recorded_on`.
+
+        Returns:
+            list[ConsentEvent]: the saved events
+        """
+        for event in events:
+            event.address = self.normalize_address(event.channel, event.address)
+        using = _write_db(self)
+        with transaction.atomic(using=using):
+            self.db_manager(using).bulk_create(events)
+            self.model._meta.apps.get_model("contacts", "ConsentStatus").objects.db_manager(using).refresh(
+                event.key for event in events
+            )
+        return events
+
+
+class ConsentStatusManager(TenantManager):
+    """Manager for `contacts.models.ConsentStatus`, the latest consent per address and purpose
+
+    `refresh()` works across tenants.
+    """
+
+    def refresh(self, keys) -> int:
+        """Recompute the statuses of `keys` from their events with one upsert.
+
+        The upsert only replaces a status with one at least as recent, so a
+        refresh that could not see a concurrent transaction's newer event
+        does not overwrite the status that transaction wrote. Statuses whose
+        events were all deleted are deleted; `rebuild()` after deleting some.
+
+        Args:
+            keys (Iterable[tuple[str, str, str, str]]): `(tenant, channel, address, purpose)` keys
+
+        Returns:
+            int: the number of statuses recomputed
+        """
+        keys = set(keys)
+        if not keys:
+            return 0
+        using = _write_db(self)
+        events = self.model._meta.apps.get_model("contacts", "ConsentEvent")._base_manager.using(using).filter(
+            address__in={address for _, _, address, _ in keys},
+        ).order_by("recorded_on", "pk")
+        latest: dict[tuple, tuple] = {}
+        for *key, status, recorded_on in events.values_list("tenant", "channel", "address", "purpose", "status", "recorded_on"):
+            if tuple(key) in keys:
+                latest[tuple(key)] = (status, recorded_on)
+        rows = [
+            self.model(tenant=tenant, channel=channel, address=address, purpose=purpose, status=status, changed_on=changed_on)
+            for (tenant, channel, address, purpose), (status, changed_on) in sorted(latest.items())
+        ]
+        with transaction.atomic(using=using):
+            self._upsert(rows, using)
+            for tenant, channel, address, purpose in keys - latest.keys():
+                self.model._base_manager.using(using).filter(
+                    tenant=tenant, channel=channel, address=address, purpose=purpose,
+                ).delete()
+        return len(rows)
+
+    def _upsert(self, rows: list, using: str) -> None:
+        """`bulk_create(update_conflicts=True)`, but keeping the statuses changed later than their row.
+
+        Rows come in key order, so concurrent upserts lock the keys in the same order.
+        Backends without `INSERT ... ON CONFLICT (...) DO UPDATE`, such as MySQL,
+        use `_upsert_locked` instead.
+        """
+        connection = connections[using]
+        if not connection.features.supports_update_conflicts_with_target:
+            self._upsert_locked(rows, using)
+            return
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        fields = [self.model._meta.get_field(name) for name in ("tenant", "channel", "address", "purpose", "status", "changed_on")]
+        status, changed_on = (quote(field.column) for field in fields[4:])
+        sql = (
+            f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) VALUES {{}} "
+            f"ON CONFLICT ({', '.join(quote(field.column) for field in fields[:4])}) DO UPDATE "
+            f"SET {status} = excluded.{status}, {changed_on} = excluded.{changed_on} "
+            f"WHERE excluded.{changed_on} >= {table}.{changed_on}"
+        )
+        batch_size = connection.ops.bulk_batch_size(fields, rows)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    sql.format(", ".join([f"({', '.join(['%s'] * len(fields))})"] * len(batch))),
+                    [field.get_db_prep_save(getattr(row, field.attname), connection) for row in batch for field in fields],
+                )
+
+    def _upsert_locked(self, rows: list, using: str) -> None:
+        """`_upsert` with `select_for_update`: inserts the missing keys, then locks
+        every key's status and updates the ones older than their row.
+
+        Where conflicts cannot be ignored, a key inserted by a concurrent
+        transaction between the lock and the insert fails with `IntegrityError`.
+        """
+        connection = connections[using]
+        statuses = self.model._base_manager.using(using)
+        key = operator.attrgetter("tenant", "channel", "address", "purpose")
+        if connection.features.supports_ignore_conflicts:
+            statuses.bulk_create(rows, ignore_conflicts=True)
+        locked = statuses.select_for_update().filter(
+            address__in={row.address for row in rows},
+        ).order_by("tenant", "channel", "address", "purpose")
+        current = {key(status): status for status in locked}
+        statuses.bulk_create([row for row in rows if key(row) not in current])
+        changed = []
+        for row in rows:
+            status = current.get(key(row))
+            if status is None or row.changed_on < status.changed_on:
+                continue
+            if (row.status, row.changed_on) != (status.status, status.changed_on):
+                status.status, status.changed_on = row.status, row.changed_on
+                changed.append(status)
+        statuses.bulk_update(changed, ["status", "changed_on"])
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recompute every status of the current tenant from the events, in batches of addresses.
+
+        Returns:
+            int: the number of statuses written
+        """
+        using = _write_db(self)
+        statuses = self.db_manager(using)
+        events = self.model._meta.apps.get_model("contacts", "ConsentEvent").objects.db_manager(using)
+        count: int = 0
+        with transaction.atomic(using=using):
+            statuses.all()._raw_delete(using)
+            keys = events.order_by("address").values_list("tenant", "channel", "address", "purpose").distinct()
+            last = ""
+            while batch := list(keys.filter(address__gt=last)[:batch_size]):
+                last = batch[-1][2]
+                batch += keys.filter(address=last)  # keep an address's keys in one batch
+                count += statuses.refresh(batch)
+        return count
+
+    def eligible_recipients(self, channel: str, purpose: str) -> models.QuerySet:
+        """The opted-in statuses of `purpose` whose address belongs to a live contact, by address.
+
+        Reads the partial opt-in index in address order and probes the channel
+        table's address index per row, so pipelines can stream millions of
+        recipients with `.values_list("address", flat=True).iterator()`, or page
+        them by keyset on `address`. Addresses without a status are not eligible.
+
+        Args:
+            channel (str): a `ConsentEvent.Channel`
+            purpose (str): the purpose of the send
+
+        Returns:
+            QuerySet[ConsentStatus]: the eligible statuses, ordered by `address`
+        """
+        model_name, field_name = CONSENT_CHANNELS[channel]
+        live = self.model._meta.apps.get_model("contacts", model_name).objects.using(self.db).filter(
+            **{field_name: models.OuterRef("address")},
+        )
+        return self.filter(
+            channel=channel, purpose=purpose, status=self.model.Status.OPT_IN,
+        ).filter(models.Exists(live)).order_by("address")
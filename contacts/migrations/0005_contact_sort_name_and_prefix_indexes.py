@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+def populate_sort_name(apps, schema_editor):
+    from contacts.utils import make_sort_name
+
+    using = schema_editor.connection.alias
+    Contact = apps.get_model("contacts", "Contact")
+    contacts = Contact.objects.using(using).only("first_name", "last_name").order_by("pk")
+    last_pk = 0
+    while batch := list(contacts.filter(pk__gt=last_pk)[:1000]):
+        for contact in batch:
+            contact.sort_name = make_sort_name(contact.first_name, contact.last_name)
+        Contact.objects.using(using).bulk_update(batch, ["sort_name"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0004_remove_contactaddress_building_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='contact',
+            options={'verbose_name': 'contact', 'verbose_name_plural': 'contacts'},
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='sort_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=102, verbose_name='sort name'),
+        ),
+        migrations.RunPython(populate_sort_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['sort_name'], name='contacts_sort_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactphonenumber',
+            index=models.Index(fields=['phone_number'], name='contacts_phone_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
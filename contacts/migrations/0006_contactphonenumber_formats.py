@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+def populate_formats(apps, schema_editor):
+    from contacts.phone import format_phone_number
+
+    using = schema_editor.connection.alias
+    ContactPhoneNumber = apps.get_model("contacts", "ContactPhoneNumber")
+    numbers = ContactPhoneNumber.objects.using(using).only("phone_number").order_by("pk")
+    last_pk = 0
+    while batch := list(numbers.filter(pk__gt=last_pk)[:1000]):
+        for number in batch:
+            number.national_format = format_phone_number(number.phone_number, "NATIONAL")
+            number.international_format = format_phone_number(number.phone_number, "INTERNATIONAL")
+        ContactPhoneNumber.objects.using(using).bulk_update(batch, ["national_format", "international_format"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0005_contact_sort_name_and_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactphonenumber',
+            name='international_format',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='international format'),
+        ),
+        migrations.AddField(
+            model_name='contactphonenumber',
+            name='national_format',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='national format'),
+        ),
+        migrations.RunPython(populate_formats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+def populate_normalized(apps, schema_editor):
+    from contacts import addresses
+
+    using = schema_editor.connection.alias
+    ContactAddress = apps.get_model("contacts", "ContactAddress")
+    last_pk = 0
+    while batch := list(ContactAddress.objects.using(using).filter(pk__gt=last_pk).order_by("pk")[:1000]):
+        for address in batch:
+            address.normalized_street = addresses.normalize_street(address.street)
+            address.normalized_unit = addresses.normalize_unit(address.unit_type, address.unit_number)
+            address.normalized_city = addresses.normalize_city(address.city)
+            address.normalized_zipcode = addresses.normalize_zipcode(address.zipcode)
+            address.lat, address.lon = addresses.gazetteer.lookup(address.normalized_zipcode) or (None, None)
+        ContactAddress.objects.using(using).bulk_update(
+            batch,
+            ["normalized_street", "normalized_unit", "normalized_city", "normalized_zipcode", "lat", "lon"],
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0006_contactphonenumber_formats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactaddress',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='latitude'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='lon',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='longitude'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='normalized_city',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='normalized city'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='normalized_street',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='normalized street'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='normalized_unit',
+            field=models.CharField(blank=True, default='', editable=False, max_length=42, verbose_name='normalized unit'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='normalized_zipcode',
+            field=models.CharField(blank=True, default='', editable=False, max_length=5, verbose_name='normalized zipcode'),
+        ),
+        migrations.RunPython(populate_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(fields=['normalized_zipcode', 'normalized_street'], name='contacts_addr_normalized_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(fields=['lat', 'lon'], name='contacts_addr_latlon_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0007_contactaddress_normalized_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AddressRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=2, verbose_name='state')),
+                ('city', models.CharField(max_length=150, verbose_name='normalized city')),
+                ('zipcode', models.CharField(max_length=5, verbose_name='normalized zipcode')),
+                ('count', models.PositiveIntegerField(verbose_name='addresses')),
+                ('refreshed_through', models.DateTimeField(verbose_name='refreshed through')),
+            ],
+            options={
+                'verbose_name': 'address rollup',
+                'verbose_name_plural': 'address rollups',
+                'constraints': [models.UniqueConstraint(fields=('state', 'city', 'zipcode'), name='contacts_addressrollup_group_uniq')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(fields=['updated_on'], name='contacts_addr_updated_idx'),
+        ),
+    ]
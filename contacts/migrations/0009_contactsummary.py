@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-19 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """Summarize the existing contacts, as `ContactSummary.from_contact` did when this table was added."""
+    from contacts.phone import format_phone_number
+
+    using = schema_editor.connection.alias
+    Contact = apps.get_model("contacts", "Contact")
+    ContactSummary = apps.get_model("contacts", "ContactSummary")
+    contacts = Contact.objects.using(using).order_by("pk").only("first_name", "last_name", "sort_name").prefetch_related(
+        *(models.Prefetch(name, queryset=model.objects.using(using).order_by("pk")) for name, model in (
+            ("contact_email_addresses", apps.get_model("contacts", "ContactEmail")),
+            ("contact_phone_numbers", apps.get_model("contacts", "ContactPhoneNumber")),
+            ("contact_addresses", apps.get_model("contacts", "ContactAddress")),
+        ))
+    )
+    last_pk = 0
+    while batch := list(contacts.filter(pk__gt=last_pk)[:1000]):
+        summaries = []
+        for contact in batch:
+            emails = contact.contact_email_addresses.all()
+            phones = contact.contact_phone_numbers.all()
+            addresses = contact.contact_addresses.all()
+            address = ""
+            if addresses:
+                first = addresses[0]
+                unit = [f"{first.unit_type} {first.unit_number}"] if first.unit_number is not None else []
+                address = ", ".join([first.street, *unit, f"{first.city}, {first.state} {first.zipcode}"])[:255]
+            summaries.append(ContactSummary(
+                contact=contact,
+                display_name=f"{contact.first_name} {contact.last_name}",
+                sort_name=contact.sort_name,
+                primary_email=emails[0].email_address if emails else "",
+                primary_phone=(phones[0].national_format or format_phone_number(phones[0].phone_number)) if phones else "",
+                address=address,
+                email_count=len(emails),
+                phone_count=len(phones),
+                address_count=len(addresses),
+            ))
+        ContactSummary.objects.using(using).bulk_create(summaries)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_addressrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactSummary',
+            fields=[
+                ('contact', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='contacts.contact')),
+                ('display_name', models.CharField(max_length=101, verbose_name='name')),
+                ('sort_name', models.CharField(db_index=True, max_length=102, verbose_name='sort name')),
+                ('primary_email', models.CharField(blank=True, max_length=254, verbose_name='email address')),
+                ('primary_phone', models.CharField(blank=True, max_length=32, verbose_name='phone number')),
+                ('address', models.CharField(blank=True, max_length=255, verbose_name='address')),
+                ('email_count', models.PositiveIntegerField(default=0, verbose_name='email addresses')),
+                ('phone_count', models.PositiveIntegerField(default=0, verbose_name='phone numbers')),
+                ('address_count', models.PositiveIntegerField(default=0, verbose_name='addresses')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+            ],
+            options={
+                'verbose_name': 'contact summary',
+                'verbose_name_plural': 'contact summaries',
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
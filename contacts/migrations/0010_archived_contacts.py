@@ -0,0 +1,215 @@
+# Generated by Django 5.2 on 2026-10-19 10:40
+
+import django.db.models.deletion
+import localflavor.us.models
+import phonenumber_field.modelfields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0009_contactsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('first_name', models.CharField(max_length=50, verbose_name='first name')),
+                ('last_name', models.CharField(max_length=50, verbose_name='last name')),
+                ('job_title', models.CharField(blank=True, max_length=50, null=True, verbose_name='role / title')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='about the person')),
+                ('sort_name', models.CharField(db_index=True, default='', editable=False, max_length=102, verbose_name='sort name')),
+            ],
+            options={
+                'verbose_name': 'archived contact',
+                'verbose_name_plural': 'archived contacts',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedContactAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('street', models.CharField(help_text='building number and street name', max_length=150, verbose_name='street')),
+                ('unit_type', models.CharField(default='unit', help_text='P.O. Box, Unit, Suite, etc.', max_length=20, verbose_name='unit type')),
+                ('unit_number', models.CharField(blank=True, help_text='The assigned unit reference. This is typically a number', max_length=20, null=True, verbose_name='Unit number')),
+                ('city', models.CharField(max_length=150, verbose_name='city')),
+                ('state', localflavor.us.models.USStateField(max_length=2)),
+                ('zipcode', localflavor.us.models.USZipCodeField(max_length=10)),
+                ('normalized_street', models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='normalized street')),
+                ('normalized_unit', models.CharField(blank=True, default='', editable=False, max_length=42, verbose_name='normalized unit')),
+                ('normalized_city', models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='normalized city')),
+                ('normalized_zipcode', models.CharField(blank=True, default='', editable=False, max_length=5, verbose_name='normalized zipcode')),
+                ('lat', models.FloatField(blank=True, editable=False, null=True, verbose_name='latitude')),
+                ('lon', models.FloatField(blank=True, editable=False, null=True, verbose_name='longitude')),
+            ],
+            options={
+                'verbose_name': 'archived contact address',
+                'verbose_name_plural': 'archived contact addresses',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedContactEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('email_address', models.EmailField(db_index=True, max_length=254, verbose_name='email address')),
+            ],
+            options={
+                'verbose_name': 'archived contact email',
+                'verbose_name_plural': 'archived contact emails',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedContactPhoneNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('phone_number', phonenumber_field.modelfields.PhoneNumberField(max_length=128, region=None)),
+                ('national_format', models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='national format')),
+                ('international_format', models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='international format')),
+            ],
+            options={
+                'verbose_name': 'archived contact phone number',
+                'verbose_name_plural': 'archived contact phone numbers',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='contact',
+            name='contacts_sort_name_prefix_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_normalized_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_latlon_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactphonenumber',
+            name='contacts_phone_prefix_idx',
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='archived_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='archived_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on'),
+        ),
+        migrations.AddField(
+            model_name='contactemail',
+            name='archived_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on'),
+        ),
+        migrations.AddField(
+            model_name='contactphonenumber',
+            name='archived_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on'),
+        ),
+        migrations.AlterField(
+            model_name='contactemail',
+            name='email_address',
+            field=models.EmailField(max_length=254, verbose_name='email address'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['sort_name'], name='contacts_sort_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['normalized_zipcode', 'normalized_street'], name='contacts_addr_normalized_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['lat', 'lon'], name='contacts_addr_latlon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['updated_on'], name='contacts_addr_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactphonenumber',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['phone_number'], name='contacts_phone_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='contactemail',
+            constraint=models.UniqueConstraint(condition=models.Q(('archived_on__isnull', True)), fields=('email_address',), name='contacts_email_live_uniq'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontact',
+            name='created_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontact',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactaddress',
+            name='contact',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_addresses', to='contacts.archivedcontact'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactaddress',
+            name='created_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactaddress',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactemail',
+            name='contact',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_email_addresses', to='contacts.archivedcontact'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactemail',
+            name='created_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactemail',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactphonenumber',
+            name='contact',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_phone_numbers', to='contacts.archivedcontact'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactphonenumber',
+            name='created_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactphonenumber',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
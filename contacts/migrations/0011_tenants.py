@@ -0,0 +1,126 @@
+# Generated by Django 5.2 on 2026-10-19 11:00
+
+import contacts.tenants
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0010_archived_contacts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='addressrollup',
+            name='contacts_addressrollup_group_uniq',
+        ),
+        migrations.RemoveConstraint(
+            model_name='contactemail',
+            name='contacts_email_live_uniq',
+        ),
+        migrations.RemoveIndex(
+            model_name='contact',
+            name='contacts_sort_name_prefix_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_normalized_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_latlon_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactaddress',
+            name='contacts_addr_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='contactphonenumber',
+            name='contacts_phone_prefix_idx',
+        ),
+        migrations.AddField(
+            model_name='addressrollup',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontact',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactaddress',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactemail',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='archivedcontactphonenumber',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='contactaddress',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='contactemail',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='contactphonenumber',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddField(
+            model_name='contactsummary',
+            name='tenant',
+            field=models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'sort_name'], name='contacts_sort_name_prefix_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'normalized_zipcode', 'normalized_street'], name='contacts_addr_normalized_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'lat', 'lon'], name='contacts_addr_latlon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactaddress',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'updated_on'], name='contacts_addr_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactphonenumber',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'phone_number'], name='contacts_phone_prefix_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactsummary',
+            index=models.Index(fields=['tenant', 'sort_name'], name='contacts_summary_tenant_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='addressrollup',
+            constraint=models.UniqueConstraint(fields=('tenant', 'state', 'city', 'zipcode'), name='contacts_addressrollup_group_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactemail',
+            constraint=models.UniqueConstraint(condition=models.Q(('archived_on__isnull', True)), fields=('tenant', 'email_address'), name='contacts_email_live_uniq'),
+        ),
+    ]
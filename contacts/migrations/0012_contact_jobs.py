@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-19 11:20
+
+import contacts.tenants
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0011_tenants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('name', models.CharField(max_length=100, verbose_name='job')),
+                ('arguments', models.JSONField(blank=True, default=dict, verbose_name='arguments')),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed'), ('cancelled', 'cancelled')], default='queued', max_length=10, verbose_name='status')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='done')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='total')),
+                ('checkpoint', models.JSONField(blank=True, default=dict, verbose_name='checkpoint')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('started_on', models.DateTimeField(blank=True, null=True, verbose_name='started on')),
+                ('finished_on', models.DateTimeField(blank=True, null=True, verbose_name='finished on')),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contact_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'contacts job',
+                'verbose_name_plural': 'contacts jobs',
+                'ordering': ('-created_on',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contactjob',
+            index=models.Index(fields=['status', 'created_on'], name='contacts_job_status_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 11:40
+
+import contacts.tenants
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0012_contact_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('contact_id', models.BigIntegerField(verbose_name='contact')),
+                ('deleted_on', models.DateTimeField(verbose_name='deleted on')),
+            ],
+            options={
+                'verbose_name': 'contact tombstone',
+                'verbose_name_plural': 'contact tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contactsummary',
+            index=models.Index(fields=['tenant', 'updated_on'], name='contacts_summary_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacttombstone',
+            index=models.Index(fields=['tenant', 'deleted_on'], name='contacts_tombstone_idx'),
+        ),
+    ]
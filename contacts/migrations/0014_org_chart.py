@@ -0,0 +1,102 @@
+# Generated by Django 5.2 on 2026-10-19 12:00
+
+import contacts.tenants
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0013_carddav_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('name', models.CharField(max_length=255, verbose_name='name')),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='contacts.organization', verbose_name='part of')),
+                ('updated_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'organization',
+                'verbose_name_plural': 'organizations',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContactRelationship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('updated_on', models.DateTimeField(auto_now=True, verbose_name='last updated')),
+                ('archived_on', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='archived on')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('kind', models.CharField(choices=[('works_at', 'works at'), ('reports_to', 'reports to')], max_length=16, verbose_name='relationship')),
+                ('title', models.CharField(blank=True, max_length=100, verbose_name='title')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relationships', to='contacts.contact')),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s', to=settings.AUTH_USER_MODEL)),
+                ('manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='managed_relationships', to='contacts.contact', verbose_name='manager')),
+                ('updated_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='edited_%(class)s', to=settings.AUTH_USER_MODEL)),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='relationships', to='contacts.organization', verbose_name='organization')),
+            ],
+            options={
+                'verbose_name': 'contact relationship',
+                'verbose_name_plural': 'contact relationships',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportingLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('depth', models.PositiveIntegerField(verbose_name='depth')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_lines', to='contacts.contact')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manager_lines', to='contacts.contact')),
+            ],
+            options={
+                'verbose_name': 'reporting line',
+                'verbose_name_plural': 'reporting lines',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'name'], name='contacts_org_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactrelationship',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'organization'], name='contacts_rel_org_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactrelationship',
+            index=models.Index(condition=models.Q(('archived_on__isnull', True)), fields=['tenant', 'manager'], name='contacts_rel_manager_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactrelationship',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('kind', 'works_at'), ('manager__isnull', True), ('organization__isnull', False)), models.Q(('kind', 'reports_to'), ('manager__isnull', False), ('organization__isnull', True)), _connector='OR'), name='contacts_relationship_kind_check', violation_error_message='Works at needs an organization and reports to needs a manager.'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactrelationship',
+            constraint=models.CheckConstraint(condition=models.Q(('manager', models.F('contact')), _negated=True), name='contacts_relationship_not_self', violation_error_message='A contact cannot report to themselves.'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactrelationship',
+            constraint=models.UniqueConstraint(condition=models.Q(('archived_on__isnull', True), ('kind', 'reports_to')), fields=('contact',), name='contacts_reports_to_uniq', violation_error_message='A contact reports to one manager.'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactrelationship',
+            constraint=models.UniqueConstraint(condition=models.Q(('archived_on__isnull', True), ('kind', 'works_at')), fields=('contact', 'organization'), name='contacts_works_at_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='reportingline',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='contacts_reportingline_uniq'),
+        ),
+    ]
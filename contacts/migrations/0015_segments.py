@@ -0,0 +1,83 @@
+# Generated by Django 5.2 on 2026-10-19 12:20
+
+import contacts.tenants
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0014_org_chart'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Segment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('expression', models.TextField(verbose_name='expression')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+            ],
+            options={
+                'verbose_name': 'segment',
+                'verbose_name_plural': 'segments',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'name'), name='contacts_segment_name_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SegmentBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('attribute', models.CharField(max_length=100, verbose_name='attribute')),
+                ('bitmap', models.BinaryField(verbose_name='bitmap')),
+                ('format', models.CharField(max_length=10, verbose_name='format')),
+                ('size', models.PositiveIntegerField(verbose_name='contacts')),
+                ('refreshed_through', models.DateTimeField(verbose_name='refreshed through')),
+            ],
+            options={
+                'verbose_name': 'segment bitmap',
+                'verbose_name_plural': 'segment bitmaps',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'attribute'), name='contacts_segmentbitmap_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+            ],
+            options={
+                'verbose_name': 'tag',
+                'verbose_name_plural': 'tags',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'name'), name='contacts_tag_name_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContactTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('created_on', models.DateTimeField(auto_now_add=True, verbose_name='created on')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_tags', to='contacts.contact')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_tags', to='contacts.tag')),
+            ],
+            options={
+                'verbose_name': 'contact tag',
+                'verbose_name_plural': 'contact tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='contacts', through='contacts.ContactTag', to='contacts.tag', verbose_name='tags'),
+        ),
+        migrations.AddConstraint(
+            model_name='contacttag',
+            constraint=models.UniqueConstraint(fields=('contact', 'tag'), name='contacts_contacttag_uniq'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 12:40
+
+import contacts.tenants
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0015_segments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('phone', 'Phone')], max_length=10, verbose_name='channel')),
+                ('address', models.CharField(max_length=254, verbose_name='address')),
+                ('purpose', models.CharField(max_length=50, verbose_name='purpose')),
+                ('status', models.CharField(choices=[('opt_in', 'Opted in'), ('opt_out', 'Opted out')], max_length=10, verbose_name='status')),
+                ('source', models.CharField(blank=True, max_length=100, verbose_name='source')),
+                ('recorded_on', models.DateTimeField(default=django.utils.timezone.now, verbose_name='recorded on')),
+                ('contact', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consent_events', to='contacts.contact')),
+                ('recorded_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='consent_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'consent event',
+                'verbose_name_plural': 'consent events',
+            },
+        ),
+        migrations.CreateModel(
+            name='ConsentStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant', models.CharField(blank=True, default=contacts.tenants.get_current_tenant, editable=False, max_length=64, verbose_name='tenant')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('phone', 'Phone')], max_length=10, verbose_name='channel')),
+                ('address', models.CharField(max_length=254, verbose_name='address')),
+                ('purpose', models.CharField(max_length=50, verbose_name='purpose')),
+                ('status', models.CharField(choices=[('opt_in', 'Opted in'), ('opt_out', 'Opted out')], max_length=10, verbose_name='status')),
+                ('changed_on', models.DateTimeField(verbose_name='changed on')),
+            ],
+            options={
+                'verbose_name': 'consent status',
+                'verbose_name_plural': 'consent statuses',
+                'indexes': [models.Index(condition=models.Q(('status', 'opt_in')), fields=['tenant', 'channel', 'purpose', 'address'], name='contacts_consent_optin_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'channel', 'address', 'purpose'), name='contacts_consentstatus_uniq')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='consentevent',
+            index=models.Index(fields=['tenant', 'channel', 'address', 'purpose', 'recorded_on'], name='contacts_consentevent_idx'),
+        ),
+    ]
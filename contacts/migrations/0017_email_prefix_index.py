@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 13:00
+
+import contacts.indexes
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0016_consent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcontact',
+            name='sort_name',
+            field=models.CharField(default='', editable=False, max_length=102, verbose_name='sort name'),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='sort_name',
+            field=models.CharField(default='', editable=False, max_length=102, verbose_name='sort name'),
+        ),
+        migrations.AddIndex(
+            model_name='contactemail',
+            index=contacts.indexes.PatternIndex(models.F('tenant'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email_address'), name='text_pattern_ops'), condition=models.Q(('archived_on__isnull', True)), name='contacts_email_prefix_idx'),
+        ),
+    ]
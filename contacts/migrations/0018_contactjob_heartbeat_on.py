@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0017_email_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactjob',
+            name='heartbeat_on',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='last heartbeat'),
+        ),
+    ]
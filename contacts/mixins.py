@@ -7,10 +7,11 @@ and functionality for the contacts app's models.
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from localflavor.us.models import USZipCodeField, USStateField
-from phonenumber_field.modelfields import PhoneNumberField
 from django.conf import settings
 
-from contacts.utils import normalize_email
+from contacts import addresses, tenants
+from contacts.phone import CachedPhoneNumberField, format_phone_number
+from contacts.utils import normalize_email, make_sort_name
 
 
 USER_MODEL: str = settings.AUTH_USER_MODEL
@@ -26,12 +27,15 @@ class ObjectTrackingMixin(models.Model):
         updated_on (models.DateTimeField): datetime the instance was last updated
         created_by (models.ForeignKey): the user that created the instance
         updated_by (models.ForeignKey): the user that last updated the instances
+        archived_on (models.DateTimeField, optional): when the instance was soft-deleted;
+            archived rows are hidden by the default managers
     """
 
     created_on: models.DateTimeField = models.DateTimeField(_("created on"), auto_now_add=True, auto_now=False, editable=False)
     updated_on: models.DateTimeField = models.DateTimeField(_("last updated"), auto_now_add=False, auto_now=True, editable=False)
     created_by: models.ForeignKey = models.ForeignKey(USER_MODEL, related_name='created_%(class)s', on_delete=models.SET_NULL, blank=True, null=True, editable=False)
     updated_by: models.ForeignKey = models.ForeignKey(USER_MODEL, related_name='edited_%(class)s', on_delete=models.SET_NULL, blank=True, null=True, editable=False)
+    archived_on: models.DateTimeField = models.DateTimeField(_("archived on"), blank=True, null=True, editable=False)
 
     class Meta:
         abstract = True
@@ -40,6 +44,22 @@ class ObjectTrackingMixin(models.Model):
         return super().save(*args, **kwargs)
 
 
+class TenantMixin(models.Model):
+    """supplies the tenant key that partitions the contacts tables
+
+    Attributes:
+        tenant (models.CharField): the owning tenant; defaults to the current
+            tenant of `contacts.tenants`, which is blank outside `use_tenant()`
+    """
+
+    tenant: models.CharField = models.CharField(
+        _("tenant"), max_length=64, blank=True, default=tenants.get_current_tenant, editable=False,
+    )
+
+    class Meta:
+        abstract = True
+
+
 class USAddressMixin(models.Model):
     """A django model mixin for adding address information.
 
@@ -52,6 +72,12 @@ class USAddressMixin(models.Model):
         city (models.CharField): The address' city
         state (USStateField): The address' state
         zipcode (USZipCodeField): The address' zipcode
+        normalized_street (models.CharField): USPS-style form of `street`, kept current on save
+        normalized_unit (models.CharField): USPS-style form of the unit, kept current on save
+        normalized_city (models.CharField): USPS-style form of `city`, kept current on save
+        normalized_zipcode (models.CharField): five-digit form of `zipcode`, kept current on save
+        lat (models.FloatField, optional): latitude of the zipcode's centroid
+        lon (models.FloatField, optional): longitude of the zipcode's centroid
     """
 
     street: models.CharField = models.CharField(_("street"), max_length=150, help_text=_("building number and street name"))
@@ -61,6 +87,16 @@ class USAddressMixin(models.Model):
     state: USStateField = USStateField()
     zipcode: USZipCodeField = USZipCodeField()
 
+    DERIVED_FIELDS: tuple[str, ...] = ("normalized_street", "normalized_unit", "normalized_city", "normalized_zipcode", "lat", "lon")
+    """Fields computed by `refresh_derived_fields()`."""
+
+    normalized_street: models.CharField = models.CharField(_("normalized street"), max_length=150, blank=True, default="", editable=False)
+    normalized_unit: models.CharField = models.CharField(_("normalized unit"), max_length=42, blank=True, default="", editable=False)
+    normalized_city: models.CharField = models.CharField(_("normalized city"), max_length=150, blank=True, default="", editable=False)
+    normalized_zipcode: models.CharField = models.CharField(_("normalized zipcode"), max_length=5, blank=True, default="", editable=False)
+    lat: models.FloatField = models.FloatField(_("latitude"), blank=True, null=True, editable=False)
+    lon: models.FloatField = models.FloatField(_("longitude"), blank=True, null=True, editable=False)
+
     @property
     def line1(self) -> str:
         """Defines the full first line of the address.
@@ -92,6 +128,24 @@ class USAddressMixin(models.Model):
     class Meta:
         abstract = True
 
+    def refresh_derived_fields(self) -> None:
+        """Recompute the normalized address fields and the zipcode centroid.
+
+        `save()` calls this; bulk write paths that bypass `save()` should call it directly.
+        """
+        self.normalized_street = addresses.normalize_street(self.street)
+        self.normalized_unit = addresses.normalize_unit(self.unit_type, self.unit_number)
+        self.normalized_city = addresses.normalize_city(self.city)
+        self.normalized_zipcode = addresses.normalize_zipcode(self.zipcode)
+        self.lat, self.lon = addresses.gazetteer.lookup(self.normalized_zipcode) or (None, None)
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *self.DERIVED_FIELDS}
+        return super().save(*args, **kwargs)
+
     def unit(self) -> str:
         """A full unit line including the unit type and identification.
 
@@ -173,12 +227,15 @@ class PersonMixin(models.Model):
             role within a company
         description (models.TextField, optional): an optional block of text providing
             additional information about the person.
+        sort_name (models.CharField): lowercased "last, first" key kept in sync on save,
+            used for ordering and prefix searches
     """
 
     first_name: models.CharField = models.CharField(_("first name"), max_length=50)
     last_name: models.CharField = models.CharField(_("last name"), max_length=50)
     job_title: models.CharField = models.CharField(_("role / title"), max_length=50, blank=True, null=True)
     description: models.TextField = models.TextField(_("about the person"), blank=True, null=True)
+    sort_name: models.CharField = models.CharField(_("sort name"), max_length=102, editable=False, default="")
 
     def full_name(self) -> str:
         """Generates a single string including the instance's first and last names.
@@ -204,6 +261,13 @@ class PersonMixin(models.Model):
         if self.job_title:
             self.job_title = self.job_title.title()
 
+    def save(self, *args, **kwargs):
+        self.sort_name = make_sort_name(self.first_name, self.last_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"first_name", "last_name"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "sort_name"}
+        return super().save(*args, **kwargs)
+
     class Meta:
         abstract = True
 
@@ -230,6 +294,11 @@ class EmailMixin(models.Model):
         super().clean()
         self.email_address = normalize_email(self.email_address)
 
+    def refresh_derived_fields(self) -> None:
+        """Normalize `email_address` for bulk write paths that bypass `clean()`.
+        """
+        self.email_address = normalize_email(self.email_address)
+
     def __str__(self):
         return self.email_address
 
@@ -241,12 +310,31 @@ class PhoneNumberMixin(models.Model):
     that will be used to relate multiple phone numbers to other models.
 
     Attributes:
-        phone_number (PhoneNumberField): the phone number
+        phone_number (CachedPhoneNumberField): the phone number
+        national_format (models.CharField): the stored national format, kept current on save
+        international_format (models.CharField): the stored international format, kept current on save
     """
-    phone_number: PhoneNumberField = PhoneNumberField()
+    phone_number: CachedPhoneNumberField = CachedPhoneNumberField()
+    national_format: models.CharField = models.CharField(_("national format"), max_length=32, blank=True, default="", editable=False)
+    international_format: models.CharField = models.CharField(_("international format"), max_length=32, blank=True, default="", editable=False)
 
     class Meta:
         abstract = True
 
+    def refresh_derived_fields(self) -> None:
+        """Recompute `national_format` and `international_format` from `phone_number`.
+
+        `save()` calls this; bulk write paths that bypass `save()` should call it directly.
+        """
+        self.national_format = format_phone_number(self.phone_number, "NATIONAL")
+        self.international_format = format_phone_number(self.phone_number, "INTERNATIONAL")
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone_number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "national_format", "international_format"}
+        return super().save(*args, **kwargs)
+
     def __str__(self) -> str:
-        return self.phone_number
+        return self.national_format or format_phone_number(self.phone_number)
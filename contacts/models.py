@@ -1,15 +1,35 @@
-from django.db import models
+from django.contrib.postgres.indexes import OpClass
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from .mixins import (
     ObjectTrackingMixin, USAddressMixin, PersonMixin,
-    EmailMixin, PhoneNumberMixin,
+    EmailMixin, PhoneNumberMixin, TenantMixin, USER_MODEL,
 )
+from .managers import (
+    AddressRollupManager, ArchivableManager, ArchivableQuerySet, ConsentEventManager, ConsentStatusManager,
+    ContactAddressManager, ContactAddressQuerySet, ContactManager, ContactQuerySet, ContactRelationshipManager,
+    ContactRelationshipQuerySet, ContactSummaryManager, OrganizationManager, OrganizationQuerySet, ReportingLineManager,
+    SegmentBitmapManager, TenantManager,
+)
+from . import bitmaps
+from .indexes import PatternIndex
+from .phone import format_phone_number
+
 
+LIVE = models.Q(archived_on__isnull=True)
+"""The condition of the partial indexes on the live tables, matching their default managers."""
 
-class AbstractContact(ObjectTrackingMixin, PersonMixin):
+
+class AbstractContact(ObjectTrackingMixin, PersonMixin, TenantMixin):
     """An abstract Contact model for importing into other pacakges.
     """
 
+    objects = ContactManager()
+    all_objects = models.Manager.from_queryset(ContactQuerySet)()
+
     class Meta:
         abstract: bool = True
         verbose_name: str = _("contact")
@@ -21,39 +41,741 @@ class AbstractContact(ObjectTrackingMixin, PersonMixin):
 
 class Contact(AbstractContact):
     """Provides a default Contact model"""
-    class meta:
+
+    tags = models.ManyToManyField("Tag", through="ContactTag", related_name="contacts", blank=True, verbose_name=_("tags"))
+
+    class Meta(AbstractContact.Meta):
         abstract: bool = False
+        indexes = [
+            # left-anchored LIKE lookups on PostgreSQL need the pattern opclass
+            models.Index(
+                fields=["tenant", "sort_name"], name="contacts_sort_name_prefix_idx",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"], condition=LIVE,
+            ),
+        ]
+
+
+class ContactChannel(TenantMixin):
+    """Abstract base of the channel models, keeping each row's tenant equal to its contact's
+    """
+
+    consent_channel: str = ""
+    """the `ConsentEvent.Channel` of the model's addresses; blank where consent does not apply"""
+
+    consent_field: str = ""
+    """the field holding the address that consent is recorded for"""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.contact_id is not None:
+            self.tenant = self.contact.tenant
+        return super().save(*args, **kwargs)
 
+    def record_consent(self, purpose: str, status: str, **fields) -> "ConsentEvent":
+        """Record a consent event for this row's address, see `ConsentEvent.objects.record()`.
+        """
+        return ConsentEvent.objects.record(
+            self.consent_channel, getattr(self, self.consent_field), purpose, status,
+            contact=self.contact, tenant=self.tenant, **fields,
+        )
 
+    def consent(self, purpose: str) -> str | None:
+        """The current `ConsentStatus.status` of this row's address for `purpose`; None when never recorded.
+        """
+        return ConsentStatus._base_manager.filter(
+            tenant=self.tenant, channel=self.consent_channel, address=getattr(self, self.consent_field), purpose=purpose,
+        ).values_list("status", flat=True).first()
 
-class ContactAddress(ObjectTrackingMixin, USAddressMixin):
+
+class ContactAddress(ObjectTrackingMixin, USAddressMixin, ContactChannel):
     """Model definition for assigning addresses to a Contact
     """
 
     contact = models.ForeignKey(Contact, related_name='contact_addresses', on_delete=models.CASCADE)
     """the assigned contact for the address"""
 
+    objects = ContactAddressManager()
+    all_objects = models.Manager.from_queryset(ContactAddressQuerySet)()
+
     class Meta:
         verbose_name: str = _("contact address")
         verbose_name_plural: str = _("contact addresses")
+        indexes = [
+            models.Index(fields=["tenant", "normalized_zipcode", "normalized_street"], name="contacts_addr_normalized_idx", condition=LIVE),
+            models.Index(fields=["tenant", "lat", "lon"], name="contacts_addr_latlon_idx", condition=LIVE),
+            models.Index(fields=["tenant", "updated_on"], name="contacts_addr_updated_idx", condition=LIVE),
+        ]
+
+
+class AddressRollup(TenantMixin):
+    """Materialized address counts per (tenant, state, city, zipcode), for `ContactAddress.objects.rollup(use_summary=True)`
+
+    Kept current with `AddressRollup.objects.refresh()` or the `refresh_address_rollup` command.
+    """
+
+    state: models.CharField = models.CharField(_("state"), max_length=2)
+    city: models.CharField = models.CharField(_("normalized city"), max_length=150)
+    zipcode: models.CharField = models.CharField(_("normalized zipcode"), max_length=5)
+    count: models.PositiveIntegerField = models.PositiveIntegerField(_("addresses"))
+    refreshed_through: models.DateTimeField = models.DateTimeField(_("refreshed through"))
+    """the latest address `updated_on` counted"""
 
+    objects = AddressRollupManager()
 
-class ContactPhoneNumber(ObjectTrackingMixin, PhoneNumberMixin):
+    class Meta:
+        verbose_name: str = _("address rollup")
+        verbose_name_plural: str = _("address rollups")
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "state", "city", "zipcode"], name="contacts_addressrollup_group_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.city}, {self.state} {self.zipcode}: {self.count}"
+
+
+class ContactPhoneNumber(ObjectTrackingMixin, PhoneNumberMixin, ContactChannel):
     """Model definition for assigning phone numbers to a Contact
     """
 
     contact = models.ForeignKey(Contact, related_name='contact_phone_numbers', on_delete=models.CASCADE)
     """the assigned contact for the phone number"""
 
+    consent_channel = "phone"
+    consent_field = "phone_number"
+
+    objects = ArchivableManager()
+    all_objects = models.Manager.from_queryset(ArchivableQuerySet)()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tenant", "phone_number"], name="contacts_phone_prefix_idx",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"], condition=LIVE,
+            ),
+        ]
+
     def __str__(self):
-        return self.phone_number.as_national
+        return self.national_format or format_phone_number(self.phone_number)
 
 
-class ContactEmail(ObjectTrackingMixin, EmailMixin):
+class ContactEmail(ObjectTrackingMixin, EmailMixin, ContactChannel):
     """Model definition for assinging emails to a Contact"""
 
     contact = models.ForeignKey(Contact, related_name='contact_email_addresses', on_delete=models.CASCADE)
     """the assigned contact"""
 
+    email_address: models.EmailField = models.EmailField(_("email address"), max_length=254)
+    """unique among the tenant's live emails, so an address archived with its contact can be reused"""
+
+    consent_channel = "email"
+    consent_field = "email_address"
+
+    objects = ArchivableManager()
+    all_objects = models.Manager.from_queryset(ArchivableQuerySet)()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "email_address"], condition=LIVE, name="contacts_email_live_uniq"),
+        ]
+        indexes = [
+            PatternIndex(
+                "tenant", OpClass(Upper("email_address"), name="text_pattern_ops"),
+                name="contacts_email_prefix_idx", condition=LIVE,
+            ),
+        ]
+
     def __str__(self):
         return self.email_address
+
+    def validate_constraints(self, exclude=None):
+        """Validate the constraints, checking ``contacts_email_live_uniq`` even when a form excludes its fields.
+
+        Django skips a constraint that refers to an excluded field, and model
+        forms exclude the non-editable `tenant` and `archived_on`, so the live,
+        per-tenant uniqueness is checked explicitly in that case.
+
+        Raises:
+            ValidationError: a constraint is violated, or another live email in the tenant has this address
+        """
+        super().validate_constraints(exclude=exclude)
+        if not exclude or "email_address" in exclude or self.archived_on is not None:
+            return
+        if {"tenant", "archived_on"}.isdisjoint(exclude):
+            return
+        tenant = self.contact.tenant if self.contact_id is not None else self.tenant
+        duplicates = type(self)._base_manager.using(router.db_for_write(type(self), instance=self)).filter(
+            tenant=tenant, email_address=self.email_address, archived_on__isnull=True,
+        )
+        if self.pk is not None:
+            duplicates = duplicates.exclude(pk=self.pk)
+        if duplicates.exists():
+            raise ValidationError({"email_address": ValidationError(
+                _("A live contact already has this email address."), code="unique",
+            )})
+
+
+class ContactSummary(TenantMixin):
+    """Denormalized, display-ready row per contact for list pages and dashboards
+
+    Kept current by `contacts.summary` on saves and deletes, and refreshed
+    explicitly by bulk write paths. The primary channels are the earliest created.
+    """
+
+    contact = models.OneToOneField(Contact, primary_key=True, related_name="summary", on_delete=models.CASCADE)
+    """the summarized contact"""
+
+    display_name: models.CharField = models.CharField(_("name"), max_length=101)
+    sort_name: models.CharField = models.CharField(_("sort name"), max_length=102, db_index=True)
+    primary_email: models.CharField = models.CharField(_("email address"), max_length=254, blank=True)
+    primary_phone: models.CharField = models.CharField(_("phone number"), max_length=32, blank=True)
+    address: models.CharField = models.CharField(_("address"), max_length=255, blank=True)
+    email_count: models.PositiveIntegerField = models.PositiveIntegerField(_("email addresses"), default=0)
+    phone_count: models.PositiveIntegerField = models.PositiveIntegerField(_("phone numbers"), default=0)
+    address_count: models.PositiveIntegerField = models.PositiveIntegerField(_("addresses"), default=0)
+    updated_on: models.DateTimeField = models.DateTimeField(_("last updated"), auto_now=True)
+
+    objects = ContactSummaryManager()
+
+    class Meta:
+        verbose_name: str = _("contact summary")
+        verbose_name_plural: str = _("contact summaries")
+        indexes = [
+            models.Index(fields=["tenant", "sort_name"], name="contacts_summary_tenant_idx"),
+            models.Index(fields=["tenant", "updated_on"], name="contacts_summary_updated_idx"),
+        ]
+
+    def __str__(self):
+        return self.display_name
+
+    @classmethod
+    def from_contact(cls, contact: Contact) -> "ContactSummary":
+        """Build an unsaved summary from a contact with its channels prefetched in creation order.
+        """
+        emails = contact.contact_email_addresses.all()
+        phones = contact.contact_phone_numbers.all()
+        addresses = contact.contact_addresses.all()
+        return cls(
+            contact=contact,
+            tenant=contact.tenant,
+            display_name=contact.full_name(),
+            sort_name=contact.sort_name,
+            primary_email=emails[0].email_address if emails else "",
+            primary_phone=str(phones[0]) if phones else "",
+            address=addresses[0].single_line_address()[:255] if addresses else "",
+            email_count=len(emails),
+            phone_count=len(phones),
+            address_count=len(addresses),
+        )
+
+
+class ContactTombstone(TenantMixin):
+    """Marks a contact that left the live tables, so sync clients learn of deletions
+
+    Written by `ContactSummary.objects.discard()` and `bury()` whenever a
+    contact's summary goes away: on delete, archive and purge.
+    """
+
+    contact_id: models.BigIntegerField = models.BigIntegerField(_("contact"))
+    deleted_on: models.DateTimeField = models.DateTimeField(_("deleted on"))
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name: str = _("contact tombstone")
+        verbose_name_plural: str = _("contact tombstones")
+        indexes = [
+            models.Index(fields=["tenant", "deleted_on"], name="contacts_tombstone_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.contact_id} ({self.deleted_on:%Y-%m-%d %H:%M})"
+
+
+class Organization(ObjectTrackingMixin, TenantMixin):
+    """A company, or a division of one, that contacts work at
+
+    Attributes:
+        name (models.CharField): the organization's name
+        parent (models.ForeignKey, optional): the organization this one is part of
+    """
+
+    name: models.CharField = models.CharField(_("name"), max_length=255)
+    parent: models.ForeignKey = models.ForeignKey(
+        "self", related_name="children", on_delete=models.CASCADE, blank=True, null=True, verbose_name=_("part of"),
+    )
+
+    objects = OrganizationManager()
+    all_objects = models.Manager.from_queryset(OrganizationQuerySet)()
+
+    class Meta:
+        verbose_name: str = _("organization")
+        verbose_name_plural: str = _("organizations")
+        indexes = [
+            models.Index(fields=["tenant", "name"], name="contacts_org_name_idx", condition=LIVE),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        ancestor = self.parent
+        while ancestor is not None:
+            if ancestor.pk == self.pk:
+                raise ValidationError({"parent": _("An organization cannot be part of itself.")})
+            ancestor = ancestor.parent
+
+
+class ContactRelationship(ObjectTrackingMixin, TenantMixin):
+    """A contact's place in an organization: where they work, and who they report to
+
+    Saving, deleting or archiving a ``reports_to`` relationship keeps the
+    `ReportingLine` closure current. A contact reports to at most one manager.
+
+    Attributes:
+        contact (models.ForeignKey): the contact the relationship is about
+        kind (models.CharField): one of `Kind`
+        organization (models.ForeignKey, optional): the employer, for ``works_at``
+        manager (models.ForeignKey, optional): the contact reported to, for ``reports_to``
+        title (models.CharField, optional): the contact's role in the relationship
+    """
+
+    class Kind(models.TextChoices):
+        WORKS_AT = "works_at", _("works at")
+        REPORTS_TO = "reports_to", _("reports to")
+
+    contact = models.ForeignKey(Contact, related_name="relationships", on_delete=models.CASCADE)
+    kind: models.CharField = models.CharField(_("relationship"), max_length=16, choices=Kind.choices)
+    organization: models.ForeignKey = models.ForeignKey(
+        Organization, related_name="relationships", on_delete=models.CASCADE, blank=True, null=True,
+        verbose_name=_("organization"),
+    )
+    manager: models.ForeignKey = models.ForeignKey(
+        Contact, related_name="managed_relationships", on_delete=models.CASCADE, blank=True, null=True,
+        verbose_name=_("manager"),
+    )
+    title: models.CharField = models.CharField(_("title"), max_length=100, blank=True)
+
+    objects = ContactRelationshipManager()
+    all_objects = models.Manager.from_queryset(ContactRelationshipQuerySet)()
+
+    class Meta:
+        verbose_name: str = _("contact relationship")
+        verbose_name_plural: str = _("contact relationships")
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(kind="works_at", organization__isnull=False, manager__isnull=True)
+                    | models.Q(kind="reports_to", organization__isnull=True, manager__isnull=False)
+                ),
+                name="contacts_relationship_kind_check",
+                violation_error_message=_("Works at needs an organization and reports to needs a manager."),
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(manager=models.F("contact")),
+                name="contacts_relationship_not_self",
+                violation_error_message=_("A contact cannot report to themselves."),
+            ),
+            models.UniqueConstraint(
+                fields=["contact"], condition=LIVE & models.Q(kind="reports_to"), name="contacts_reports_to_uniq",
+                violation_error_message=_("A contact reports to one manager."),
+            ),
+            models.UniqueConstraint(
+                fields=["contact", "organization"], condition=LIVE & models.Q(kind="works_at"), name="contacts_works_at_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["tenant", "organization"], name="contacts_rel_org_idx", condition=LIVE),
+            models.Index(fields=["tenant", "manager"], name="contacts_rel_manager_idx", condition=LIVE),
+        ]
+
+    def __str__(self):
+        return f"{self.contact} {self.get_kind_display()} {self.organization or self.manager}"
+
+    def clean(self):
+        if self.kind == self.Kind.REPORTS_TO and self.manager_id and self.contact_id:
+            if ReportingLine.objects.is_above(self.contact_id, self.manager_id):
+                raise ValidationError({"manager": _("%(manager)s already reports to %(contact)s.") % {
+                    "manager": self.manager, "contact": self.contact,
+                }})
+
+    def save(self, *args, **kwargs):
+        """Save the relationship and recompute the reporting lines it changes, in one transaction.
+
+        Raises:
+            ValueError: the relationship would close a reporting cycle
+        """
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            rows = [(self.contact_id, self.kind)]
+            if self.pk is not None:  # the old row, in case it was moved off `reports_to` or to another contact
+                rows += type(self)._base_manager.using(using).filter(pk=self.pk).values_list("contact_id", "kind")
+            super().save(*args, **kwargs)
+            changed = {contact_id for contact_id, kind in rows if kind == self.Kind.REPORTS_TO}
+            if changed:
+                ReportingLine.objects.db_manager(using).rebuild(changed)
+
+
+class ReportingLine(TenantMixin):
+    """One row per (manager, report) pair of the `reports_to` relationships, at any distance
+
+    The closure table of the reporting tree, for O(1) "does A manage B"
+    checks and single-join queries of everyone under a manager. Kept current
+    by `ReportingLine.objects.rebuild()`; never edit it directly.
+    """
+
+    ancestor = models.ForeignKey(Contact, related_name="report_lines", on_delete=models.CASCADE)
+    """the manager"""
+
+    descendant = models.ForeignKey(Contact, related_name="manager_lines", on_delete=models.CASCADE)
+    """the report"""
+
+    depth: models.PositiveIntegerField = models.PositiveIntegerField(_("depth"))
+    """1 for a direct report"""
+
+    objects = ReportingLineManager()
+
+    class Meta:
+        verbose_name: str = _("reporting line")
+        verbose_name_plural: str = _("reporting lines")
+        constraints = [
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="contacts_reportingline_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.descendant_id} -> {self.ancestor_id} ({self.depth})"
+
+
+class Tag(TenantMixin):
+    """A label for grouping contacts, used by `Segment` expressions as ``tag=<name>``
+    """
+
+    name: models.CharField = models.CharField(_("name"), max_length=100)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name: str = _("tag")
+        verbose_name_plural: str = _("tags")
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "name"], name="contacts_tag_name_uniq"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ContactTag(TenantMixin):
+    """The through table of `Contact.tags`
+
+    Tagging through `Contact.tags` refreshes the contact's summary, which the
+    segment bitmaps watch; `bulk_create` callers refresh the summaries themselves.
+    """
+
+    contact = models.ForeignKey(Contact, related_name="contact_tags", on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, related_name="contact_tags", on_delete=models.CASCADE)
+    created_on: models.DateTimeField = models.DateTimeField(_("created on"), auto_now_add=True)
+
+    class Meta:
+        verbose_name: str = _("contact tag")
+        verbose_name_plural: str = _("contact tags")
+        constraints = [
+            models.UniqueConstraint(fields=["contact", "tag"], name="contacts_contacttag_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.contact_id}: {self.tag_id}"
+
+
+class Segment(TenantMixin):
+    """A saved set of contacts described by a boolean expression
+
+    Expressions combine ``state=CA``, ``has email`` (or ``phone``,
+    ``address``) and ``tag=vip`` terms with ``AND``, ``OR``, ``NOT`` and
+    parentheses, and are evaluated in memory against the `SegmentBitmap`s;
+    see `contacts.segments`.
+    """
+
+    name: models.CharField = models.CharField(_("name"), max_length=100)
+    expression: models.TextField = models.TextField(_("expression"))
+    created_on: models.DateTimeField = models.DateTimeField(_("created on"), auto_now_add=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name: str = _("segment")
+        verbose_name_plural: str = _("segments")
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "name"], name="contacts_segment_name_uniq"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        from .segments import SegmentError, parse
+
+        try:
+            parse(self.expression)
+        except SegmentError as e:
+            raise ValidationError({"expression": str(e)})
+
+    def contact_ids(self, using: str | None = None):
+        """The ids of the segment's contacts as of the last `SegmentBitmap.objects.refresh()`.
+
+        Returns:
+            Bitmap: the contact ids, see `contacts.bitmaps`
+        """
+        from .segments import evaluate
+
+        return evaluate(self.expression, using=using)
+
+
+class SegmentBitmap(TenantMixin):
+    """The ids of the contacts with one attribute, as a serialized `contacts.bitmaps.Bitmap`
+
+    Attributes are ``state:<XX>``, ``has:email``, ``has:phone``,
+    ``has:address``, ``tag:<pk>`` and `ALL`, the live contacts. Kept current
+    with `SegmentBitmap.objects.refresh()` or the ``refresh_segments`` command.
+    Without pyroaring the bitmap is uncompressed, one bit per id up to its largest.
+    """
+
+    ALL: str = "all"
+
+    attribute: models.CharField = models.CharField(_("attribute"), max_length=100)
+    bitmap: models.BinaryField = models.BinaryField(_("bitmap"))
+    format: models.CharField = models.CharField(_("format"), max_length=10)
+    """the `contacts.bitmaps.FORMAT` that wrote `bitmap`"""
+
+    size: models.PositiveIntegerField = models.PositiveIntegerField(_("contacts"))
+    refreshed_through: models.DateTimeField = models.DateTimeField(_("refreshed through"))
+
+    objects = SegmentBitmapManager()
+
+    class Meta:
+        verbose_name: str = _("segment bitmap")
+        verbose_name_plural: str = _("segment bitmaps")
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "attribute"], name="contacts_segmentbitmap_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.attribute}: {self.size}"
+
+    def load(self):
+        """The deserialized bitmap.
+
+        Raises:
+            ValueError: the bitmap was written by another backend; refresh with `full=True`
+        """
+        if self.format != bitmaps.FORMAT:
+            raise ValueError(f"{self.attribute} is a {self.format!r} bitmap; refresh the segment bitmaps with full=True")
+        return bitmaps.Bitmap.deserialize(bytes(self.bitmap))
+
+
+class ConsentEvent(TenantMixin):
+    """One entry of the append-only consent ledger: an address opting in to or out of a purpose
+
+    Consent belongs to the address rather than the channel row, so an opt-out
+    still applies after the contact is deleted or purged and the address comes
+    back on another contact. Events are never changed; record a new one with
+    `ConsentEvent.objects.record()`, which also updates the `ConsentStatus`.
+    """
+
+    class Channel(models.TextChoices):
+        EMAIL = "email", _("Email")
+        PHONE = "phone", _("Phone")
+
+    class Status(models.TextChoices):
+        OPT_IN = "opt_in", _("Opted in")
+        OPT_OUT = "opt_out", _("Opted out")
+
+    channel: models.CharField = models.CharField(_("channel"), max_length=10, choices=Channel.choices)
+    address: models.CharField = models.CharField(_("address"), max_length=254)
+    """the normalized email address, or the E.164 phone number"""
+
+    purpose: models.CharField = models.CharField(_("purpose"), max_length=50)
+    status: models.CharField = models.CharField(_("status"), max_length=10, choices=Status.choices)
+    source: models.CharField = models.CharField(_("source"), max_length=100, blank=True)
+    """where the event came from, e.g. a signup form or an unsubscribe link"""
+
+    recorded_on: models.DateTimeField = models.DateTimeField(_("recorded on"), default=timezone.now)
+    contact = models.ForeignKey(
+        Contact, related_name="consent_events", on_delete=models.SET_NULL, blank=True, null=True,
+    )
+    """the contact the address belonged to, kept for auditing"""
+
+    recorded_by = models.ForeignKey(
+        USER_MODEL, related_name="consent_events", on_delete=models.SET_NULL, blank=True, null=True, editable=False,
+    )
+
+    objects = ConsentEventManager()
+
+    class Meta:
+        verbose_name: str = _("consent event")
+        verbose_name_plural: str = _("consent events")
+        indexes = [
+            models.Index(fields=["tenant", "channel", "address", "purpose", "recorded_on"], name="contacts_consentevent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.address} {self.purpose}: {self.status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("consent events are append-only; record a new event instead")
+        return super().save(*args, **kwargs)
+
+    @property
+    def key(self) -> tuple[str, str, str, str]:
+        """The `(tenant, channel, address, purpose)` of the event's `ConsentStatus`."""
+        return (self.tenant, self.channel, self.address, self.purpose)
+
+
+class ConsentStatus(TenantMixin):
+    """The latest `ConsentEvent` of each address and purpose, read by `eligible_recipients()`
+
+    Rows are derived from the ledger and rebuilt with `ConsentStatus.objects.rebuild()`.
+    """
+
+    Status = ConsentEvent.Status
+
+    channel: models.CharField = models.CharField(_("channel"), max_length=10, choices=ConsentEvent.Channel.choices)
+    address: models.CharField = models.CharField(_("address"), max_length=254)
+    purpose: models.CharField = models.CharField(_("purpose"), max_length=50)
+    status: models.CharField = models.CharField(_("status"), max_length=10, choices=Status.choices)
+    changed_on: models.DateTimeField = models.DateTimeField(_("changed on"))
+    """the `recorded_on` of the latest event"""
+
+    objects = ConsentStatusManager()
+
+    class Meta:
+        verbose_name: str = _("consent status")
+        verbose_name_plural: str = _("consent statuses")
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "channel", "address", "purpose"], name="contacts_consentstatus_uniq"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["tenant", "channel", "purpose", "address"], name="contacts_consent_optin_idx",
+                condition=models.Q(status="opt_in"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.address} {self.purpose}: {self.status}"
+
+
+# Cold storage for long-archived contacts, filled by `contacts.services.move_archived_contacts`.
+# Rows keep their live primary keys.
+
+
+class ArchivedContact(ObjectTrackingMixin, PersonMixin, TenantMixin):
+    """A contact moved out of the live tables after being archived"""
+
+    objects = models.Manager()
+
+    class Meta:
+        verbose_name: str = _("archived contact")
+        verbose_name_plural: str = _("archived contacts")
+
+    def __str__(self):
+        return self.full_name()
+
+
+class ArchivedContactAddress(ObjectTrackingMixin, USAddressMixin, TenantMixin):
+    """An address of an `ArchivedContact`"""
+
+    contact = models.ForeignKey(ArchivedContact, related_name='contact_addresses', on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name: str = _("archived contact address")
+        verbose_name_plural: str = _("archived contact addresses")
+
+
+class ArchivedContactPhoneNumber(ObjectTrackingMixin, PhoneNumberMixin, TenantMixin):
+    """A phone number of an `ArchivedContact`"""
+
+    contact = models.ForeignKey(ArchivedContact, related_name='contact_phone_numbers', on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name: str = _("archived contact phone number")
+        verbose_name_plural: str = _("archived contact phone numbers")
+
+
+class ArchivedContactEmail(ObjectTrackingMixin, EmailMixin, TenantMixin):
+    """An email address of an `ArchivedContact`"""
+
+    contact = models.ForeignKey(ArchivedContact, related_name='contact_email_addresses', on_delete=models.CASCADE)
+    email_address: models.EmailField = models.EmailField(_("email address"), max_length=254, db_index=True)
+
+    class Meta:
+        verbose_name: str = _("archived contact email")
+        verbose_name_plural: str = _("archived contact emails")
+
+
+ARCHIVE_TABLES: dict[type, type] = {
+    Contact: ArchivedContact,
+    ContactEmail: ArchivedContactEmail,
+    ContactPhoneNumber: ArchivedContactPhoneNumber,
+    ContactAddress: ArchivedContactAddress,
+}
+"""Each live model and its cold-storage model, parents first."""
+
+
+class ContactJob(TenantMixin):
+    """A background job of `contacts.tasks`, with its progress and resume checkpoint
+
+    Attributes:
+        name (models.CharField): the registered job, e.g. ``"purge_contacts"``
+        arguments (models.JSONField): keyword arguments of the job function
+        status (models.CharField): one of `Status`
+        done (models.PositiveIntegerField): items processed so far
+        total (models.PositiveIntegerField, optional): items to process, when known up front
+        checkpoint (models.JSONField): where the job resumes after an interruption
+        error (models.TextField): the traceback of a failed run
+        heartbeat_on (models.DateTimeField, optional): when a running job last claimed or checkpointed
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("queued")
+        RUNNING = "running", _("running")
+        DONE = "done", _("done")
+        FAILED = "failed", _("failed")
+        CANCELLED = "cancelled", _("cancelled")
+
+    name: models.CharField = models.CharField(_("job"), max_length=100)
+    arguments: models.JSONField = models.JSONField(_("arguments"), default=dict, blank=True)
+    status: models.CharField = models.CharField(_("status"), max_length=10, choices=Status.choices, default=Status.QUEUED)
+    done: models.PositiveIntegerField = models.PositiveIntegerField(_("done"), default=0)
+    total: models.PositiveIntegerField = models.PositiveIntegerField(_("total"), blank=True, null=True)
+    checkpoint: models.JSONField = models.JSONField(_("checkpoint"), default=dict, blank=True)
+    error: models.TextField = models.TextField(_("error"), blank=True)
+    created_on: models.DateTimeField = models.DateTimeField(_("created on"), auto_now_add=True)
+    started_on: models.DateTimeField = models.DateTimeField(_("started on"), blank=True, null=True)
+    finished_on: models.DateTimeField = models.DateTimeField(_("finished on"), blank=True, null=True)
+    heartbeat_on: models.DateTimeField = models.DateTimeField(_("last heartbeat"), blank=True, null=True)
+    created_by: models.ForeignKey = models.ForeignKey(
+        USER_MODEL, related_name="contact_jobs", on_delete=models.SET_NULL, blank=True, null=True, editable=False,
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        verbose_name: str = _("contacts job")
+        verbose_name_plural: str = _("contacts jobs")
+        ordering = ("-created_on",)
+        indexes = [
+            models.Index(fields=["status", "created_on"], name="contacts_job_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+    @property
+    def percent(self) -> int | None:
+        """Progress in percent, or None while the total is unknown."""
+        if not self.total:
+            return 100 if self.status == self.Status.DONE else None
+        return min(100, self.done * 100 // self.total)
@@ -0,0 +1,28 @@
+"""contacts.orgchart
+
+Keeps the `ReportingLine` closure in step with the `reports_to` relationships.
+
+`ContactRelationship.save()` and the relationship querysets' `archive()` and
+`restore()` rebuild the lines they change themselves; the receiver here
+covers deletes, including those cascaded from a deleted contact or
+organization. `purge_contacts` rebuilds the lines of the purged contacts'
+reports, since it deletes without signals.
+
+Org charts are read with `Contact.objects.org_members()`,
+`reports_to_chain()` and `reports()`.
+"""
+
+from django.db.models.signals import post_delete
+
+from .models import ContactRelationship, ReportingLine
+
+
+def _relationship_deleted(sender, instance, using, **kwargs):
+    if instance.kind == ContactRelationship.Kind.REPORTS_TO:
+        ReportingLine.objects.db_manager(using).rebuild([instance.contact_id])
+
+
+def connect() -> None:
+    """Connect the receivers; called from `ContactsConfig.ready()`.
+    """
+    post_delete.connect(_relationship_deleted, sender=ContactRelationship, dispatch_uid="contacts_orgchart_relationship")
@@ -0,0 +1,177 @@
+"""contacts.pgcopy
+
+PostgreSQL `COPY` helpers for the contacts app's bulk read and write paths.
+
+Both psycopg 3 (`cursor.copy()`) and psycopg2 (`cursor.copy_expert()`) are
+supported. Callers check `supports_copy()` first and fall back to batched
+`bulk_create`, or to the ORM for reads, on other backends.
+"""
+
+import codecs
+import io
+
+
+def supports_copy(connection) -> bool:
+    """Whether `connection` can stream rows with `COPY`.
+    """
+    return connection.vendor == "postgresql"
+
+
+def reserve_ids(connection, model, count: int) -> list[int]:
+    """Draw `count` primary keys from the model's sequence.
+
+    Rows written with `COPY` do not report their ids back, so ids are reserved
+    up front and written explicitly, which lets child rows reference them.
+
+    Args:
+        connection: a PostgreSQL database connection
+        model (type[models.Model]): a model with an auto-incrementing primary key
+        count (int): the number of ids to reserve
+
+    Returns:
+        list[int]: the reserved ids, ascending
+    """
+    table: str = model._meta.db_table
+    column: str = model._meta.pk.column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [table, column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value)
+
+
+def copy_rows(connection, table: str, columns: list[str], rows) -> None:
+    """Stream `rows` into `table` with `COPY ... FROM STDIN`.
+
+    Args:
+        connection: a PostgreSQL database connection
+        table (str): the target table
+        columns (list[str]): the target columns, in row order
+        rows (Iterable[Sequence]): the values; `None` is written as `NULL`
+    """
+    quote = connection.ops.quote_name
+    sql = f"COPY {quote(table)} ({', '.join(quote(c) for c in columns)}) FROM STDIN"
+    # the raw cursor's errors, such as a unique violation, surface as Django's IntegrityError
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):  # psycopg 3
+            with raw.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row([_copy_value(v) for v in row])
+            return
+        # psycopg2: CSV where values are always quoted, so only an empty unquoted field is NULL
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join("" if v is None else _quote_csv(_copy_value(v)) for v in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        raw.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+
+
+def _quote_csv(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def copy_instances(connection, model, instances: list, fields: list[str], table: str | None = None) -> None:
+    """`COPY` unsaved model instances, writing the given fields.
+
+    Values are prepared with each field's `get_db_prep_save`, as `bulk_create` does.
+    `table` overrides the model's table, e.g. with a staging table of the same shape.
+    """
+    concrete = [model._meta.get_field(name) for name in fields]
+    copy_rows(
+        connection,
+        table or model._meta.db_table,
+        [field.column for field in concrete],
+        (
+            [field.get_db_prep_save(field.pre_save(obj, add=True), connection) for field in concrete]
+            for obj in instances
+        ),
+    )
+
+
+def merge_instances(connection, model, instances: list, fields: list[str]) -> set:
+    """`COPY` instances into a staging table, then merge them into the model's table
+    with one `INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING`.
+
+    Rows that would violate a unique constraint, such as an email address a
+    concurrent writer just added, are skipped instead of failing the statement.
+    `fields` must include the primary key, see `reserve_ids`, which tells the
+    caller which rows were skipped. The staging table holds only the written
+    columns, with none of the table's constraints or identity, and is created
+    once per connection and emptied on commit, so call this inside a transaction.
+
+    Returns:
+        set: the primary keys of the rows inserted into the model's table
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    staging = quote(f"{model._meta.db_table}_staging")
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+            f"AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {staging}")  # rows of an earlier merge in the same transaction
+        copy_instances(connection, model, instances, fields, table=staging)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            f"ON CONFLICT DO NOTHING RETURNING {quote(model._meta.pk.column)}"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+class _LineCounter:
+    """Text stream wrapper counting the lines written through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = 0
+
+    def write(self, data: str) -> None:
+        self.lines += data.count("\n")
+        self.stream.write(data)
+
+
+def copy_to(connection, sql: str, params, stream) -> int:
+    """Stream the rows of a query to a text stream with `COPY (...) TO STDOUT`.
+
+    The rows are written as CSV with a delimiter and quote character that
+    JSON text never contains, so a query selecting one JSON value per row is
+    written verbatim, one value per line.
+
+    Args:
+        connection: a PostgreSQL database connection
+        sql (str): a `SELECT` with `%s` placeholders
+        params (Sequence): the placeholder values
+        stream (TextIO): receives the output
+
+    Returns:
+        int: the number of rows written
+    """
+    stream = _LineCounter(stream)
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        raw = cursor.cursor
+        query = raw.mogrify(sql, params)
+        if isinstance(query, bytes):
+            query = query.decode(connection.connection.encoding)
+        copy_sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, DELIMITER E'\\x02', QUOTE E'\\x01')"
+        if hasattr(raw, "copy"):  # psycopg 3
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            with raw.copy(copy_sql) as copy:
+                for data in copy:
+                    stream.write(decoder.decode(bytes(data)))
+            stream.write(decoder.decode(b"", final=True))
+        else:
+            raw.copy_expert(copy_sql, stream)
+    return stream.lines
@@ -0,0 +1,302 @@
+"""contacts.phone
+
+Memoized phone number parsing and formatting.
+
+`PhoneNumberField` re-parses every stored value with `phonenumbers` when a row is
+loaded, and `PhoneNumber.as_national` re-formats it on every render. Both results
+only depend on the stored E.164 string, so they are kept in a bounded LRU cache
+shared by the process.
+
+`phonenumber_field` and the `phonenumbers` metadata it loads are imported on
+first use rather than with the models, keeping them out of the app's startup.
+Validity checks try the regions in `CONTACTS_PHONE_REGIONS` first so only their
+metadata is loaded for the numbers the deployment actually stores.
+"""
+
+from collections import OrderedDict
+from copy import copy
+from functools import cache
+from threading import Lock
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.signals import setting_changed
+from django.db import models
+from django.dispatch import receiver
+from django.utils.encoding import force_str
+from django.utils.translation import gettext_lazy as _
+
+from .conf import app_settings
+
+
+@cache
+def configured_regions() -> tuple[tuple[str, int], ...]:
+    """`(region, country calling code)` for each of `CONTACTS_PHONE_REGIONS`, in order.
+
+    Raises:
+        ImproperlyConfigured: a region is not supported by `phonenumbers`
+    """
+    import phonenumbers
+
+    regions = tuple(region.upper() for region in app_settings.PHONE_REGIONS or ())
+    unknown = [region for region in regions if region not in phonenumbers.SUPPORTED_REGIONS]
+    if unknown:
+        raise ImproperlyConfigured(f"CONTACTS_PHONE_REGIONS: unsupported region(s) {', '.join(unknown)}")
+    return tuple((region, phonenumbers.country_code_for_region(region)) for region in regions)
+
+
+@receiver(setting_changed)
+def _reset_regions(setting, **kwargs):
+    if setting == "CONTACTS_PHONE_REGIONS":
+        configured_regions.cache_clear()
+
+
+def is_valid_number(number) -> bool:
+    """Whether `number` is valid, trying the configured regions first.
+
+    `phonenumbers.is_valid_number` finds a number's region by loading the
+    metadata of each region sharing its calling code until one matches, and
+    +1 is shared by 25 regions; a Canadian number loads eight. Only the
+    configured regions are loaded for numbers they cover, and other numbers
+    fall back to the full lookup.
+
+    Args:
+        number (PhoneNumber): a parsed phone number
+    """
+    import phonenumbers
+
+    for region, country_code in configured_regions():
+        if number.country_code == country_code and phonenumbers.is_valid_number_for_region(number, region):
+            return True
+    return phonenumbers.is_valid_number(number)
+
+
+def to_python(value, region: str | None = None):
+    """`phonenumber_field.phonenumber.to_python`, imported on first call.
+    """
+    from phonenumber_field import phonenumber
+
+    return phonenumber.to_python(value, region=region)
+
+
+def validate_international_phonenumber(value) -> None:
+    """`phonenumber_field.validators.validate_international_phonenumber`, using `is_valid_number`.
+    """
+    from phonenumber_field.phonenumber import PhoneNumber
+
+    number = to_python(value)
+    if isinstance(number, PhoneNumber) and not is_valid_number(number):
+        raise ValidationError(_("The phone number entered is not valid."), code="invalid")
+
+
+class PhoneNumberCache:
+    """A bounded, thread-safe LRU cache with hit/miss counters.
+
+    Attributes:
+        maxsize (int): the maximum number of entries kept. Defaults to `CONTACTS_PHONE_CACHE_SIZE`.
+        hits (int): lookups answered from the cache
+        misses (int): lookups that had to be computed
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        self._maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize if self._maxsize is not None else app_settings.PHONE_CACHE_SIZE
+
+    def get_or_set(self, key, compute):
+        """Returns the cached value for `key`, calling `compute()` on a miss.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def info(self) -> dict:
+        """Current counters, for sizing the cache.
+
+        Returns:
+            dict: `{"hits", "misses", "size", "maxsize"}`
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+parse_cache = PhoneNumberCache()
+"""Parsed `PhoneNumber` objects keyed on `(stored string, default region)`."""
+
+format_cache = PhoneNumberCache()
+"""Formatted strings keyed on `(number, format name)`, where the number is the parsed
+number's fields, or a string and the default region it is parsed in."""
+
+
+def _default_region() -> str | None:
+    return getattr(settings, "PHONENUMBER_DEFAULT_REGION", None)
+
+
+def parse_phone_number(value: str):
+    """Parse a stored phone number through `parse_cache`.
+
+    A copy of the cached object is returned so callers cannot mutate the shared entry.
+
+    Args:
+        value (str): the stored, normally E.164, phone number
+
+    Returns:
+        PhoneNumber | None: the parsed number
+    """
+    if not value:
+        return to_python(value)
+    return copy(parse_cache.get_or_set((value, _default_region()), lambda: to_python(value)))
+
+
+def format_phone_number(value, fmt: str = "NATIONAL") -> str:
+    """Format a phone number through `format_cache`.
+
+    Args:
+        value (PhoneNumber | str): the phone number
+        fmt (str, optional): a `PhoneNumber.format_map` key. Defaults to `"NATIONAL"`.
+
+    Returns:
+        str: the formatted number, or the raw input when the number is invalid
+    """
+    if not value:
+        return ""
+    from phonenumber_field.phonenumber import PhoneNumber
+
+    if isinstance(value, PhoneNumber):
+        # the parsed number, not its raw input, which reads differently per region
+        key = (value.country_code, value.national_number, value.extension, value.italian_leading_zero,
+               value.number_of_leading_zeros)
+    else:
+        key = (str(value), _default_region())
+
+    def compute() -> str:
+        number = value if isinstance(value, PhoneNumber) else to_python(value)
+        if not is_valid_number(number):
+            return str(number)
+        return number.format_as(PhoneNumber.format_map[fmt])
+
+    return format_cache.get_or_set((key, fmt), compute)
+
+
+def cache_info() -> dict:
+    """Hit/miss counters for both caches.
+
+    Returns:
+        dict: `{"parse": parse_cache.info(), "format": format_cache.info()}`
+    """
+    return {"parse": parse_cache.info(), "format": format_cache.info()}
+
+
+class PhoneNumberDescriptor:
+    """Converts assigned values to `PhoneNumber`, as `phonenumber_field` does.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.field.name not in instance.__dict__:
+            instance.refresh_from_db(fields=[self.field.name])
+        return instance.__dict__[self.field.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.name] = to_python(value, region=self.field.region)
+
+
+class CachedPhoneNumberField(models.CharField):
+    """A drop-in `phonenumber_field` `PhoneNumberField` that loads values through
+    `parse_phone_number`, checks validity with `is_valid_number` and imports
+    `phonenumber_field` lazily.
+
+    It mirrors the library field rather than subclassing it, since a subclass
+    would import `phonenumber_field.modelfields`, and with it `phonenumbers`,
+    when the models load. The column is identical to `PhoneNumberField`, so it
+    deconstructs as one and swapping the field class needs no migration.
+    """
+
+    descriptor_class = PhoneNumberDescriptor
+    default_validators = [validate_international_phonenumber]
+    description = _("Phone number")
+
+    def __init__(self, *args, region: str | None = None, **kwargs):
+        kwargs.setdefault("max_length", 128)
+        super().__init__(*args, **kwargs)
+        self._region = region
+
+    @property
+    def region(self) -> str | None:
+        return self._region or getattr(settings, "PHONENUMBER_DEFAULT_REGION", None)
+
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        if self.region is not None:  # nothing to validate, and no import, for the default
+            from phonenumber_field.phonenumber import validate_region
+
+            try:
+                validate_region(self.region)
+            except ValueError as e:
+                errors.append(checks.Error(force_str(e), obj=self))
+        return errors
+
+    def to_python(self, value):
+        return to_python(value, region=self.region)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if not value:
+            return value
+        if not is_valid_number(value):
+            return value.raw_input
+        from phonenumber_field.phonenumber import PhoneNumber
+
+        return value.format_as(PhoneNumber.format_map[getattr(settings, "PHONENUMBER_DB_FORMAT", "E164")])
+
+    def from_db_value(self, value, expression, connection):
+        return parse_phone_number(value)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["region"] = self._region
+        return name, "phonenumber_field.modelfields.PhoneNumberField", args, kwargs
+
+    def formfield(self, form_class=None, choices_form_class=None, **kwargs):
+        from phonenumber_field.formfields import PhoneNumberField
+        from phonenumber_field.validators import validate_international_phonenumber as library_validator
+
+        defaults = {
+            "form_class": PhoneNumberField if form_class is None else form_class,
+            "region": self.region,
+            "error_messages": self.error_messages,
+            "choices_form_class": choices_form_class,
+        }
+        defaults.update(kwargs)
+        field = super().formfield(**defaults)
+        # the form field's own validator would check validity without the configured regions
+        field.validators = [
+            validate_international_phonenumber if validator is library_validator else validator
+            for validator in field.validators
+        ]
+        return field
@@ -0,0 +1,126 @@
+"""contacts.routers
+
+Read-replica routing for the contacts app's models.
+
+`ContactsRouter` sends reads of contacts models to one of the
+`CONTACTS_READ_REPLICAS` and writes to `CONTACTS_PRIMARY_DATABASE`. Once a
+request writes a contacts model its later reads are pinned to the primary, and
+`ReplicaPinningMiddleware` carries the pin to the same client's requests for
+`CONTACTS_REPLICA_PIN_SECONDS`, so users read their own writes despite
+replication lag.
+
+Tenants listed in `CONTACTS_TENANT_DATABASES` are placed on their own database
+instead, for both reads and writes; see `contacts.tenants`.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .conf import app_settings
+from .tenants import get_current_tenant
+
+
+_pinned: ContextVar[bool] = ContextVar("contacts_pinned_to_primary", default=False)
+_wrote: ContextVar[bool] = ContextVar("contacts_wrote", default=False)
+
+
+def is_pinned() -> bool:
+    """Whether reads currently go to the primary.
+    """
+    return _pinned.get()
+
+
+def pin_to_primary() -> None:
+    """Send the rest of the current request's (or task's) reads to the primary.
+    """
+    _pinned.set(True)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. right before a write that depends on the read.
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ContactsRouter:
+    """Database router for the contacts app.
+
+    Add it to `DATABASE_ROUTERS` and list the replica aliases in
+    `CONTACTS_READ_REPLICAS`. With no replicas configured every query goes to
+    the primary. Models of other apps are left to the next router.
+    """
+
+    app_label: str = "contacts"
+
+    def _routed(self, model) -> bool:
+        return model._meta.app_label == self.app_label
+
+    def _tenant_database(self, hints: dict) -> str | None:
+        """The database of the hinted instance's tenant, or of the current tenant.
+        """
+        tenant = getattr(hints.get("instance"), "tenant", None)
+        return app_settings.TENANT_DATABASES.get(get_current_tenant() if tenant is None else tenant)
+
+    def db_for_read(self, model, **hints):
+        if not self._routed(model):
+            return None
+        if database := self._tenant_database(hints):
+            return database
+        replicas = app_settings.READ_REPLICAS
+        if not replicas or is_pinned():
+            return app_settings.PRIMARY_DATABASE
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not self._routed(model):
+            return None
+        pin_to_primary()
+        _wrote.set(True)
+        return self._tenant_database(hints) or app_settings.PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db == obj2._state.db:
+            return True
+        databases = {app_settings.PRIMARY_DATABASE, *app_settings.READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in app_settings.READ_REPLICAS:
+            return False  # replicas receive their schema through replication
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Pin a client's reads to the primary for `CONTACTS_REPLICA_PIN_SECONDS` after it writes.
+
+    A request that writes a contacts model sets, or extends, a short-lived
+    cookie; requests carrying the cookie read from the primary. Each request
+    starts unpinned otherwise, whatever the previous request on the thread did.
+    """
+
+    cookie_name: str = "contacts_pin_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = _pinned.set(self.cookie_name in request.COOKIES), _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _pinned.reset(tokens[0])
+            _wrote.reset(tokens[1])
+        if wrote and app_settings.REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                self.cookie_name, "1", max_age=app_settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
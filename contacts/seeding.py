@@ -0,0 +1,199 @@
+"""contacts.seeding
+
+Deterministic synthetic contacts for load testing.
+
+`seed_contacts` generates contacts with realistic names, normalized email
+addresses, valid US phone numbers and addresses whose state, city and zipcode
+come from the bundled ZIP table. The same seed always yields the same data.
+Rows are written in batches with `COPY` on PostgreSQL and `bulk_create` elsewhere,
+and each batch's `ContactSummary` rows are refreshed with it.
+"""
+
+import random
+
+from django.db import connections, router, transaction
+from localflavor.us.us_states import STATE_CHOICES
+
+from . import pgcopy
+from .addresses import gazetteer
+from .instrumentation import instrument
+from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+from .services import insert_contacts
+from .utils import make_sort_name
+
+
+FIRST_NAMES: tuple[str, ...] = (
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Lisa", "Daniel", "Nancy", "Matthew", "Betty", "Anthony", "Sandra", "Mark", "Margaret",
+    "Jose", "Maria", "Luis", "Ana", "Carlos", "Sofia", "Wei", "Mei", "Hiroshi", "Yuki",
+    "Aisha", "Omar", "Priya", "Raj", "Fatima", "Ahmed", "Olga", "Ivan", "Chloe", "Liam",
+)
+LAST_NAMES: tuple[str, ...] = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+    "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell", "Mitchell", "Carter", "Roberts",
+)
+JOB_TITLES: tuple[str, ...] = (
+    "Account Manager", "Engineer", "Sales Director", "Office Manager", "Accountant", "Designer",
+    "Analyst", "Consultant", "Recruiter", "Project Manager",
+)
+STREET_NAMES: tuple[str, ...] = (
+    "Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Park",
+    "Walnut", "Sunset", "Lincoln", "Jackson", "Church", "Highland", "Meadow", "River", "Spring", "Ridge",
+)
+STREET_SUFFIXES: tuple[str, ...] = ("St", "Ave", "Rd", "Blvd", "Ln", "Dr", "Ct", "Way", "Pl", "Ter")
+UNIT_TYPES: tuple[str, ...] = ("Apt", "Suite", "Unit")
+EMAIL_DOMAINS: tuple[str, ...] = ("example.com", "example.org", "example.net")
+AREA_CODES: tuple[str, ...] = (
+    "201", "202", "206", "212", "213", "214", "215", "303", "305", "312", "404", "415", "503",
+    "512", "602", "617", "702", "713", "718", "773", "808", "818", "901", "919", "971",
+)
+"""Area codes in service, so every generated number passes `phonenumbers` validation."""
+
+DEFAULT_DISTRIBUTION: dict[int, float] = {0: 0.1, 1: 0.7, 2: 0.2}
+"""Default weights of the number of rows per channel for each contact."""
+
+
+def parse_distribution(value: str) -> dict[int, float]:
+    """Parse a channel-count distribution such as `"0:0.1,1:0.7,2:0.2"`.
+
+    Raises:
+        ValueError: the value is malformed or has no positive weight
+    """
+    distribution: dict[int, float] = {}
+    for part in value.split(","):
+        count, _, weight = part.partition(":")
+        distribution[int(count)] = float(weight or 1)
+    if any(count < 0 or weight < 0 for count, weight in distribution.items()) or not sum(distribution.values()):
+        raise ValueError(f"invalid distribution: {value!r}")
+    return distribution
+
+
+class ContactFactory:
+    """Builds unsaved contacts and channels from a seeded random generator.
+
+    Attributes:
+        seed (int): the random seed, also part of every email address
+        rng (random.Random): the generator; equal seeds give equal data
+        emails (dict[int, float]): weights of the number of emails per contact
+        phone_numbers (dict[int, float]): weights of the number of phone numbers per contact
+        addresses (dict[int, float]): weights of the number of addresses per contact
+    """
+
+    def __init__(self, seed: int = 0, emails: dict | None = None, phone_numbers: dict | None = None, addresses: dict | None = None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.emails = emails or DEFAULT_DISTRIBUTION
+        self.phone_numbers = phone_numbers or DEFAULT_DISTRIBUTION
+        self.addresses = addresses or DEFAULT_DISTRIBUTION
+        states = {code for code, _ in STATE_CHOICES}
+        self.places: list[tuple[str, str, str]] = [
+            (row["zipcode"], row["state"], row["city"].title())
+            for row in gazetteer.rows() if row["state"] in states
+        ]
+
+    def _count(self, distribution: dict[int, float]) -> int:
+        return self.rng.choices(list(distribution), weights=list(distribution.values()))[0]
+
+    def contact(self) -> Contact:
+        first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+        return Contact(
+            first_name=first,
+            last_name=last,
+            sort_name=make_sort_name(first, last),
+            job_title=self.rng.choice(JOB_TITLES) if self.rng.random() < 0.6 else None,
+        )
+
+    def email(self, contact: Contact, serial: int) -> ContactEmail:
+        """An email address made unique by the seed and `serial`, already normalized.
+        """
+        local = f"{contact.first_name}.{contact.last_name}.{self.seed}.{serial}".lower()
+        return ContactEmail(contact=contact, email_address=f"{local}@{self.rng.choice(EMAIL_DOMAINS)}")
+
+    def phone_number(self, contact: Contact) -> ContactPhoneNumber:
+        # exchanges start at 200 and skip N11 and 555 to stay realistic
+        exchange = self.rng.randint(200, 999)
+        while exchange % 100 == 11 or exchange == 555:
+            exchange = self.rng.randint(200, 999)
+        number = f"+1{self.rng.choice(AREA_CODES)}{exchange}{self.rng.randint(0, 9999):04d}"
+        return ContactPhoneNumber(contact=contact, phone_number=number)
+
+    def address(self, contact: Contact) -> ContactAddress:
+        zipcode, state, city = self.rng.choice(self.places)
+        has_unit = self.rng.random() < 0.25
+        return ContactAddress(
+            contact=contact,
+            street=f"{self.rng.randint(1, 9999)} {self.rng.choice(STREET_NAMES)} {self.rng.choice(STREET_SUFFIXES)}",
+            unit_type=self.rng.choice(UNIT_TYPES) if has_unit else "unit",
+            unit_number=str(self.rng.randint(1, 400)) if has_unit else None,
+            city=city,
+            state=state,
+            zipcode=zipcode,
+        )
+
+    def channels(self, contact: Contact, serial: int) -> dict[type, list]:
+        """Unsaved channels for `contact`, drawn from the configured distributions.
+        """
+        # a stride of at least the most emails a contact can get keeps the serials distinct
+        stride = max(10, *self.emails)
+        return {
+            ContactEmail: [self.email(contact, serial * stride + n) for n in range(self._count(self.emails))],
+            ContactPhoneNumber: [self.phone_number(contact) for _ in range(self._count(self.phone_numbers))],
+            ContactAddress: [self.address(contact) for _ in range(self._count(self.addresses))],
+        }
+
+
+@instrument()
+def seed_contacts(
+    count: int,
+    seed: int = 0,
+    batch_size: int = 5000,
+    emails: dict | None = None,
+    phone_numbers: dict | None = None,
+    addresses: dict | None = None,
+    using: str | None = None,
+    use_copy: bool | None = None,
+    progress=None,
+) -> dict[type, int]:
+    """Create `count` synthetic contacts with channels.
+
+    Each batch is written in its own transaction. Email addresses embed the
+    seed, so seeding twice into one database needs two different seeds.
+
+    Args:
+        count (int): the number of contacts
+        seed (int, optional): the random seed. Defaults to 0.
+        batch_size (int, optional): contacts per batch. Defaults to 5000.
+        emails (dict[int, float], optional): weights of the number of emails per contact
+        phone_numbers (dict[int, float], optional): weights of the number of phone numbers per contact
+        addresses (dict[int, float], optional): weights of the number of addresses per contact
+        using (str, optional): the database alias. Defaults to the router's choice for `Contact`.
+        use_copy (bool, optional): force or disable `COPY`. Defaults to using it when supported.
+        progress (callable, optional): called with the number of contacts written after each batch
+
+    Returns:
+        dict[type, int]: rows created per model
+    """
+    using = using or router.db_for_write(Contact)
+    if use_copy is None:
+        use_copy = pgcopy.supports_copy(connections[using])
+    factory = ContactFactory(seed, emails=emails, phone_numbers=phone_numbers, addresses=addresses)
+    totals: dict[type, int] = {Contact: 0, ContactEmail: 0, ContactPhoneNumber: 0, ContactAddress: 0}
+    for start in range(0, count, batch_size):
+        contacts = [factory.contact() for _ in range(min(batch_size, count - start))]
+        channels: dict[type, list] = {ContactEmail: [], ContactPhoneNumber: [], ContactAddress: []}
+        for serial, contact in enumerate(contacts, start=start):
+            for model, instances in factory.channels(contact, serial).items():
+                for instance in instances:
+                    instance.refresh_derived_fields()
+                channels[model].extend(instances)
+        with transaction.atomic(using=using):
+            written = insert_contacts(contacts, channels, using=using, use_copy=use_copy)
+        for model, created in written.items():
+            totals[model] += created
+        if progress:
+            progress(totals[Contact])
+    return totals
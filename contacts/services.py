@@ -0,0 +1,352 @@
+"""contacts.services
+
+Write paths that span more than one of the contacts app's models.
+"""
+
+import logging
+from collections import Counter
+
+from django.apps import apps
+from django.db import connections, models, router, transaction
+
+from . import pgcopy
+from .instrumentation import instrument, span
+from .models import (
+    ARCHIVE_TABLES, Contact, ContactAddress, ContactEmail, ContactPhoneNumber, ContactRelationship, ContactSummary,
+    ReportingLine,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def tracking_user(user):
+    """Returns `user` when it can be stored in the tracking fields, else `None`.
+    """
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user
+
+
+def _cached_queryset(queryset, instances: list):
+    """Marks `queryset` as evaluated with `instances` as its results.
+    """
+    queryset._result_cache = instances
+    queryset._prefetch_done = True
+    return queryset
+
+
+@instrument()
+def create_contact(
+    contact: Contact,
+    emails: list[ContactEmail] = (),
+    phone_numbers: list[ContactPhoneNumber] = (),
+    addresses: list[ContactAddress] = (),
+    user=None,
+) -> Contact:
+    """Persist an unsaved contact and its channels in a single transaction.
+
+    The contact is inserted first, then each channel table receives one
+    `bulk_create`, so the whole write is at most four `INSERT` statements.
+    The tracking fields are filled in from `user` and the created channels are
+    attached to the returned contact as its prefetched relations.
+
+    Args:
+        contact (Contact): the unsaved contact
+        emails (list[ContactEmail], optional): unsaved emails for the contact
+        phone_numbers (list[ContactPhoneNumber], optional): unsaved phone numbers for the contact
+        addresses (list[ContactAddress], optional): unsaved addresses for the contact
+        user (optional): the user recorded in `created_by` and `updated_by`
+
+    Returns:
+        Contact: the saved contact with its channels prefetched
+    """
+    user = tracking_user(user)
+    channels: dict[str, tuple[type, list]] = {
+        "contact_email_addresses": (ContactEmail, list(emails)),
+        "contact_phone_numbers": (ContactPhoneNumber, list(phone_numbers)),
+        "contact_addresses": (ContactAddress, list(addresses)),
+    }
+    using = router.db_for_write(Contact, instance=contact)
+    with transaction.atomic(using=using):
+        contact.created_by = contact.updated_by = user
+        contact.save(using=using)
+        for model, instances in channels.values():
+            for instance in instances:
+                instance.contact = contact
+                instance.tenant = contact.tenant
+                instance.created_by = instance.updated_by = user
+                instance.refresh_derived_fields()
+            if instances:
+                model.objects.using(using).bulk_create(instances)
+    # the rows were just written, so fill the prefetch cache instead of re-reading them
+    contact._prefetched_objects_cache = {
+        related_name: _cached_queryset(getattr(contact, related_name).all(), instances)
+        for related_name, (model, instances) in channels.items()
+    }
+    return contact
+
+
+def _field_names(model) -> list[str]:
+    return [field.name for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def _attach(instances: list, user) -> None:
+    for instance in instances:
+        instance.contact = instance.contact  # takes the id the contact did not have yet
+        instance.tenant = instance.contact.tenant
+        instance.created_by = instance.updated_by = user
+
+
+def _merge_channels(connection, contacts: list[Contact], channels: dict[type, list], user) -> tuple[list[Contact], dict[type, int]]:
+    """Merge the channels of contacts whose ids are reserved, see `pgcopy.merge_instances`.
+
+    A channel row that conflicts with an existing one is skipped and left
+    without a primary key. Its contact is then not written and loses its
+    reserved id, and the contact's other channel rows are deleted again.
+    PostgreSQL checks the foreign keys at commit, so the channels can be
+    written before their contacts.
+
+    Returns:
+        tuple[list[Contact], dict[type, int]]: the contacts to write, and the channel rows created per model
+    """
+    merged: dict[type, list] = {}
+    skipped: set[int] = set()
+    for model, instances in channels.items():
+        _attach(instances, user)
+        for instance, pk in zip(instances, pgcopy.reserve_ids(connection, model, len(instances))):
+            instance.pk = pk
+        inserted = pgcopy.merge_instances(connection, model, instances, ["id", *_field_names(model)])
+        merged[model] = [instance for instance in instances if instance.pk in inserted]
+        for instance in instances:
+            if instance.pk not in inserted:
+                instance.pk = None
+                skipped.add(instance.contact_id)
+    counts: dict[type, int] = {}
+    for model, instances in merged.items():
+        orphans = [instance.pk for instance in instances if instance.contact_id in skipped]
+        if orphans:
+            model._base_manager.using(connection.alias).filter(pk__in=orphans)._raw_delete(connection.alias)
+        counts[model] = len(instances) - len(orphans)
+    written = []
+    for contact in contacts:
+        if contact.pk in skipped:
+            contact.pk = None
+        else:
+            written.append(contact)
+    return written, counts
+
+
+def insert_contacts(
+    contacts: list[Contact], channels: dict[type, list], using: str | None = None, use_copy: bool = False,
+    merge: bool = False, user=None,
+) -> dict[type, int]:
+    """Insert a batch of unsaved contacts and their channels, and refresh the contacts' summaries.
+
+    The bulk write path of `contacts.imports` and `contacts.seeding`. Each table
+    gets one `COPY` with `use_copy` (PostgreSQL only), else one `bulk_create`.
+    Call it inside a transaction. Derived fields are left to the caller.
+
+    Args:
+        contacts (list[Contact]): the unsaved contacts
+        channels (dict[type, list]): unsaved instances per channel model, whose
+            `contact` is one of `contacts`; they get its id and tenant here
+        using (str, optional): the database alias. Defaults to the router's choice for `Contact`.
+        use_copy (bool, optional): write with `COPY`. Defaults to False.
+        merge (bool, optional): with `use_copy`, skip the channel rows that conflict
+            with existing ones together with their contacts, see `_merge_channels`.
+            Defaults to False.
+        user (optional): the user recorded in `created_by` and `updated_by`
+
+    Returns:
+        dict[type, int]: rows created per model
+    """
+    using = using or router.db_for_write(Contact)
+    connection = connections[using]
+    user = tracking_user(user)
+
+    for contact in contacts:
+        contact.created_by = contact.updated_by = user
+    merged: dict[type, int] = {}
+    if use_copy:
+        for contact, pk in zip(contacts, pgcopy.reserve_ids(connection, Contact, len(contacts))):
+            contact.pk = pk
+        if merge:
+            contacts, merged = _merge_channels(connection, contacts, channels, user)
+        pgcopy.copy_instances(connection, Contact, contacts, ["id", *_field_names(Contact)])
+        counts: dict[type, int] = {Contact: len(contacts)}
+    elif connection.features.can_return_rows_from_bulk_insert:
+        counts = {Contact: len(Contact.objects.using(using).bulk_create(contacts))}
+    else:
+        for contact in contacts:  # one INSERT each, which reports the new id, unlike a bulk insert here
+            contact.save(using=using, force_insert=True)
+        counts = {Contact: len(contacts)}
+    for model, instances in channels.items():
+        if model in merged:
+            counts[model] = merged[model]
+            continue
+        _attach(instances, user)
+        if use_copy:
+            pgcopy.copy_instances(connection, model, instances, _field_names(model))
+            counts[model] = len(instances)
+        else:
+            counts[model] = len(model.objects.using(using).bulk_create(instances))
+    ContactSummary.objects.db_manager(using).refresh(contact.pk for contact in contacts)
+    return counts
+
+
+def _reverse_relations(model) -> list:
+    """Foreign keys pointing at `model`, including those of auto-created many-to-many tables.
+    """
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete and (field.one_to_one or field.one_to_many)
+    ]
+
+
+def _dependents(model) -> list:
+    """The relations to `model` that `purge_contacts` resolves with set-based SQL.
+
+    Raises:
+        ValueError: a relation protects its rows, or a cascaded model has dependents of its own
+    """
+    relations = _reverse_relations(model)
+    for relation in relations:
+        name = f"{relation.related_model.__name__}.{relation.field.name}"
+        if relation.on_delete not in (models.CASCADE, models.SET_NULL, models.DO_NOTHING):
+            raise ValueError(f"{name} uses {relation.on_delete.__name__}; purge with send_signals=True")
+        if relation.on_delete is models.CASCADE and _reverse_relations(relation.related_model):
+            raise ValueError(f"{relation.related_model.__name__} has dependents; purge with send_signals=True")
+    return relations
+
+
+def _log_purge(user, counts: Counter, using: str) -> None:
+    """One admin log entry for the whole purge, in place of a history row per object.
+    """
+    if user is None or not apps.is_installed("django.contrib.admin"):
+        return
+    from django.contrib.admin.models import DELETION, LogEntry
+    from django.contrib.contenttypes.models import ContentType
+
+    LogEntry.objects.using(using).create(
+        user=user,
+        content_type=ContentType.objects.db_manager(using).get_for_model(Contact),
+        object_repr=f"{counts[Contact]} contacts (purged)"[:200],
+        action_flag=DELETION,
+        change_message=", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in counts.items()),
+    )
+
+
+@instrument()
+def purge_contacts(
+    queryset, chunk_size: int = 1000, send_signals: bool = False, user=None, progress=None,
+) -> dict[type, int]:
+    """Delete the contacts in `queryset` and their dependent rows in chunks.
+
+    `QuerySet.delete()` loads every related row into memory to send its delete
+    signals. Without `send_signals`, each chunk of contact ids is deleted with
+    one `DELETE ... WHERE contact_id IN (...)` per related table (or an
+    `UPDATE` for `SET_NULL` relations) and one for the contacts, so memory
+    stays bounded by `chunk_size` and nothing is read but the ids. Receivers,
+    including per-object history, do not run; a single admin log entry for
+    `user` records the purge instead, the purged contacts get
+    `ContactTombstone`s for sync clients and the reporting lines of their
+    reports are rebuilt. With `send_signals`, each chunk goes
+    through `QuerySet.delete()`.
+
+    Each chunk is committed in its own transaction, so an interrupted purge
+    can be re-run. Derived tables such as `AddressRollup` notice the removed
+    rows on their next refresh.
+
+    Args:
+        queryset (QuerySet[Contact]): the contacts to delete
+        chunk_size (int, optional): contacts per transaction. Defaults to 1000.
+        send_signals (bool, optional): delete through the collector. Defaults to False.
+        user (optional): the user recorded in the admin log entry
+        progress (callable, optional): called with the number of contacts deleted after each chunk
+
+    Returns:
+        dict[type, int]: rows deleted per model
+
+    Raises:
+        ValueError: a relation needs the collector and `send_signals` is false
+    """
+    using = queryset._db or router.db_for_write(queryset.model, **queryset._hints)
+    relations = [] if send_signals else _dependents(Contact)
+    counts: Counter = Counter()
+    queryset = queryset.using(using).order_by("pk").values_list("pk", flat=True)
+    last_pk = None
+    while ids := list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:chunk_size]):
+        last_pk = ids[-1]
+        with span("contacts.services.purge_contacts.chunk"), transaction.atomic(using=using):
+            if send_signals:
+                deleted = Contact.objects.using(using).filter(pk__in=ids).delete()[1]
+                counts.update({apps.get_model(label): count for label, count in deleted.items()})
+            else:
+                ContactSummary.objects.db_manager(using).bury(ids)
+                reports = list(
+                    ContactRelationship._base_manager.using(using)
+                    .filter(kind=ContactRelationship.Kind.REPORTS_TO, manager__in=ids).exclude(contact__in=ids)
+                    .values_list("contact_id", flat=True)
+                )
+                for relation in relations:
+                    related = relation.related_model._base_manager.using(using).filter(**{f"{relation.field.name}__in": ids})
+                    if relation.on_delete is models.CASCADE:
+                        # the collector's own fast path: no rows are fetched
+                        counts[relation.related_model] += related._raw_delete(using)
+                    elif relation.on_delete is models.SET_NULL:
+                        related.update(**{relation.field.name: None})
+                counts[Contact] += Contact._base_manager.using(using).filter(pk__in=ids)._raw_delete(using)
+                ReportingLine.objects.db_manager(using).rebuild(reports)
+        if progress:
+            progress(counts[Contact])
+        logger.info("purged %d contacts through pk %s", counts[Contact], last_pk)
+    _log_purge(user, counts, using)
+    return dict(counts)
+
+
+def _copy_rows(queryset, target, using: str) -> int:
+    """`INSERT INTO target SELECT ...` the rows of `queryset`, column for column.
+    """
+    fields = target._meta.concrete_fields
+    connection = connections[using]
+    sql, params = queryset.order_by().values_list(*(field.attname for field in fields)).query.sql_with_params()
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {connection.ops.quote_name(target._meta.db_table)} ({columns}) {sql}", params)
+        return cursor.rowcount
+
+
+@instrument()
+def move_archived_contacts(
+    archived_before, batch_size: int = 1000, using: str | None = None, progress=None,
+) -> dict[type, int]:
+    """Move contacts archived before `archived_before` into the `ArchivedContact*` tables.
+
+    Each batch of contacts is copied with its channels by `INSERT ... SELECT`,
+    keeping primary keys, and then removed from the live tables with
+    `purge_contacts`, in one transaction per batch.
+
+    Args:
+        archived_before (datetime): move contacts whose `archived_on` is earlier
+        batch_size (int, optional): contacts per transaction. Defaults to 1000.
+        using (str, optional): the database alias. Defaults to the router's choice for `Contact`.
+        progress (callable, optional): called with the number of contacts moved after each batch
+
+    Returns:
+        dict[type, int]: rows moved per live model
+    """
+    using = using or router.db_for_write(Contact)
+    counts: Counter = Counter()
+    archived = Contact.all_objects.using(using).filter(archived_on__lt=archived_before).order_by("pk").values_list("pk", flat=True)
+    # moved rows leave the live table, so the next batch starts at the front again
+    while ids := list(archived[:batch_size]):
+        with transaction.atomic(using=using):
+            for model, target in ARCHIVE_TABLES.items():
+                rows = model._base_manager.using(using).filter(**{"pk__in" if model is Contact else "contact_id__in": ids})
+                counts[model] += _copy_rows(rows, target, using)
+            purge_contacts(Contact._base_manager.using(using).filter(pk__in=ids), chunk_size=batch_size)
+        if progress:
+            progress(counts[Contact])
+        logger.info("moved %d archived contacts to cold storage", counts[Contact])
+    return dict(counts)
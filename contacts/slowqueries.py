@@ -0,0 +1,175 @@
+"""contacts.slowqueries
+
+Opt-in sampler for slow SQL on the contacts tables.
+
+`SlowQuerySampler` is a database execute wrapper. Statements that touch a
+contacts table and take longer than `CONTACTS_SLOW_QUERY_THRESHOLD_MS` are
+recorded by fingerprint in a bounded buffer kept in the
+`CONTACTS_SLOW_QUERY_CACHE` cache, so every process shares it. The first
+occurrences of a fingerprint are `EXPLAIN`-ed with probability
+`CONTACTS_SLOW_QUERY_SAMPLE_RATE` until a plan is captured.
+
+The app installs the sampler on every new connection when a threshold is set.
+The buffer is shown by the ``slow_queries`` management command and the
+contacts admin's "Slow queries" page.
+"""
+
+import random
+import re
+import threading
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .conf import app_settings
+
+
+CACHE_KEY: str = "contacts:slow_queries"
+"""Cache key of the buffer, a list of entries ordered from least to most recently seen."""
+
+MAX_SQL_LENGTH: int = 4000
+
+# the shape of a statement, shared with the query budgets of `contacts.testing`
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_IN_LIST = re.compile(r"\bIN \((?:%s|\?)(?:, ?(?:%s|\?))*\)", re.IGNORECASE)
+_SAVEPOINT = re.compile(r'"s\d+_x\d+"')
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """Reduce a SQL statement to its shape.
+
+    Examples:
+        `'SELECT ... WHERE "id" IN (%s, %s) LIMIT 21'` -> `'SELECT ... WHERE "id" IN (...) LIMIT ?'`
+
+    Args:
+        sql (str): the statement as passed to the database cursor
+
+    Returns:
+        str: the statement with literals, parameters and savepoint names replaced
+    """
+    sql = _SAVEPOINT.sub('"sp"', sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _contacts_tables() -> tuple[str, ...]:
+    return tuple(model._meta.db_table for model in apps.get_app_config("contacts").get_models())
+
+
+def _format_plan(rows) -> str:
+    return "\n".join(str(row[0]) if len(row) == 1 else " | ".join(map(str, row)) for row in rows)
+
+
+class SlowQuerySampler:
+    """Execute wrapper recording slow contacts queries and sampling their plans.
+
+    Attributes:
+        threshold (float): latency in seconds above which a query is recorded
+        sample_rate (float): probability of running `EXPLAIN` for a fingerprint without a plan
+        analyze (bool): use `EXPLAIN ANALYZE` for `SELECT` statements where supported
+        size (int): maximum number of fingerprints kept in the buffer
+        cache_alias (str): the cache holding the buffer
+    """
+
+    def __init__(self, threshold_ms: float | None = None, sample_rate: float | None = None,
+                 analyze: bool | None = None, size: int | None = None, cache_alias: str | None = None):
+        self.threshold = (threshold_ms if threshold_ms is not None else app_settings.SLOW_QUERY_THRESHOLD_MS) / 1000
+        self.sample_rate = sample_rate if sample_rate is not None else app_settings.SLOW_QUERY_SAMPLE_RATE
+        self.analyze = analyze if analyze is not None else app_settings.SLOW_QUERY_EXPLAIN_ANALYZE
+        self.size = size or app_settings.SLOW_QUERY_BUFFER_SIZE
+        self.cache_alias = cache_alias or app_settings.SLOW_QUERY_CACHE
+        self._local = threading.local()
+        self._tables: tuple[str, ...] | None = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, "active", False):  # our own EXPLAIN and cache queries
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.threshold and not many and self.is_contacts_query(sql):
+            self._local.active = True
+            try:
+                self.record(context["connection"], sql, params, elapsed)
+            finally:
+                self._local.active = False
+        return result
+
+    def is_contacts_query(self, sql: str) -> bool:
+        if self._tables is None:
+            self._tables = _contacts_tables()
+        return any(table in sql for table in self._tables)
+
+    def explain(self, connection, sql: str, params) -> tuple[str, bool]:
+        """Run `EXPLAIN` for `sql` in a savepoint.
+
+        Returns:
+            tuple[str, bool]: the plan, and whether `ANALYZE` was used
+        """
+        analyze = self.analyze and sql.lstrip()[:6].upper() == "SELECT"
+        try:
+            prefix = connection.ops.explain_query_prefix(analyze=True) if analyze else connection.ops.explain_query_prefix()
+        except ValueError:  # the backend has no ANALYZE option
+            prefix, analyze = connection.ops.explain_query_prefix(), False
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                return _format_plan(cursor.fetchall()), analyze
+
+    def record(self, connection, sql: str, params, elapsed: float) -> None:
+        """Add a slow statement to the buffer, sampling its plan if it has none yet.
+        """
+        cache = caches[self.cache_alias]
+        key = fingerprint(sql)
+        entries: list[dict] = cache.get(CACHE_KEY) or []
+        entry = next((e for e in entries if e["fingerprint"] == key), None)
+        if entry is None:
+            entry = {"fingerprint": key, "count": 0, "max_ms": 0.0, "plan": None, "analyze": False}
+        else:
+            entries.remove(entry)
+        ms = elapsed * 1000
+        entry.update(
+            sql=sql[:MAX_SQL_LENGTH],
+            count=entry["count"] + 1,
+            last_ms=ms,
+            max_ms=max(entry["max_ms"], ms),
+            last_seen=timezone.now().isoformat(),
+            database=connection.alias,
+        )
+        if entry["plan"] is None and not connection.needs_rollback and random.random() < self.sample_rate:
+            try:
+                entry["plan"], entry["analyze"] = self.explain(connection, sql, params)
+            except DatabaseError as e:
+                entry["plan_error"] = str(e)
+        entries.append(entry)
+        cache.set(CACHE_KEY, entries[-self.size:], None)
+
+
+def get_slow_queries(cache_alias: str | None = None) -> list[dict]:
+    """The buffered slow queries, most recently seen first.
+    """
+    return list(reversed(caches[cache_alias or app_settings.SLOW_QUERY_CACHE].get(CACHE_KEY) or []))
+
+
+def clear_slow_queries(cache_alias: str | None = None) -> None:
+    """Empty the buffer.
+    """
+    caches[cache_alias or app_settings.SLOW_QUERY_CACHE].delete(CACHE_KEY)
+
+
+def install_sampler(sender, connection, **kwargs) -> None:
+    """`connection_created` receiver adding a `SlowQuerySampler` to the new connection.
+    """
+    if app_settings.SLOW_QUERY_THRESHOLD_MS is None:
+        return
+    if not any(isinstance(w, SlowQuerySampler) for w in connection.execute_wrappers):
+        # outermost, so `execute_wrapper()` blocks that pop on exit leave it in place
+        connection.execute_wrappers.insert(0, SlowQuerySampler())
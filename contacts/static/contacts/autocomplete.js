@@ -0,0 +1,57 @@
+/* Search-as-you-type for ContactAutocompleteSelect widgets.
+ *
+ * Adds a search box before each <select data-autocomplete-url> and replaces
+ * its options with the endpoint's results, keeping the current selection.
+ */
+(function () {
+  "use strict";
+
+  function enhance(select) {
+    if (select.dataset.autocompleteReady) {
+      return;
+    }
+    select.dataset.autocompleteReady = "1";
+    var input = document.createElement("input");
+    input.type = "search";
+    input.className = "contacts-autocomplete-search";
+    input.setAttribute("aria-label", "Search contacts");
+    select.parentNode.insertBefore(input, select);
+    var timer = null;
+    var controller = null;
+
+    function load(term) {
+      if (controller) {
+        controller.abort();
+      }
+      controller = new AbortController();
+      var url = select.dataset.autocompleteUrl + "?term=" + encodeURIComponent(term);
+      fetch(url, {credentials: "same-origin", signal: controller.signal})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          var keep = Array.prototype.filter.call(select.options, function (option) {
+            return option.value === "" || option.selected;
+          });
+          select.innerHTML = "";
+          keep.forEach(function (option) { select.appendChild(option); });
+          data.results.forEach(function (result) {
+            if (!keep.some(function (option) { return option.value === String(result.id); })) {
+              select.appendChild(new Option(result.text, result.id));
+            }
+          });
+        })
+        .catch(function () {});
+    }
+
+    input.addEventListener("input", function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { load(input.value.trim()); }, 250);
+    });
+  }
+
+  function init(root) {
+    root.querySelectorAll("select[data-autocomplete-url]").forEach(enhance);
+  }
+
+  document.addEventListener("DOMContentLoaded", function () { init(document); });
+  document.addEventListener("formset:added", function (event) { init(event.target); });
+})();
@@ -0,0 +1,94 @@
+"""contacts.summary
+
+Keeps `ContactSummary` rows in step with their contacts.
+
+Saves and deletes of a contact, one of its channels or one of its tags mark
+the contact as stale. Stale contacts are refreshed together, with one
+`ContactSummary.objects.refresh()` call per database, when the outermost
+transaction commits, so a contact saved with several channels is summarized
+once.
+
+Bulk write paths (`QuerySet.update()`, `bulk_create`, `COPY`) do not send
+signals; they call `ContactSummary.objects.refresh()` with the contacts they
+wrote, or leave it to the ``refresh_contact_summaries`` command.
+
+Deleted contacts leave a `ContactTombstone` for the CardDAV sync, see
+`contacts.carddav`.
+"""
+
+import threading
+
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber, ContactSummary, ContactTag, ContactTombstone
+
+
+_local = threading.local()
+
+
+def _pending(using: str) -> set[int]:
+    """Stale contact ids on `using` waiting for a commit, per thread like the connections.
+    """
+    if not hasattr(_local, "pending"):
+        _local.pending = {}
+    return _local.pending.setdefault(using, set())
+
+
+def _flush(using: str) -> None:
+    ids = _pending(using)
+    if ids:
+        _local.pending[using] = set()
+        ContactSummary.objects.db_manager(using).refresh(ids)
+
+
+def schedule(contact_id: int, using: str | None = None) -> None:
+    """Refresh the summary of `contact_id` once the current transaction commits.
+
+    Args:
+        contact_id (int): the contact
+        using (str, optional): the database alias. Defaults to the router's choice for `ContactSummary`.
+    """
+    using = using or router.db_for_write(ContactSummary)
+    # every call registers a callback, since a rollback discards them; the first
+    # to run refreshes all the stale contacts and the rest find nothing to do
+    _pending(using).add(contact_id)
+    transaction.on_commit(lambda: _flush(using), using=using)
+
+
+def _contact_changed(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        schedule(instance.pk, using)
+
+
+def _contact_deleted(sender, instance, using, **kwargs):
+    ContactTombstone.objects.using(using).create(tenant=instance.tenant, contact_id=instance.pk, deleted_on=timezone.now())
+
+
+def _channel_changed(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        schedule(instance.contact_id, using)
+
+
+def _tags_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    # `Contact.tags` changes skip the through model's signals
+    if action in ("post_add", "post_remove"):
+        contact_ids = pk_set if reverse else [instance.pk]
+    elif action == "pre_clear":
+        contact_ids = instance.contacts.values_list("pk", flat=True) if reverse else [instance.pk]
+    else:
+        return
+    for contact_id in contact_ids:
+        schedule(contact_id, using)
+
+
+def connect() -> None:
+    """Connect the receivers; called from `ContactsConfig.ready()`.
+    """
+    post_save.connect(_contact_changed, sender=Contact, dispatch_uid="contacts_summary_contact")
+    post_delete.connect(_contact_deleted, sender=Contact, dispatch_uid="contacts_summary_contact_deleted")
+    for model in (ContactEmail, ContactPhoneNumber, ContactAddress, ContactTag):
+        for signal in (post_save, post_delete):
+            signal.connect(_channel_changed, sender=model, dispatch_uid=f"contacts_summary_{model._meta.model_name}")
+    m2m_changed.connect(_tags_changed, sender=ContactTag, dispatch_uid="contacts_summary_tags")
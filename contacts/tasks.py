@@ -0,0 +1,428 @@
+"""contacts.tasks
+
+Background jobs for the heavy contacts operations.
+
+A job is a function registered with `@register` that processes its rows in
+chunks and reports each one with `checkpoint()`. The `ContactJob` row keeps
+the progress for the admin and the position to resume from, so a job that
+fails, is cancelled or dies with its worker continues where it stopped when
+`resume()` queues it again, instead of starting over::
+
+    job = enqueue("refresh_contact_summaries", user=request.user)
+
+`enqueue()` hands the job to the backend named by `CONTACTS_TASK_BACKEND`
+once the current transaction commits. By default that is `DjangoTasksBackend`
+where `django.tasks` exists (Django 6), else `CeleryBackend` where Celery is
+installed, else `ThreadPoolBackend`, which runs jobs in the web process.
+Jobs run in the tenant that enqueued them.
+"""
+
+import logging
+import shutil
+import tempfile
+import threading
+import traceback
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from .conf import app_settings
+from .exports import export_contacts
+from .imports import import_contacts
+from .models import AddressRollup, Contact, ContactAddress, ContactJob, ContactSummary, SegmentBitmap
+from .routers import use_primary
+from .services import move_archived_contacts, purge_contacts
+from .tenants import use_tenant
+
+try:
+    from django.tasks import task as django_task
+except ImportError:
+    django_task = None
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+
+logger = logging.getLogger(__name__)
+
+JOBS: dict[str, Callable] = {}
+"""The registered job functions by name."""
+
+
+class JobCancelled(Exception):
+    """Raised by `checkpoint()` when the job was cancelled while it ran."""
+
+
+def register(name: str):
+    """Register the decorated function as the job `name`.
+
+    The function is called with the running `ContactJob` and the keyword
+    arguments given to `enqueue()`, which must be JSON serializable.
+    """
+    def decorator(func):
+        JOBS[name] = func
+        return func
+    return decorator
+
+
+def checkpoint(job: ContactJob, done: int, total: int | None = None, **state) -> None:
+    """Record the job's progress, the state it resumes from and its heartbeat, with one `UPDATE`.
+
+    Args:
+        job (ContactJob): the running job
+        done (int): items processed so far, including those of earlier runs
+        total (int, optional): items to process. Defaults to leaving it unchanged.
+        **state: merged into `job.checkpoint`
+
+    Raises:
+        JobCancelled: the job was cancelled; the function should stop
+    """
+    job.done = done
+    job.checkpoint = {**job.checkpoint, **state}
+    fields = {"done": done, "checkpoint": job.checkpoint, "heartbeat_on": timezone.now()}
+    if total is not None:
+        job.total = fields["total"] = total
+    if not ContactJob.objects.filter(pk=job.pk).exclude(status=ContactJob.Status.CANCELLED).update(**fields):
+        raise JobCancelled(str(job))
+
+
+def _batches(job: ContactJob, queryset, batch_size: int):
+    """Yield the pks of `queryset` in batches, from the job's `last_pk` on,
+    checkpointing each batch once the caller has processed it.
+    """
+    last_pk = job.checkpoint.get("last_pk", 0)
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    while ids := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+        yield ids
+        last_pk = ids[-1]
+        checkpoint(job, job.done + len(ids), last_pk=last_pk)
+
+
+# Jobs
+
+
+@register("refresh_contact_summaries")
+def refresh_contact_summaries(job: ContactJob, pks: list | None = None, batch_size: int = 1000) -> None:
+    """Refresh the summaries of the tenant's contacts, or of `pks`.
+    """
+    contacts = Contact.objects.all() if pks is None else Contact.objects.filter(pk__in=pks)
+    if job.total is None:
+        checkpoint(job, job.done, total=contacts.count())
+    for ids in _batches(job, contacts, batch_size):
+        ContactSummary.objects.refresh(ids)
+
+
+@register("normalize_addresses")
+def normalize_addresses(
+    job: ContactJob, pks: list | None = None, all_addresses: bool = False, batch_size: int = 1000,
+) -> None:
+    """Recompute the normalized fields and centroids of `pks`, or of the
+    tenant's addresses never normalized (of every address with `all_addresses`).
+    """
+    addresses = ContactAddress.objects.all() if pks is None else ContactAddress.objects.filter(pk__in=pks)
+    if pks is None and not all_addresses:
+        addresses = addresses.filter(normalized_street="")
+    if job.total is None:
+        checkpoint(job, job.done, total=addresses.count())
+    for ids in _batches(job, addresses, batch_size):
+        ContactAddress.objects.filter(pk__in=ids).refresh_derived_fields(batch_size=batch_size)
+
+
+@register("purge_contacts")
+def purge(job: ContactJob, pks: list | None = None, updated_before: str | None = None, chunk_size: int = 1000) -> None:
+    """`purge_contacts` the contacts `pks`, or those last updated before the ISO datetime `updated_before`.
+
+    Purged contacts are gone, so a resumed purge simply selects what is left.
+    """
+    if pks is None and updated_before is None:
+        raise ValueError("purge_contacts needs pks or updated_before")
+    contacts = Contact.objects.all()
+    if pks is not None:
+        contacts = contacts.filter(pk__in=pks)
+    if updated_before is not None:
+        contacts = contacts.filter(updated_on__lt=parse_datetime(updated_before))
+    if job.total is None:
+        checkpoint(job, job.done, total=contacts.count())
+    previous = job.done
+    purge_contacts(contacts, chunk_size=chunk_size, user=job.created_by, progress=lambda n: checkpoint(job, previous + n))
+
+
+@register("move_archived_contacts")
+def move_archived(job: ContactJob, days: int | None = None, batch_size: int = 1000) -> None:
+    """`move_archived_contacts` archived more than `days` ago (default: `CONTACTS_ARCHIVE_RETENTION_DAYS`).
+
+    The cutoff is fixed by the first run, so a resumed job moves the same contacts.
+    """
+    if "archived_before" not in job.checkpoint:
+        days = app_settings.ARCHIVE_RETENTION_DAYS if days is None else days
+        before = timezone.now() - timedelta(days=days)
+        total = Contact.all_objects.filter(archived_on__lt=before).count()
+        checkpoint(job, job.done, total=total, archived_before=before.isoformat())
+    before = parse_datetime(job.checkpoint["archived_before"])
+    previous = job.done
+    move_archived_contacts(
+        before, batch_size=batch_size, using=router.db_for_write(Contact), progress=lambda n: checkpoint(job, previous + n),
+    )
+
+
+@register("refresh_address_rollup")
+def refresh_address_rollup(job: ContactJob, full: bool = False) -> None:
+    """`AddressRollup.objects.refresh()`, in one step.
+    """
+    count: int = AddressRollup.objects.refresh(full=full)
+    checkpoint(job, count, total=count)
+
+
+@register("refresh_segments")
+def refresh_segments(job: ContactJob, full: bool = False) -> None:
+    """`SegmentBitmap.objects.refresh()`, in one step.
+    """
+    count: int = SegmentBitmap.objects.refresh(full=full)
+    checkpoint(job, count, total=count)
+
+
+@contextmanager
+def _local_path(name: str):
+    """A local path to the default storage's file `name`, copied to a temporary file when the storage has none.
+    """
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=".jsonl") as local, default_storage.open(name, "rb") as source:
+        shutil.copyfileobj(source, local)
+        local.flush()
+        yield local.name
+
+
+IMPORT_JOB_ERRORS = 100
+"""The rejected lines whose messages an `import_contacts` job keeps."""
+
+
+@register("import_contacts")
+def import_file(job: ContactJob, file_name: str, workers: int = 1, batch_size: int = 5000) -> None:
+    """`import_contacts` the JSON Lines file `file_name` of the default storage.
+
+    Each batch checkpoints the last line written, so a resumed import skips the
+    lines already imported. The checkpoint counts the rejected lines and keeps
+    the messages of the first `IMPORT_JOB_ERRORS`, by line number.
+    """
+    previous = job.done
+    start_line = job.checkpoint.get("lines", 0) + 1
+    rejected = job.checkpoint.get("rejected", 0)
+    errors = job.checkpoint.get("errors", {})
+
+    def progress(report) -> None:
+        for line, messages in report.errors.items():
+            if len(errors) < IMPORT_JOB_ERRORS:
+                errors.setdefault(str(line), messages)
+        checkpoint(
+            job, previous + report.created[Contact], lines=report.lines,
+            rejected=rejected + len(report.errors), errors=errors,
+        )
+
+    with _local_path(file_name) as path:
+        import_contacts(
+            path, workers=workers, batch_size=batch_size, using=router.db_for_write(Contact), user=job.created_by,
+            progress=progress, start_line=start_line,
+        )
+
+
+@register("export_contacts")
+def export_file(job: ContactJob, file_name: str, pks: list | None = None, batch_size: int = 5000) -> None:
+    """`export_contacts` the tenant's contacts, or `pks`, to the file `file_name` of the default storage.
+
+    The file is saved in one step, so a resumed export starts over. The
+    checkpoint holds the name the storage saved it under.
+    """
+    contacts = Contact.objects.all() if pks is None else Contact.objects.filter(pk__in=pks)
+    checkpoint(job, 0, total=contacts.count())
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as local:
+        count = export_contacts(local, contacts, batch_size=batch_size)
+        local.seek(0)
+        saved = default_storage.save(file_name, File(local))
+    checkpoint(job, count, file=saved)
+
+
+# Running
+
+
+def run_job(job_id: int, tenant: str) -> None:
+    """Run a queued job to completion, failure or cancellation; what every backend calls.
+
+    A job that is not queued, because it finished, was cancelled or another
+    worker claimed it, is left alone. Failures are recorded on the job rather
+    than raised.
+    """
+    with use_tenant(tenant), use_primary():
+        now = timezone.now()
+        claimed = ContactJob.objects.filter(pk=job_id, status=ContactJob.Status.QUEUED).update(
+            status=ContactJob.Status.RUNNING, started_on=now, heartbeat_on=now, finished_on=None, error="",
+        )
+        if not claimed:
+            return
+        job = ContactJob.objects.get(pk=job_id)
+        try:
+            JOBS[job.name](job, **job.arguments)
+        except JobCancelled:
+            logger.info("contacts job %s cancelled at %d", job, job.done)
+            ContactJob.objects.filter(pk=job_id).update(finished_on=timezone.now())
+            return
+        except Exception:
+            logger.exception("contacts job %s failed", job)
+            ContactJob.objects.filter(pk=job_id).update(
+                status=ContactJob.Status.FAILED, error=traceback.format_exc(), finished_on=timezone.now(),
+            )
+            return
+        ContactJob.objects.filter(pk=job_id).exclude(status=ContactJob.Status.CANCELLED).update(
+            status=ContactJob.Status.DONE, finished_on=timezone.now(),
+        )
+
+
+def run_job_task(job_id: int, tenant: str) -> None:
+    """The `django.tasks` task of `DjangoTasksBackend`."""
+    run_job(job_id, tenant)
+
+
+if django_task is not None:
+    run_job_task = django_task(run_job_task)
+
+run_job_celery = shared_task(name="contacts.run_job", ignore_result=True)(run_job) if shared_task else None
+"""The Celery task of `CeleryBackend`, found by the worker's `autodiscover_tasks()`."""
+
+
+# Backends
+
+
+class ImmediateBackend:
+    """Run jobs in the enqueuing thread; for tests and management shells."""
+
+    def enqueue(self, job_id: int, tenant: str) -> None:
+        run_job(job_id, tenant)
+
+
+class ThreadPoolBackend:
+    """Run jobs on a pool of `CONTACTS_TASK_WORKERS` threads in the current process.
+
+    Jobs still queued or running when the process exits are lost until
+    `resume()`d; use a real queue where that matters.
+    """
+
+    _executor: ThreadPoolExecutor | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(app_settings.TASK_WORKERS, thread_name_prefix="contacts-job")
+            return cls._executor
+
+    @staticmethod
+    def _run(job_id: int, tenant: str) -> None:
+        try:
+            run_job(job_id, tenant)
+        finally:
+            connections.close_all()  # the pool thread's own connections
+
+    def enqueue(self, job_id: int, tenant: str) -> None:
+        self.executor().submit(self._run, job_id, tenant)
+
+
+class DjangoTasksBackend:
+    """Enqueue jobs on the project's default `django.tasks` backend (Django 6)."""
+
+    def enqueue(self, job_id: int, tenant: str) -> None:
+        run_job_task.enqueue(job_id, tenant)
+
+
+class CeleryBackend:
+    """Send jobs to the Celery workers as the ``contacts.run_job`` task."""
+
+    def enqueue(self, job_id: int, tenant: str) -> None:
+        run_job_celery.delay(job_id, tenant)
+
+
+def get_backend():
+    """An instance of the `CONTACTS_TASK_BACKEND` class, or of the best available one.
+    """
+    if app_settings.TASK_BACKEND:
+        return import_string(app_settings.TASK_BACKEND)()
+    if django_task is not None:
+        return DjangoTasksBackend()
+    if shared_task is not None:
+        return CeleryBackend()
+    return ThreadPoolBackend()
+
+
+def _submit(job: ContactJob) -> None:
+    backend = get_backend()
+    transaction.on_commit(lambda: backend.enqueue(job.pk, job.tenant), using=job._state.db)
+
+
+def enqueue(name: str, user=None, **arguments) -> ContactJob:
+    """Queue the job `name` for the current tenant.
+
+    Args:
+        name (str): a registered job
+        user (optional): the user recorded as the job's creator
+        **arguments: JSON-serializable keyword arguments of the job function
+
+    Returns:
+        ContactJob: the queued job
+
+    Raises:
+        ValueError: `name` is not registered
+    """
+    if name not in JOBS:
+        raise ValueError(f"Unknown contacts job: {name!r}")
+    job = ContactJob.objects.create(name=name, arguments=arguments, created_by=user)
+    _submit(job)
+    return job
+
+
+def resume(job: ContactJob) -> bool:
+    """Queue a failed, cancelled or interrupted job again, to continue from its checkpoint.
+
+    A running job counts as interrupted once it has not checkpointed for
+    `CONTACTS_TASK_STALE_SECONDS`; until then its worker may still be alive,
+    and queueing it again would run it twice.
+
+    Returns:
+        bool: whether the job was queued; finished, queued and live running jobs are not
+    """
+    stale = timezone.now() - timedelta(seconds=app_settings.TASK_STALE_SECONDS)
+    resumable = (
+        Q(status__in=(ContactJob.Status.FAILED, ContactJob.Status.CANCELLED))
+        | Q(status=ContactJob.Status.RUNNING, heartbeat_on__lt=stale)
+        | Q(status=ContactJob.Status.RUNNING, heartbeat_on__isnull=True)
+    )
+    if not ContactJob.objects.filter(resumable, pk=job.pk).update(status=ContactJob.Status.QUEUED):
+        return False
+    job.status = ContactJob.Status.QUEUED
+    _submit(job)
+    return True
+
+
+def cancel(job: ContactJob) -> bool:
+    """Cancel a queued or running job; a running job stops at its next checkpoint.
+
+    Returns:
+        bool: whether the job was cancelled
+    """
+    active = (ContactJob.Status.QUEUED, ContactJob.Status.RUNNING)
+    return bool(ContactJob.objects.filter(pk=job.pk, status__in=active).update(status=ContactJob.Status.CANCELLED))
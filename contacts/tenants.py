@@ -0,0 +1,42 @@
+"""contacts.tenants
+
+The current tenant of the contacts app.
+
+Every contacts row carries a `tenant` key. The default managers only return
+rows of the current tenant, new rows default to it, and `ContactsRouter` can
+place each tenant on its own database through `CONTACTS_TENANT_DATABASES`.
+Single-tenant deployments never set a tenant and use `DEFAULT_TENANT`
+throughout.
+
+Set the tenant for a block of code, typically in a project middleware that
+resolves it from the request::
+
+    with use_tenant(request.user.organization.slug):
+        response = get_response(request)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+DEFAULT_TENANT: str = ""
+"""The tenant of rows created outside `use_tenant()`."""
+
+_current: ContextVar[str] = ContextVar("contacts_tenant", default=DEFAULT_TENANT)
+
+
+def get_current_tenant() -> str:
+    """The tenant the default managers are scoped to; also the `tenant` field default.
+    """
+    return _current.get()
+
+
+@contextmanager
+def use_tenant(tenant: str):
+    """Scope the contacts managers, new rows and database routing to `tenant` inside the block.
+    """
+    token = _current.set(tenant)
+    try:
+        yield
+    finally:
+        _current.reset(token)
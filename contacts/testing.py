@@ -0,0 +1,126 @@
+"""contacts.testing
+
+Query-count regression guards for the contacts app's tests.
+
+`assert_query_budget` records every SQL statement a test runs, reduces each to
+its shape (parameters, literals and `IN` lists collapsed) and compares the
+shapes against the committed budget in `query_budgets/<vendor>.json`. A test
+fails when it runs a shape more often than budgeted, or a shape the budget has
+never seen, and the failure message is a diff of the offending SQL.
+
+Budgets are rewritten instead of checked when the `CONTACTS_UPDATE_QUERY_BUDGETS`
+environment variable is set::
+
+    CONTACTS_UPDATE_QUERY_BUDGETS=1 python manage.py test contacts
+"""
+
+import difflib
+import functools
+import json
+import os
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+
+from django.db import connection
+
+from .slowqueries import fingerprint
+
+
+BUDGET_DIR: Path = Path(__file__).parent / "query_budgets"
+"""Directory holding one budget file per database vendor."""
+
+_lock = Lock()
+
+
+@contextmanager
+def record_queries(using=connection):
+    """Collect the fingerprint of every statement run on `using`.
+
+    An execute wrapper is used rather than `connection.queries`, which is cleared
+    at the start of every request made through the test client.
+
+    Yields:
+        list[str]: the fingerprints, in execution order
+    """
+    shapes: list[str] = []
+
+    def record(execute, sql, params, many, context):
+        shapes.append(fingerprint(sql))
+        return execute(sql, params, many, context)
+
+    with using.execute_wrapper(record):
+        yield shapes
+
+
+def _budget_file(vendor: str) -> Path:
+    return BUDGET_DIR / f"{vendor}.json"
+
+
+def load_budgets(vendor: str) -> dict[str, list[str]] | None:
+    """The committed budgets for `vendor`, or `None` when there is no budget file.
+    """
+    path = _budget_file(vendor)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_budget(vendor: str, name: str, shapes: list[str]) -> None:
+    """Write the recorded `shapes` as the budget for `name`.
+    """
+    with _lock:
+        budgets = load_budgets(vendor) or {}
+        budgets[name] = shapes
+        BUDGET_DIR.mkdir(exist_ok=True)
+        _budget_file(vendor).write_text(json.dumps(dict(sorted(budgets.items())), indent=2) + "\n")
+
+
+def check_budget(name: str, shapes: list[str], budget: list[str]) -> str | None:
+    """Compare recorded query shapes with a budget.
+
+    Returns:
+        str | None: a failure message with a diff of the SQL, or `None` within budget
+    """
+    over = Counter(shapes) - Counter(budget)
+    if not over:
+        return None
+    diff = "\n".join(difflib.unified_diff(budget, shapes, "budget", "recorded", lineterm=""))
+    offending = "\n".join(f"  +{count} x {sql}" for sql, count in over.items())
+    return (
+        f"{name}: {len(shapes)} queries against a budget of {len(budget)}.\n"
+        f"Over budget:\n{offending}\n{diff}"
+    )
+
+
+def assert_query_budget(name: str | None = None, using=connection):
+    """Decorate a test method to check its queries against the committed budget.
+
+    Args:
+        name (str, optional): the budget key. Defaults to `"<TestCase>.<method>"`.
+        using (optional): the database connection to record. Defaults to `default`.
+    """
+
+    def decorator(test_method):
+        @functools.wraps(test_method)
+        def wrapper(self, *args, **kwargs):
+            key = name or f"{type(self).__name__}.{test_method.__name__}"
+            with record_queries(using) as shapes:
+                result = test_method(self, *args, **kwargs)
+            if os.environ.get("CONTACTS_UPDATE_QUERY_BUDGETS"):
+                save_budget(using.vendor, key, shapes)
+                return result
+            budgets = load_budgets(using.vendor)
+            if budgets is None:
+                self.skipTest(f"no query budgets for {using.vendor}")
+            if key not in budgets:
+                self.fail(f"{key}: no query budget; rerun with CONTACTS_UPDATE_QUERY_BUDGETS=1 to record one")
+            message = check_budget(key, shapes, budgets[key])
+            if message:
+                self.fail(message)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -3,9 +3,120 @@
 Automated test modules for the contacts app.
 """
 
-from django.test import TestCase
+import contextvars
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.admin import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
 from django.db.utils import IntegrityError
-from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+from django.urls import include, path, reverse
+from django.utils import timezone
+from .batch import check_unique_emails, validate_contacts
+from .forms import ContactEmailModelForm, ContactFormWithAEP
+from .exports import export_contacts, export_sql
+from .imports import import_contacts, partition_file
+from . import addresses, instrumentation, pgcopy, phone, routers, slowqueries, tasks, vcard
+from .bitmaps import IntBitmap
+from .segments import SegmentError, evaluate, parse
+from .tenants import use_tenant
+from . import admin as contacts_admin
+from .seeding import ContactFactory, parse_distribution
+from .services import create_contact, insert_contacts, purge_contacts
+from .testing import assert_query_budget, fingerprint
+from .models import (
+    AddressRollup, ArchivedContact, ArchivedContactEmail, ConsentEvent, ConsentStatus, Contact, ContactAddress,
+    ContactEmail, ContactJob, ContactPhoneNumber, ContactRelationship, ContactSummary, ContactTombstone, Organization,
+    ReportingLine, Segment, SegmentBitmap, Tag,
+)
+from .views import ContactAutocomplete
+
+
+admin_site = AdminSite(name="contacts_test_admin")
+admin_site.register(Contact, contacts_admin.ContactAdmin)
+admin_site.register(ContactAddress, contacts_admin.ContactAddressAdmin)
+admin_site.register(ContactEmail, contacts_admin.ContactEmailAdmin)
+admin_site.register(ContactPhoneNumber, contacts_admin.ContactPhoneNumberAdmin)
+admin_site.register(ContactJob, contacts_admin.ContactJobAdmin)
+admin_site.register(Organization, contacts_admin.OrganizationAdmin)
+admin_site.register(Segment, contacts_admin.SegmentAdmin)
+admin_site.register(ConsentEvent, contacts_admin.ConsentEventAdmin)
+admin_site.register(ConsentStatus, contacts_admin.ConsentStatusAdmin)
+
+urlpatterns = [
+    path("admin/", admin_site.urls),
+    path("contacts/", include("contacts.urls")),
+]
+"""URL patterns used by the view and admin tests via `override_settings(ROOT_URLCONF=__name__)`."""
+
+TEST_TEMPLATES: list[dict] = [{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {
+        "context_processors": [
+            "django.template.context_processors.request",
+            "django.contrib.auth.context_processors.auth",
+            "django.contrib.messages.context_processors.messages",
+        ],
+        "loaders": [
+            ("django.template.loaders.locmem.Loader", {"base.html": "{% block content %}{% endblock %}"}),
+            "django.template.loaders.app_directories.Loader",
+        ],
+    },
+}]
+"""Template settings providing the project-level `base.html` the app's templates extend."""
+
+
+def create_jack(i: int, *, emails: int = 1, phones: int = 1, addresses: int = 1, state: str = "IL",
+                zipcode: str = "62701", **fields) -> Contact:
+    """Create the ``i``-th "Jack Hoff" fixture contact through `create_contact`.
+
+    With one row per channel the values are ``jack{i}@example.com``, ``+1202555010{i}``
+    and ``{i} Main St``; with several they are numbered per row instead.
+
+    Args:
+        i: The contact's index, used in the last name and every channel value.
+        emails: Number of email addresses to create.
+        phones: Number of phone numbers to create.
+        addresses: Number of addresses to create.
+        state: State of every address.
+        zipcode: ZIP code of every address.
+        **fields: Extra `Contact` field values.
+
+    Returns:
+        The saved contact.
+    """
+    return create_contact(
+        Contact(first_name="Jack", last_name=f"Hoff{i}", **fields),
+        emails=[
+            ContactEmail(email_address=f"jack{i}@example.com" if emails == 1 else f"jack{i}.{n}@example.com")
+            for n in range(emails)
+        ],
+        phone_numbers=[
+            ContactPhoneNumber(phone_number=f"+1202555010{i}" if phones == 1 else f"+120255501{i}{n}")
+            for n in range(phones)
+        ],
+        addresses=[
+            ContactAddress(street=f"{i if addresses == 1 else n} Main St", city="Springfield", state=state, zipcode=zipcode)
+            for n in range(addresses)
+        ],
+    )
 
 
 class TestClassDocstrExist(TestCase):
@@ -16,7 +127,8 @@ class TestClassDocstrExist(TestCase):
         """Provides a default list of objects for testing as `self.class_list`.
         """
         self.class_list = [
-            Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+            Contact, ContactAddress, ContactEmail, ContactPhoneNumber, AddressRollup, ContactSummary,
+            ArchivedContact, ArchivedContactEmail,
         ]
         return super().setUp()
 
@@ -89,4 +201,1687 @@ class TestContactModel(TestCase):
         )
 
 
+@override_settings(
+    ROOT_URLCONF=__name__,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class TestContactAutocomplete(TestCase):
+    """A test suite for the contact prefix search and autocomplete endpoint.
+    """
+
+    def setUp(self):
+        """Provide a logged-in user and contacts reachable through each searchable channel.
+        """
+        self.user = get_user_model().objects.create_user("staff", password="pw")
+        self.client.force_login(self.user)
+        self.jack: Contact = Contact.objects.create(first_name="Jack", last_name="Hoff")
+        self.jane: Contact = Contact.objects.create(first_name="Jane", last_name="Doe")
+        ContactEmail.objects.create(contact=self.jane, email_address="jdoe@example.com")
+        ContactPhoneNumber.objects.create(contact=self.jane, phone_number="+12025550123")
+        return super().setUp()
+
+    def test_sort_name_maintained(self):
+        """test that `sort_name` is refreshed on save"""
+        self.assertEqual(self.jack.sort_name, "hoff, jack")
+        self.jack.last_name = "Hoffman"
+        self.jack.save(update_fields=["last_name"])
+        self.jack.refresh_from_db()
+        self.assertEqual(self.jack.sort_name, "hoffman, jack")
+
+    def test_prefix_search_channels(self):
+        """test that names, emails and phone numbers are matched by prefix"""
+        self.assertEqual(list(Contact.objects.prefix_search("HOF")), [self.jack])
+        self.assertEqual(list(Contact.objects.prefix_search("jdoe@")), [self.jane])
+        self.assertEqual(list(Contact.objects.prefix_search("202-555")), [self.jane])
+        self.assertEqual(list(Contact.objects.prefix_search("ack")), [])
+
+    @override_settings(CONTACTS_AUTOCOMPLETE_LIMIT=1)
+    def test_autocomplete_view_limits_results(self):
+        """test the endpoint's JSON payload, result limit and caching"""
+        Contact.objects.create(first_name="Jill", last_name="Hoff")
+        url = reverse("contacts:autocomplete")
+        response = self.client.get(url, {"term": "hoff"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertTrue(response.json()["pagination"]["more"])
+        request = RequestFactory().get(url, {"term": "hoff"})
+        request.user = self.user
+        with self.assertNumQueries(0):
+            ContactAutocomplete.as_view()(request)
+
+    def test_autocomplete_widget_renders_selected_only(self):
+        """test that the channel forms do not render every contact as an option"""
+        form = ContactEmailModelForm(initial={"contact": self.jane.pk})
+        html = str(form["contact"])
+        self.assertIn("Jane Doe", html)
+        self.assertNotIn("Jack Hoff", html)
+        self.assertIn(reverse("contacts:autocomplete"), html)
+        self.assertIn("contacts/autocomplete.js", str(form.media))
+
+
+class TestContactFormWithAEP(TestCase):
+    """A test suite for persisting `contacts.forms.ContactFormWithAEP`
+    """
+
+    def setUp(self):
+        """Provide valid form data and a user for the tracking fields.
+        """
+        self.user = get_user_model().objects.create_user("staff", password="pw")
+        self.data: dict = {
+            "first_name": "Jack",
+            "last_name": "Hoff",
+            "job_title": "generic employee",
+            "email_addr": "Jack@EXAMPLE.com",
+            "phone": "+12025550123",
+            "building_no": "123",
+            "street_name": "Main St",
+            "city": "Springfield",
+            "state": "IL",
+            "zipcode": "62701",
+        }
+        return super().setUp()
+
+    def test_save_writes_all_rows(self):
+        """test that the contact and its channels are saved with tracking fields in four inserts"""
+        form = ContactFormWithAEP(data=self.data)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.assertNumQueries(6):  # savepoint + 4 inserts + release
+            contact = form.save(self.user)
+        with self.assertNumQueries(0):
+            email = contact.contact_email_addresses.all()[0]
+            address = contact.contact_addresses.all()[0]
+            self.assertEqual(len(contact.contact_phone_numbers.all()), 1)
+        self.assertTrue(email.email_address.endswith("@example.com"))
+        self.assertEqual(email.created_by, self.user)
+        self.assertEqual(address.street, "123 Main St")
+        self.assertEqual(contact.job_title, "Generic Employee")
+        self.assertEqual(ContactAddress.objects.filter(contact=contact, created_by=self.user).count(), 1)
+
+    def test_duplicate_email_rejected(self):
+        """test that an email address already on file fails validation"""
+        first = ContactFormWithAEP(data=self.data)
+        self.assertTrue(first.is_valid(), first.errors)
+        first.save(self.user)
+        form = ContactFormWithAEP(data={**self.data, "email_addr": "Jack@example.COM"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("email_addr", form.errors)
+
+
+class TestValidateContacts(TestCase):
+    """A test suite for `contacts.batch.validate_contacts`
+    """
+
+    def test_cleaners_and_unique_check(self):
+        """test that the model cleaners run and uniqueness takes one query per batch"""
+        ContactEmail.objects.create(
+            contact=Contact.objects.create(first_name="Jane", last_name="Doe"),
+            email_address="taken@example.com",
+        )
+        payloads = [
+            {"first_name": "Jack", "last_name": "Hoff", "job_title": "office worker", "emails": [{"email_address": "Jack@EXAMPLE.com"}]},
+            {"first_name": "Jill", "last_name": "Hoff", "emails": [{"email_address": "jack@example.com"}]},
+            {"first_name": "", "last_name": "Doe", "emails": [{"email_address": "taken@Example.com"}]},
+            {"first_name": "Joe", "last_name": "Doe", "phone_numbers": [{"phone_number": "not a number"}]},
+        ]
+        with self.assertNumQueries(2):
+            report = validate_contacts(payloads, batch_size=2)
+        self.assertFalse(report.is_valid)
+        self.assertEqual([row.index for row in report.valid_rows], [0])
+        self.assertEqual(report.rows[0].contact.job_title, "Office Worker")
+        self.assertEqual(report.rows[0].channels["emails"][0].email_address, "jack@example.com")
+        self.assertEqual(set(report.errors[1]), {"emails.0.email_address"})
+        self.assertEqual(set(report.errors[2]), {"first_name", "emails.0.email_address"})
+        self.assertEqual(set(report.errors[3]), {"phone_numbers.0.phone_number"})
+
+    def test_channel_fields_whitelisted(self):
+        """test that channel payloads cannot set fields outside the channel forms"""
+        report = validate_contacts([{
+            "first_name": "Jack", "last_name": "Hoff",
+            "emails": [{"email_address": "jack@example.com", "contact_id": 1, "tenant": "other"}],
+            "addresses": ["123 Main St"],
+        }])
+        self.assertEqual(set(report.errors[0]), {"emails.0", "addresses.0"})
+        self.assertIn("contact_id, tenant", report.errors[0]["emails.0"][0])
+
+
+class TestPhoneNumberCache(TestCase):
+    """A test suite for `contacts.phone`
+    """
+
+    def setUp(self):
+        """Provide a contact with one phone number and empty caches.
+        """
+        phone.parse_cache.clear()
+        phone.format_cache.clear()
+        self.contact: Contact = Contact.objects.create(first_name="Jack", last_name="Hoff")
+        self.number: ContactPhoneNumber = ContactPhoneNumber.objects.create(contact=self.contact, phone_number="+12025550123")
+        return super().setUp()
+
+    def test_formats_stored_on_save(self):
+        """test that the stored format columns are kept current"""
+        self.assertEqual(self.number.national_format, "(202) 555-0123")
+        self.assertEqual(self.number.international_format, "+1 202-555-0123")
+        self.number.phone_number = "+12025550199"
+        self.number.save(update_fields=["phone_number"])
+        self.number.refresh_from_db()
+        self.assertEqual(str(self.number), "(202) 555-0199")
+
+    def test_parse_cache_hits(self):
+        """test that loading the same number twice parses it once"""
+        phone.parse_cache.clear()
+        first = ContactPhoneNumber.objects.get(pk=self.number.pk).phone_number
+        second = ContactPhoneNumber.objects.get(pk=self.number.pk).phone_number
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(phone.cache_info()["parse"], {"hits": 1, "misses": 1, "size": 1, "maxsize": 4096})
+
+    def test_field_matches_library_field(self):
+        """test that the cached field deconstructs and builds its form field as `PhoneNumberField` does"""
+        from phonenumber_field import formfields, modelfields
+        field = ContactPhoneNumber._meta.get_field("phone_number")
+        name, path, args, kwargs = field.deconstruct()
+        self.assertEqual(path, "phonenumber_field.modelfields.PhoneNumberField")
+        self.assertEqual(modelfields.PhoneNumberField(*args, **kwargs).deconstruct()[3], kwargs)
+        self.assertIsInstance(field.formfield(), formfields.PhoneNumberField)
+
+    def test_format_cache_keys_parsed_number(self):
+        """test that one raw string parsed in different regions is not served from one entry"""
+        british = phone.to_python("020 7946 0958", region="GB")
+        american = phone.to_python("020 7946 0958", region="US")
+        self.assertEqual(phone.format_phone_number(british, "E164"), "+442079460958")
+        self.assertNotEqual(phone.format_phone_number(american, "E164"), "+442079460958")
+        self.assertEqual(phone.format_phone_number(phone.to_python("+442079460958"), "E164"), "+442079460958")
+        self.assertEqual(phone.cache_info()["format"]["hits"], 1)
+
+    def test_phonenumbers_deferred(self):
+        """test that `django.setup()` does not import phonenumbers or the library's model field"""
+        script = ("import sys, django; django.setup(); "
+                  "print('phonenumbers' in sys.modules or 'phonenumber_field.modelfields' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+    @override_settings(CONTACTS_PHONE_REGIONS=["US", "CA"])
+    def test_configured_regions(self):
+        """test that configured regions are checked without the full region lookup"""
+        import phonenumbers
+        canadian = phone.to_python("+14165550123")
+        with mock.patch.object(phonenumbers, "is_valid_number", side_effect=AssertionError):
+            self.assertTrue(phone.is_valid_number(canadian))
+        british = phone.to_python("+442079460958")
+        with mock.patch.object(phonenumbers, "is_valid_number", wraps=phonenumbers.is_valid_number) as fallback:
+            self.assertTrue(phone.is_valid_number(british))
+            self.assertFalse(phone.is_valid_number(phone.to_python("+11234567890")))
+        self.assertEqual(fallback.call_count, 2)
+        with self.assertRaises(ValidationError):
+            phone.validate_international_phonenumber("+1202555")
+        with override_settings(CONTACTS_PHONE_REGIONS=["XX"]), self.assertRaises(ImproperlyConfigured):
+            phone.configured_regions()
+
+    def test_cache_is_bounded(self):
+        """test that the least recently used entry is evicted"""
+        cache = phone.PhoneNumberCache(maxsize=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_set(key, lambda: key.upper())
+        self.assertEqual(list(cache._data), ["a", "c"])
+        self.assertEqual(cache.info()["hits"], 1)
+
+
+class TestAddressNormalization(TestCase):
+    """A test suite for `contacts.addresses` and the normalized address fields
+    """
+
+    def setUp(self):
+        """Provide a contact with one address.
+        """
+        self.contact: Contact = Contact.objects.create(first_name="Jack", last_name="Hoff")
+        self.address: ContactAddress = ContactAddress.objects.create(
+            contact=self.contact, street="123 North Main Street.", unit_type="Suite", unit_number="#105",
+            city="Springfield", state="IL", zipcode="62701-1234",
+        )
+        return super().setUp()
+
+    def test_normalizers(self):
+        """test the USPS-style canonical forms"""
+        self.assertEqual(addresses.normalize_street("123 main st"), "123 MAIN ST")
+        self.assertEqual(addresses.normalize_street("123 MAIN STREET"), "123 MAIN ST")
+        self.assertEqual(addresses.normalize_street("9 Elm Avenue Northwest"), "9 ELM AVE NW")
+        self.assertEqual(addresses.normalize_unit("P.O. Box", "12"), "PO BOX 12")
+        self.assertEqual(addresses.normalize_unit("unit", None), "")
+
+    def test_fields_filled_on_save(self):
+        """test that the normalized columns and centroid are kept current"""
+        self.assertEqual(self.address.normalized_street, "123 N MAIN ST")
+        self.assertEqual(self.address.normalized_unit, "STE 105")
+        self.assertEqual(self.address.normalized_city, "SPRINGFIELD")
+        self.assertEqual(self.address.normalized_zipcode, "62701")
+        self.assertAlmostEqual(self.address.lat, 39.8, places=0)
+        self.assertAlmostEqual(self.address.lon, -89.6, places=0)
+
+    def test_matching_and_near(self):
+        """test dedupe lookups and proximity filters over the normalized columns"""
+        self.assertEqual(list(ContactAddress.objects.matching("123 n. main st", zipcode="62701")), [self.address])
+        self.assertEqual(list(ContactAddress.objects.near(39.8, -89.65, 10)), [self.address])
+        self.assertEqual(ContactAddress.objects.within(41.88, -87.63, 50), [])
+
+    def test_backfill_command(self):
+        """test that the command fills rows written without `save()`"""
+        ContactAddress.objects.update(normalized_street="", lat=None, lon=None)
+        out = StringIO()
+        call_command("normalize_addresses", batch_size=1, stdout=out)
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.normalized_street, "123 N MAIN ST")
+        self.assertIsNotNone(self.address.lat)
+        self.assertIn("Normalized 1 address", out.getvalue())
+
+    def test_refresh_archived_and_other_tenant(self):
+        """test that rows selected through `all_objects` are written, whatever their tenant or archived state"""
+        ContactAddress.objects.filter(pk=self.address.pk).archive()
+        with use_tenant("acme"):
+            create_jack(1, emails=0, phones=0)
+        ContactAddress.all_objects.update(normalized_street="")
+        self.assertEqual(ContactAddress.all_objects.all().refresh_derived_fields(), 2)
+        self.assertEqual(set(ContactAddress.all_objects.values_list("normalized_street", flat=True)), {"123 N MAIN ST", "1 MAIN ST"})
+
+
+class TestAddressRollup(TestCase):
+    """A test suite for `ContactAddress.objects.rollup` and the `AddressRollup` summary
+    """
+
+    def setUp(self):
+        """Provide four addresses in two states and three cities.
+        """
+        self.contact: Contact = Contact.objects.create(first_name="Jack", last_name="Hoff")
+        for city, state, zipcode in [("Springfield", "IL", "62701"), ("springfield", "IL", "62702"),
+                                     ("Chicago", "IL", "60601"), ("Boston", "MA", "02108")]:
+            ContactAddress.objects.create(contact=self.contact, street="1 Main St", city=city, state=state, zipcode=zipcode)
+        return super().setUp()
+
+    def counts(self, rows: list[dict]) -> list[tuple]:
+        return [(row["state"], row["city"], row["level"], row["count"]) for row in rows]
+
+    def test_rollup(self):
+        """test grouped counts with subtotals after their groups and the total last"""
+        self.assertEqual(self.counts(ContactAddress.objects.rollup()), [
+            ("IL", "CHICAGO", 2, 1), ("IL", "SPRINGFIELD", 2, 2), ("IL", None, 1, 3),
+            ("MA", "BOSTON", 2, 1), ("MA", None, 1, 1),
+            (None, None, 0, 4),
+        ])
+        self.assertEqual(ContactAddress.objects.filter(state="MA").rollup(("state",))[-1]["count"], 1)
+        with self.assertRaises(ValueError):
+            ContactAddress.objects.rollup(("country",))
+
+    def test_summary_refresh(self):
+        """test incremental refreshes, including the rebuild after a delete"""
+        self.assertEqual(AddressRollup.objects.refresh(), 4)
+        self.assertEqual(ContactAddress.objects.rollup(use_summary=True), ContactAddress.objects.rollup())
+        ContactAddress.objects.create(contact=self.contact, street="2 Main St", city="Chicago", state="IL", zipcode="60601")
+        self.assertEqual(AddressRollup.objects.refresh(), 1)
+        self.assertEqual(AddressRollup.objects.get(zipcode="60601").count, 2)
+        ContactAddress.objects.filter(state="MA").delete()
+        AddressRollup.objects.refresh()
+        self.assertEqual(ContactAddress.objects.rollup(use_summary=True), ContactAddress.objects.rollup())
+        with self.assertRaises(ValueError):
+            ContactAddress.objects.filter(state="IL").rollup(use_summary=True)
+
+    def test_command(self):
+        """test the refresh command"""
+        out = StringIO()
+        call_command("refresh_address_rollup", full=True, stdout=out)
+        self.assertIn("4 group(s)", out.getvalue())
+
+
+class TestContactSummary(TestCase):
+    """A test suite for the `ContactSummary` table and its upkeep by `contacts.summary`
+    """
+
+    def test_signals(self):
+        """test that saves and deletes refresh the summary once the transaction commits"""
+        with self.captureOnCommitCallbacks(execute=True):
+            contact = create_contact(
+                Contact(first_name="Jack", last_name="Hoff"),
+                emails=[ContactEmail(email_address="jack@example.com"), ContactEmail(email_address="hoff@example.com")],
+                phone_numbers=[ContactPhoneNumber(phone_number="+12025550199")],
+                addresses=[ContactAddress(street="1 Main St", city="Springfield", state="IL", zipcode="62701")],
+            )
+        summary = ContactSummary.objects.get(contact=contact)
+        self.assertEqual(str(summary), "Jack Hoff")
+        self.assertEqual((summary.primary_email, summary.primary_phone), ("jack@example.com", "(202) 555-0199"))
+        self.assertEqual((summary.email_count, summary.phone_count, summary.address_count), (2, 1, 1))
+        self.assertEqual(summary.address, "1 Main St, Springfield, IL 62701")
+        with self.captureOnCommitCallbacks(execute=True):
+            contact.contact_email_addresses.get(email_address="jack@example.com").delete()
+            contact.last_name = "Smith"
+            contact.save()
+        summary.refresh_from_db()
+        self.assertEqual((summary.display_name, summary.sort_name), ("Jack Smith", "smith, jack"))
+        self.assertEqual((summary.primary_email, summary.email_count), ("hoff@example.com", 1))
+        contact.delete()
+        self.assertFalse(ContactSummary.objects.exists())
+
+    def test_bulk_paths(self):
+        """test that seeding writes summaries and the command rebuilds stale ones"""
+        call_command("seed_contacts", 5, emails="1", phones="1", addresses="1", stdout=StringIO())
+        self.assertEqual(ContactSummary.objects.filter(email_count=1, phone_count=1, address_count=1).count(), 5)
+        ContactSummary.objects.update(display_name="")
+        out = StringIO()
+        call_command("refresh_contact_summaries", batch_size=2, stdout=out)
+        self.assertIn("Refreshed 5 contact summaries", out.getvalue())
+        self.assertFalse(ContactSummary.objects.filter(display_name="").exists())
+
+
+class TestTenants(TestCase):
+    """A test suite for the tenant partitioning of `contacts.tenants`
+    """
+
+    def create(self, tenant: str, email: str) -> Contact:
+        with use_tenant(tenant), self.captureOnCommitCallbacks(execute=True):
+            return create_contact(
+                Contact(first_name="Jack", last_name="Hoff"),
+                emails=[ContactEmail(email_address=email)],
+                addresses=[ContactAddress(street="1 Main St", city="Springfield", state="IL", zipcode="62701")],
+            )
+
+    def test_scoped_managers(self):
+        """test that each tenant only sees its own rows, channels included"""
+        acme = self.create("acme", "jack@example.com")
+        self.create("", "jack@example.com")  # emails are unique per tenant
+        self.assertEqual(acme.contact_email_addresses.get().tenant, "acme")
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertEqual(Contact.all_objects.count(), 2)
+        with use_tenant("acme"):
+            self.assertEqual(list(Contact.objects.all()), [acme])
+            self.assertEqual(list(Contact.objects.prefix_search("jack@")), [acme])
+            self.assertEqual(ContactSummary.objects.get().tenant, "acme")
+            self.assertEqual(ContactAddress.objects.rollup(("state",))[-1]["count"], 1)
+            email = ContactEmail(contact=Contact.objects.get(), email_address="jack@example.com")
+            with self.assertRaises(ValidationError):
+                email.full_clean()
+        # a channel saved on its own takes its contact's tenant
+        phone = ContactPhoneNumber.objects.create(contact=acme, phone_number="+12025550100")
+        self.assertEqual(phone.tenant, "acme")
+
+    @override_settings(CONTACTS_TENANT_DATABASES={"acme": "shard1"})
+    def test_router_places_tenants(self):
+        """test that a mapped tenant's reads and writes go to its database"""
+        router = routers.ContactsRouter()
+        with routers.use_primary():
+            self.assertEqual(router.db_for_write(Contact, instance=Contact(tenant="acme")), "shard1")
+            self.assertEqual(router.db_for_write(Contact), "default")
+            with use_tenant("acme"):
+                self.assertEqual(router.db_for_read(ContactEmail), "shard1")
+
+
+    def test_create_contact_routes_on_instance(self):
+        """test that `create_contact` writes the contact and its channels where the router places the contact"""
+        with override_settings(DATABASE_ROUTERS=[InstanceRouter()]), self.captureOnCommitCallbacks(execute=True):
+            contact = create_contact(
+                Contact(first_name="Jack", last_name="Hoff"),
+                emails=[ContactEmail(email_address="jack@example.com")],
+                phone_numbers=[ContactPhoneNumber(phone_number="+12025550100")],
+            )
+        self.assertEqual(contact._state.db, "default")
+        self.assertEqual(ContactEmail.objects.get().contact, contact)
+
+
+class InstanceRouter:
+    """Routes writes with an instance hint to the default database and all other
+    writes to one that is not configured, for `TestTenants`."""
+
+    def db_for_write(self, model, **hints):
+        return "default" if "instance" in hints else "unconfigured"
+
+
+@override_settings(CONTACTS_READ_REPLICAS=["replica"])
+class TestContactsRouter(TestCase):
+    """A test suite for `contacts.routers`
+    """
+
+    def setUp(self):
+        self.router = routers.ContactsRouter()
+        return super().setUp()
+
+    def test_routing(self):
+        """test that reads go to a replica until the first write, and other apps are left alone"""
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Contact), "default")
+        self.assertEqual(self.router.db_for_read(Contact), "replica")
+        self.assertIsNone(self.router.db_for_read(get_user_model()))
+        self.assertIs(self.router.allow_migrate("replica", "contacts"), False)
+        with routers.use_primary():  # keeps the write's pin inside the block
+            self.assertEqual(self.router.db_for_write(ContactEmail), "default")
+            self.assertEqual(self.router.db_for_read(ContactEmail), "default")
+        with override_settings(CONTACTS_READ_REPLICAS=()):
+            self.assertEqual(self.router.db_for_read(Contact), "default")
+
+    def test_middleware_pins_after_write(self):
+        """test that a writing request sets the pin cookie and the next request reads from the primary"""
+        from django.http import HttpResponse
+
+        def view(request):
+            if request.method == "POST":
+                self.router.db_for_write(Contact)
+            return HttpResponse(self.router.db_for_read(Contact))
+
+        middleware = routers.ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        response = middleware(factory.get("/"))
+        self.assertEqual((response.content, response.cookies), (b"replica", {}))
+        response = middleware(factory.post("/"))
+        self.assertEqual(response.content, b"default")
+        self.assertEqual(response.cookies[middleware.cookie_name]["max-age"], 5)
+        self.assertFalse(routers.is_pinned())
+        request = factory.get("/")
+        request.COOKIES[middleware.cookie_name] = "1"
+        self.assertEqual(middleware(request).content, b"default")
+
+    def test_write_helpers_use_primary(self):
+        """test that the bulk write helpers read and write the primary while plain reads go to a replica"""
+        with self.captureOnCommitCallbacks(execute=True):
+            contacts = [create_jack(i) for i in range(2)]
+        ContactRelationship.objects.create(contact=contacts[1], kind=ContactRelationship.Kind.REPORTS_TO, manager=contacts[0])
+        writes = [
+            lambda: Contact.objects.filter(pk=contacts[0].pk).archive(),
+            lambda: Contact.all_objects.filter(pk=contacts[0].pk).restore(),
+            lambda: ContactEmail.objects.filter(contact=contacts[1]).archive(),
+            lambda: ContactEmail.all_objects.filter(contact=contacts[1]).restore(),
+            lambda: ContactSummary.objects.rebuild(),
+            lambda: ReportingLine.objects.rebuild(),
+            lambda: AddressRollup.objects.refresh(full=True),
+            lambda: SegmentBitmap.objects.refresh(full=True),
+            lambda: ConsentEvent.objects.record("email", "jack0@example.com", "newsletter", "opt_in"),
+            lambda: ConsentStatus.objects.rebuild(),
+            lambda: purge_contacts(Contact.objects.filter(pk=contacts[0].pk)),
+        ]
+        # "replica" is not a configured database, so a helper reading it fails; each write starts unpinned
+        with override_settings(DATABASE_ROUTERS=["contacts.routers.ContactsRouter"]):
+            for write in writes:
+                contextvars.copy_context().run(write)
+        self.assertEqual(list(Contact.all_objects.all()), [contacts[1]])
+        self.assertEqual(ContactSummary.objects.get().email_count, 1)
+
+
+class FailingHook(instrumentation.Hook):
+    """A hook that always raises, for `TestInstrumentation`."""
+
+    def record(self, span):
+        raise RuntimeError("hook failed")
+
+
+class TestInstrumentation(TestCase):
+    """A test suite for `contacts.instrumentation`
+    """
+
+    def test_disabled_by_default(self):
+        """test that spans are skipped without hooks or a collector"""
+        self.assertFalse(instrumentation.enabled())
+        with instrumentation.span("noop") as span:
+            self.assertIsNone(span)
+
+    @override_settings(CONTACTS_INSTRUMENTATION_HOOKS=["contacts.instrumentation.CounterHook"])
+    def test_counter_hook(self):
+        """test that pipeline spans reach the configured hooks"""
+        validate_contacts([{"first_name": "Jack", "last_name": "Hoff", "emails": [{"email_address": "jack@example.com"}]}])
+        hook = instrumentation.get_hooks()[0]
+        calls, _, queries, errors = hook.counters["contacts.batch.validate_contacts"]
+        self.assertEqual((calls, queries, errors), (1, 1, 0))
+        self.assertIn('contacts_span_calls_total{span="contacts.batch.validate_contacts"} 1', hook.render())
+
+    @override_settings(CONTACTS_INSTRUMENTATION_HOOKS=["contacts.tests.FailingHook", "contacts.instrumentation.CounterHook"])
+    def test_failing_hook(self):
+        """test that a failing hook is logged without masking the span's exception or skipping other hooks"""
+        with self.assertRaises(TypeError):
+            instrumentation.Hook()
+        with self.assertLogs("contacts.instrumentation", "ERROR"), self.assertRaises(ValueError):
+            with instrumentation.span("failing"):
+                raise ValueError
+        self.assertEqual(instrumentation.get_hooks()[1].counters["failing"][3], 1)
+
+    def test_nested_spans(self):
+        """test that outer spans include nested queries and totals count them once"""
+        with instrumentation.collect_spans() as spans:
+            with instrumentation.span("outer"):
+                Contact.objects.count()
+                with instrumentation.span("inner"):
+                    Contact.objects.count()
+        self.assertEqual([(s.name, s.queries, s.depth) for s in spans], [("inner", 1, 1), ("outer", 2, 0)])
+        self.assertEqual(instrumentation.summarize(spans)["queries"], 2)
+
+    def test_span_in_fresh_thread(self):
+        """test that a span counts the queries of a connection it opens itself"""
+        def run():
+            try:
+                with instrumentation.collect_spans() as collected:
+                    with instrumentation.span("first"):
+                        with connection.cursor() as cursor:
+                            cursor.execute("SELECT 1")
+                spans.extend(collected)
+            finally:
+                connection.close()
+
+        spans = []
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual([(s.name, s.queries) for s in spans], [("first", 1)])
+
+    @override_settings(
+        DEBUG=True,
+        ROOT_URLCONF=__name__,
+        TEMPLATES=TEST_TEMPLATES,
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "django.contrib.messages.middleware.MessageMiddleware",
+            "contacts.instrumentation.ContactsQueryMiddleware",
+        ],
+    )
+    def test_middleware(self):
+        """test the per-request summary header"""
+        contact = Contact.objects.create(first_name="Jack", last_name="Hoff")
+        response = self.client.get(f"/contacts/{contact.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'^contacts;dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class TestSlowQuerySampler(TestCase):
+    """A test suite for `contacts.slowqueries`
+    """
+
+    def setUp(self):
+        """Provide a sampler recording every contacts query and explaining each new fingerprint.
+        """
+        slowqueries.clear_slow_queries()
+        self.sampler = slowqueries.SlowQuerySampler(threshold_ms=0, sample_rate=1)
+        return super().setUp()
+
+    def test_records_contacts_queries(self):
+        """test fingerprinting, plan capture and the contacts-table filter"""
+        with connection.execute_wrapper(self.sampler):
+            Contact.objects.filter(last_name="Hoff").count()
+            Contact.objects.filter(last_name="Smith").count()
+            get_user_model().objects.count()
+        entries = slowqueries.get_slow_queries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["count"], 2)
+        self.assertIn("contacts_contact", entries[0]["plan"])
+
+    def test_buffer_is_bounded(self):
+        """test that the least recently seen fingerprints are dropped"""
+        self.sampler.size = 2
+        with connection.execute_wrapper(self.sampler):
+            Contact.objects.count()
+            ContactEmail.objects.count()
+            ContactAddress.objects.count()
+        self.assertEqual([e["fingerprint"].split("FROM ")[1].split()[0] for e in slowqueries.get_slow_queries()],
+                         ['"contacts_contactaddress"', '"contacts_contactemail"'])
+
+    @override_settings(ROOT_URLCONF=__name__, TEMPLATES=TEST_TEMPLATES)
+    def test_command_and_admin_view(self):
+        """test that the buffer is exposed to superusers and can be cleared"""
+        with connection.execute_wrapper(self.sampler):
+            Contact.objects.count()
+        out = StringIO()
+        call_command("slow_queries", stdout=out)
+        self.assertIn('FROM "contacts_contact"', out.getvalue())
+        url = reverse("admin:contacts_contact_slow_queries", current_app=admin_site.name)
+        self.client.force_login(get_user_model().objects.create_user("staff", is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_superuser("admin"))
+        self.assertContains(self.client.get(url), "contacts_contact")
+        self.client.post(url)
+        self.assertEqual(slowqueries.get_slow_queries(), [])
+
+
+class TestPurgeContacts(TestCase):
+    """A test suite for `contacts.services.purge_contacts`
+    """
+
+    def setUp(self):
+        """Provide five contacts with one row per channel and their summaries.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                create_jack(i)
+        return super().setUp()
+
+    def test_purge(self):
+        """test chunked set-based deletes of the contacts and their dependents, logged once"""
+        from django.contrib.admin.models import LogEntry
+        from django.contrib.contenttypes.models import ContentType
+
+        user = get_user_model().objects.create_user("admin")
+        ContentType.objects.clear_cache()
+        with CaptureQueriesContext(connection) as queries:
+            counts = purge_contacts(Contact.objects.exclude(last_name="Hoff4"), chunk_size=2, user=user)
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(statements.count("DELETE"), 2 * 10)  # one per table and relation per chunk, nothing loaded
+        self.assertEqual(statements.count("SELECT"), 3 + 2 + 1)  # the id chunks, the reports per chunk and the log's content type
+        self.assertEqual(counts[Contact], 4)
+        self.assertEqual(counts[ContactEmail], 4)
+        self.assertEqual(counts[ContactSummary], 4)
+        self.assertEqual(list(Contact.objects.values_list("last_name", flat=True)), ["Hoff4"])
+        self.assertEqual(ContactPhoneNumber.objects.count(), 1)
+        self.assertEqual(ContactSummary.objects.count(), 1)
+        self.assertEqual(LogEntry.objects.get().object_repr, "4 contacts (purged)")
+
+    def test_send_signals(self):
+        """test that the collector path reports the same counts"""
+        counts = purge_contacts(Contact.objects.all(), chunk_size=3, send_signals=True)
+        self.assertEqual((counts[Contact], counts[ContactAddress], counts[ContactSummary]), (5, 5, 5))
+        self.assertFalse(ContactEmail.objects.exists())
+
+    def test_command(self):
+        """test the dry run and the purge of contacts updated before a date"""
+        out = StringIO()
+        call_command("purge_contacts", updated_before="2999-01-01", dry_run=True, stdout=out)
+        self.assertIn("Would delete 5 contact(s)", out.getvalue())
+        call_command("purge_contacts", updated_before="2000-01-01", stdout=out)
+        self.assertEqual(Contact.objects.count(), 5)
+        call_command("purge_contacts", updated_before="2999-01-01", chunk_size=2, stdout=out)
+        self.assertIn("Deleted 5 contact addresses", out.getvalue())
+        self.assertFalse(Contact.objects.exists())
+
+
+class TestArchive(TestCase):
+    """A test suite for soft deletes and the cold `ArchivedContact*` tables
+    """
+
+    def setUp(self):
+        """Provide two contacts with one row per channel and their summaries.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contacts: list[Contact] = [create_jack(i) for i in range(2)]
+        return super().setUp()
+
+    def test_archive_and_restore(self):
+        """test that archived contacts and their channels are hidden until restored"""
+        contact = self.contacts[0]
+        self.assertEqual(Contact.objects.filter(pk=contact.pk).archive(), 1)
+        self.assertEqual(list(Contact.objects.all()), [self.contacts[1]])
+        self.assertEqual(Contact.all_objects.count(), 2)
+        self.assertEqual(ContactEmail.objects.count(), 1)
+        self.assertFalse(ContactSummary.objects.filter(contact=contact).exists())
+        self.assertEqual(ContactAddress.objects.rollup(("state",))[-1]["count"], 1)
+        # the address is free for a live contact while the archived one holds it
+        ContactEmail.objects.create(contact=self.contacts[1], email_address="jack0@example.com").delete()
+
+        ContactEmail.objects.filter(contact=self.contacts[1]).archive()
+        self.assertEqual(ContactSummary.objects.get(contact=self.contacts[1]).email_count, 0)
+        self.assertEqual(Contact.all_objects.filter(pk=contact.pk).restore(), 1)
+        self.assertEqual(Contact.objects.count(), 2)
+        self.assertEqual(ContactSummary.objects.get(contact=contact).primary_email, "jack0@example.com")
+        self.assertIsNotNone(ContactEmail.all_objects.get(contact=self.contacts[1]).archived_on)
+
+    def test_form_rejects_live_duplicate(self):
+        """test that the model form reports a live duplicate instead of failing on the constraint"""
+        data = {"contact": self.contacts[1].pk, "email_address": "JACK0@example.com"}
+        form = ContactEmailModelForm(data=data)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors["email_address"], ["A live contact already has this email address."])
+        with use_tenant("other"):
+            other = create_jack(9, phones=0, addresses=0)
+        ContactEmail(contact=other, email_address="jack0@example.com").validate_constraints(exclude={"tenant", "archived_on"})
+        Contact.objects.filter(pk=self.contacts[0].pk).archive()
+        form = ContactEmailModelForm(data=data)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+    def test_move_to_cold_storage(self):
+        """test the command moving long-archived contacts out of the live tables"""
+        Contact.objects.filter(pk=self.contacts[0].pk).archive()
+        out = StringIO()
+        call_command("archive_contacts", days=1, stdout=out)
+        self.assertIn("Moved nothing", out.getvalue())
+        call_command("archive_contacts", days=0, dry_run=True, stdout=out)
+        self.assertIn("Would move 1 contact(s)", out.getvalue())
+        call_command("archive_contacts", days=0, stdout=out)
+        self.assertIn("Moved 1 contacts, 1 contact emails", out.getvalue())
+        self.assertEqual(Contact.all_objects.count(), 1)
+        self.assertEqual(ContactEmail.all_objects.count(), 1)
+        archived = ArchivedContact.objects.get(pk=self.contacts[0].pk)
+        self.assertEqual(archived.sort_name, "hoff0, jack")
+        self.assertEqual(str(archived.contact_phone_numbers.get()), "(202) 555-0100")
+        self.assertEqual(archived.contact_addresses.get().normalized_city, "SPRINGFIELD")
+
+
+@override_settings(CONTACTS_TASK_BACKEND="contacts.tasks.ImmediateBackend")
+class TestTasks(TestCase):
+    """A test suite for the background jobs of `contacts.tasks`
+    """
+
+    def setUp(self):
+        """Provide five contacts with one email address each.
+        """
+        for i in range(5):
+            create_jack(i, phones=0, addresses=0)
+        return super().setUp()
+
+    def test_resume_from_checkpoint(self):
+        """test that a failed job records its progress and resumes after the last finished batch"""
+        refresh = ContactSummary.objects.refresh
+        calls: list[list[int]] = []
+
+        def flaky(ids):
+            calls.append(ids)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return refresh(ids)
+
+        with mock.patch.object(ContactSummary.objects, "refresh", flaky):
+            with self.assertLogs("contacts.tasks", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+                job = tasks.enqueue("refresh_contact_summaries", batch_size=2)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.done, job.total, job.percent), (ContactJob.Status.FAILED, 2, 5, 40))
+            self.assertIn("connection lost", job.error)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(tasks.resume(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.done, job.percent), (ContactJob.Status.DONE, 5, 100))
+        self.assertEqual([len(ids) for ids in calls], [2, 2, 2, 1])  # the failed batch is retried, the first is not
+        self.assertEqual(calls[1], calls[2])
+        self.assertEqual(ContactSummary.objects.count(), 5)
+        self.assertFalse(tasks.resume(job))
+
+    def test_resume_running_needs_stale_heartbeat(self):
+        """test that a running job is only resumed once its worker stopped checkpointing"""
+        job = ContactJob.objects.create(name="refresh_contact_summaries", status=ContactJob.Status.RUNNING)
+        tasks.checkpoint(job, 2, total=5, last_pk=Contact.objects.order_by("pk").values_list("pk", flat=True)[1])
+        self.assertFalse(tasks.resume(job))
+        ContactJob.objects.filter(pk=job.pk).update(heartbeat_on=timezone.now() - timedelta(seconds=601))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(tasks.resume(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.done), (ContactJob.Status.DONE, 5))
+
+    def test_cancel(self):
+        """test that cancelled jobs do not run and that unknown jobs are refused"""
+        with self.captureOnCommitCallbacks(execute=True):
+            job = tasks.enqueue("purge_contacts", updated_before="2999-01-01T00:00:00+00:00")
+            self.assertTrue(tasks.cancel(job))
+        self.assertEqual(Contact.objects.count(), 5)
+        with self.assertRaises(ValueError):
+            tasks.enqueue("reindex")
+
+    @override_settings(CONTACTS_TASK_BACKEND=None)
+    def test_default_backend(self):
+        """test the fallback to the thread pool without `django.tasks` or Celery"""
+        with mock.patch.object(tasks, "django_task", None), mock.patch.object(tasks, "shared_task", None):
+            self.assertIsInstance(tasks.get_backend(), tasks.ThreadPoolBackend)
+
+    @override_settings(ROOT_URLCONF=__name__, TEMPLATES=TEST_TEMPLATES)
+    def test_admin_action(self):
+        """test that the admin queues a purge of the selected contacts and links to its progress"""
+        self.client.force_login(get_user_model().objects.create_superuser("admin"))
+        url = reverse("admin:contacts_contact_changelist", current_app=admin_site.name)
+        selected = list(Contact.objects.values_list("pk", flat=True)[:3])
+        response = self.client.post(url, {"action": "purge_contacts", "_selected_action": selected})
+        self.assertContains(response, "permanently delete the 3 selected contacts")
+        self.assertFalse(ContactJob.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                url, {"action": "purge_contacts", "_selected_action": selected, "post": "yes"}, follow=True,
+            )
+        job = ContactJob.objects.get()
+        self.assertContains(response, reverse("admin:contacts_contactjob_change", args=(job.pk,), current_app=admin_site.name))
+        self.assertEqual((job.status, job.done, job.total), (ContactJob.Status.DONE, 3, 3))
+        self.assertEqual(Contact.objects.count(), 2)
+        url = reverse("admin:contacts_contactjob_changelist", current_app=admin_site.name)
+        self.assertContains(self.client.get(url), '<progress value="100" max="100"></progress> 3 / 3', html=False)
+
+
+class TestImportContacts(TestCase):
+    """A test suite for the parallel JSON Lines import of `contacts.imports`
+    """
+
+    def setUp(self):
+        """Provide a file with valid, invalid, duplicate, malformed and blank lines.
+        """
+        lines = [
+            {"first_name": "jack", "last_name": "hoff", "emails": [{"email_address": "Jack@Example.com"}]},
+            {"first_name": "", "last_name": "Nobody"},
+            {"first_name": "Jane", "last_name": "Hoff", "emails": [{"email_address": "jack@example.com"}]},
+            "{not json",
+            "",
+            {
+                "first_name": "Jim", "last_name": "Beam",
+                "phone_numbers": [{"phone_number": "+12025550123"}],
+                "addresses": [{"street": "123 Main Street", "city": "Springfield", "state": "IL", "zipcode": "62701"}],
+            },
+        ] * 3
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            for i, line in enumerate(lines):
+                if isinstance(line, dict) and line.get("emails"):
+                    line = {**line, "emails": [{"email_address": f"{i // 6}{line['emails'][0]['email_address']}"}]}
+                f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+        self.path: str = f.name
+        self.addCleanup(os.remove, self.path)
+        return super().setUp()
+
+    def test_partition_file(self):
+        """test that partitions cover the file and end on line boundaries"""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        partitions = partition_file(self.path, 4)
+        self.assertEqual(partitions[0][0], 0)
+        self.assertEqual(partitions[-1][1], len(data))
+        for (_, end), (start, _) in zip(partitions, partitions[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[start - 1:start], b"\n")
+        self.assertEqual(partition_file(self.path, 1000)[-1][1], len(data))
+
+    def test_partition_size_capped(self):
+        """test that a file larger than `MAX_PARTITION_BYTES` per worker is split into more partitions"""
+        from contacts import imports
+        calls = []
+        prepare_partition = imports.prepare_partition
+
+        def prepare(path, start, end, tenant):
+            calls.append(end - start)
+            return prepare_partition(path, start, end, tenant)
+
+        with mock.patch.object(imports, "MAX_PARTITION_BYTES", 200), \
+                mock.patch.object(imports, "prepare_partition", side_effect=prepare):
+            report = import_contacts(self.path, workers=1, batch_size=4)
+        self.assertGreater(len(calls), 4)
+        self.assertLessEqual(max(calls), 400)
+        self.assertEqual(report.created[Contact], 6)
+
+    def test_import(self):
+        """test that rows and errors are the same in file order whatever the number of workers"""
+        report = import_contacts(self.path, workers=1, batch_size=4)
+        self.assertEqual(report.created[Contact], 6)
+        self.assertEqual(report.created[ContactAddress], 3)
+        self.assertEqual(sorted(report.errors), [2, 3, 4, 8, 9, 10, 14, 15, 16])
+        self.assertIn("first_name", report.errors[2])
+        self.assertIn("first seen at 1.", report.errors[3]["emails.0.email_address"][0])
+        self.assertIn("Not a JSON object", report.errors[4][""][0])
+        contact = Contact.objects.order_by("pk").first()
+        self.assertEqual((contact.sort_name, contact.tenant), ("hoff, jack", ""))
+        self.assertEqual(ContactAddress.objects.first().normalized_street, "123 MAIN ST")
+        self.assertEqual(ContactSummary.objects.count(), 6)
+
+        Contact.objects.all().delete()
+        parallel = import_contacts(self.path, workers=2, batch_size=4)
+        self.assertEqual(parallel.created, report.created)
+        self.assertEqual(parallel.errors, report.errors)
+        self.assertEqual(list(Contact.objects.order_by("pk").values_list("sort_name", flat=True)), ["hoff, jack", "beam, jim"] * 3)
+
+    def test_start_line(self):
+        """test that an import resumed after the last line of a batch adds what the first run had not"""
+        reports = []
+        full = import_contacts(self.path, workers=1, batch_size=4, progress=lambda report: reports.append(
+            (report.lines, report.created[Contact]),
+        ))
+        lines, created = reports[0]
+        Contact.objects.all().delete()
+        resumed = import_contacts(self.path, workers=1, batch_size=4, start_line=lines + 1)
+        self.assertEqual(resumed.created[Contact], full.created[Contact] - created)
+        self.assertEqual(resumed.errors, {line: errors for line, errors in full.errors.items() if line > lines})
+
+    def test_without_returning_bulk_insert(self):
+        """test that channels reach their contacts where a bulk insert reports no ids"""
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            self.assertEqual(import_contacts(self.path, workers=1, batch_size=4).created[ContactEmail], 3)
+        self.assertEqual(set(ContactEmail.objects.values_list("contact__sort_name", flat=True)), {"hoff, jack"})
+        self.assertEqual(set(ContactAddress.objects.values_list("contact__sort_name", flat=True)), {"beam, jim"})
+
+    def test_concurrent_email(self):
+        """test that a line whose email address another writer added after the check is rejected, not dropped"""
+        def racing_check(rows, seen, using=None):
+            check_unique_emails(rows, seen, using)
+            if racing_check.calls == 0:
+                create_jack(99, emails=0, phones=0, addresses=0).contact_email_addresses.create(
+                    email_address=rows[0].channels["emails"][0].email_address,
+                )
+            racing_check.calls += 1
+
+        racing_check.calls = 0
+
+        with mock.patch("contacts.imports.check_unique_emails", side_effect=racing_check):
+            report = import_contacts(self.path, workers=1, batch_size=4)
+        self.assertEqual(report.created[Contact], 5)
+        self.assertEqual(report.created[ContactEmail], 2)
+        self.assertIn("already exists", report.errors[1]["emails.0.email_address"][0])
+        self.assertEqual(Contact.objects.count(), 6)
+
+    @override_settings(CONTACTS_TASK_BACKEND="contacts.tasks.ImmediateBackend")
+    def test_jobs(self):
+        """test the import and export jobs through the default storage"""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        with override_settings(MEDIA_ROOT=media):
+            with open(self.path, "rb") as f:
+                name = default_storage.save("contacts.jsonl", f)
+            with self.captureOnCommitCallbacks(execute=True):
+                job = tasks.enqueue("import_contacts", file_name=name, batch_size=4)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.done), (ContactJob.Status.DONE, 6))
+            self.assertEqual(job.checkpoint["rejected"], 9)
+            self.assertIn("first_name", job.checkpoint["errors"]["2"])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                job = tasks.enqueue("export_contacts", file_name="export.jsonl", batch_size=4)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.done, job.total), (ContactJob.Status.DONE, 6, 6))
+            with default_storage.open(job.checkpoint["file"]) as f:
+                self.assertEqual(len(f.read().splitlines()), 6)
+
+    def test_command(self):
+        """test the command's summary and its line-numbered errors"""
+        out, err = StringIO(), StringIO()
+        call_command("import_contacts", self.path, workers=1, tenant="acme", stdout=out, stderr=err)
+        self.assertIn("Imported 6 contacts", out.getvalue())
+        self.assertIn("rejected 9 line(s)", out.getvalue())
+        self.assertIn("line 2: first_name:", err.getvalue())
+        self.assertEqual(Contact.all_objects.filter(tenant="acme").count(), 6)
+
+    def test_export_round_trip(self):
+        """test that an export imports back into the same contacts and channels"""
+        import_contacts(self.path, workers=1)
+        out = StringIO()
+        self.assertEqual(export_contacts(out, use_copy=False, batch_size=4), 6)
+        exported = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(exported[1]["phone_numbers"], [{"phone_number": "+12025550123"}])
+        self.assertEqual(exported[1]["addresses"][0]["zipcode"], "62701")
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            call_command("export_contacts", stdout=f)
+        self.addCleanup(os.remove, f.name)
+        with use_tenant("acme"):
+            self.assertEqual(import_contacts(f.name, workers=1).errors, {})
+            out = StringIO()
+            export_contacts(out, use_copy=False)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], exported)
+
+    def test_export_sql(self):
+        """test that the COPY query selects the channels of the queryset's contacts"""
+        sql, params = export_sql(connection, Contact.objects.filter(last_name="Hoff"))
+        self.assertIn('FROM "contacts_contactemail" ch WHERE ch."contact_id" = c.id AND ch.archived_on IS NULL', sql)
+        self.assertIn("Hoff", params)
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL only")
+class TestPostgresCopy(TestCase):
+    """A test suite for the `COPY` paths of `contacts.pgcopy`, run on PostgreSQL only
+    """
+
+    def test_copy_rows(self):
+        """test that `COPY FROM` writes NULLs and text holding delimiters, quotes and newlines verbatim"""
+        contacts = [Contact(first_name='Jack "Jr"', last_name="Hoff, III\nEsq."), Contact(first_name="Jane", last_name="Doe")]
+        channels = {ContactEmail: [ContactEmail(contact=contacts[0], email_address="jack@example.com")]}
+        with transaction.atomic():
+            counts = insert_contacts(contacts, channels, use_copy=True)
+        self.assertEqual(counts, {Contact: 2, ContactEmail: 1})
+        jack = Contact.objects.get(pk=contacts[0].pk)
+        self.assertEqual((jack.first_name, jack.last_name, jack.archived_on), ('Jack "Jr"', "Hoff, III\nEsq.", None))
+        self.assertEqual(ContactEmail.objects.get().contact, jack)
+
+    def test_copy_to(self):
+        """test that `COPY TO` writes one JSON value per row verbatim, and exports as the ORM path does"""
+        values = ['{"name": "Hoff, \\"Jr\\""}', '{"path": "a\\\\b"}']
+        out = StringIO()
+        self.assertEqual(pgcopy.copy_to(connection, "SELECT v FROM unnest(%s::text[]) v", [values], out), 2)
+        self.assertEqual(out.getvalue().splitlines(), values)
+        for i in range(2):
+            create_jack(i)
+        copied, built = StringIO(), StringIO()
+        self.assertEqual(export_contacts(copied, use_copy=True), 2)
+        export_contacts(built, use_copy=False)
+        self.assertEqual(
+            [json.loads(line) for line in copied.getvalue().splitlines()],
+            [json.loads(line) for line in built.getvalue().splitlines()],
+        )
+
+    def test_merge_skips_conflicts(self):
+        """test that the merge skips a contact whose email address exists, along with its other channels"""
+        create_jack(0)
+        contacts = [Contact(first_name="Jack", last_name="Again"), Contact(first_name="Jane", last_name="Doe")]
+        taken = ContactEmail(contact=contacts[0], email_address="jack0@example.com")
+        channels = {
+            ContactEmail: [taken, ContactEmail(contact=contacts[1], email_address="jane@example.com")],
+            ContactPhoneNumber: [ContactPhoneNumber(contact=contacts[0], phone_number="+12025550199")],
+        }
+        with transaction.atomic():
+            counts = insert_contacts(contacts, channels, use_copy=True, merge=True)
+        self.assertEqual(counts, {Contact: 1, ContactEmail: 1, ContactPhoneNumber: 0})
+        self.assertIsNone(taken.pk)
+        self.assertIsNone(contacts[0].pk)
+        self.assertEqual(set(Contact.objects.values_list("last_name", flat=True)), {"Hoff0", "Doe"})
+        self.assertEqual(ContactPhoneNumber.objects.count(), 1)
+
+
+SYNC_REPORT: str = """<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:" xmlns:card="urn:ietf:params:xml:ns:carddav">
+  <d:sync-token>%s</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop><d:getetag/><card:address-data/></d:prop>
+</d:sync-collection>"""
+
+
+@override_settings(ROOT_URLCONF=__name__, CONTACTS_SYNC_TOKEN_OVERLAP_SECONDS=0)
+class TestCardDAV(TestCase):
+    """A test suite for the vCard rendering and CardDAV sync of `contacts.carddav`
+    """
+
+    def setUp(self):
+        """Provide three contacts with channels and a logged-in user.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contacts: list[Contact] = [
+                create_jack(i, description="Likes commas, semicolons; and " + "x" * 80) for i in range(3)
+            ]
+        self.client.force_login(get_user_model().objects.create_user("jack"))
+        self.url: str = reverse("contacts:carddav")
+        return super().setUp()
+
+    def sync(self, token: str = "") -> tuple[dict[str, str], str]:
+        """Run a sync-collection report; returns the status of each href and the new token."""
+        response = self.client.generic("REPORT", self.url, SYNC_REPORT % token, content_type="application/xml")
+        self.assertEqual(response.status_code, 207)
+        root = ET.fromstring(response.content)
+        statuses = {
+            element.findtext("{DAV:}href"): element.findtext(".//{DAV:}status") for element in root.findall("{DAV:}response")
+        }
+        return statuses, root.findtext("{DAV:}sync-token")
+
+    def test_render(self):
+        """test the vCard properties, escaping and line folding"""
+        card = vcard.render(Contact.objects.get(pk=self.contacts[0].pk))
+        self.assertTrue(card.startswith("BEGIN:VCARD\r\nVERSION:3.0\r\n"))
+        self.assertIn("EMAIL;TYPE=INTERNET:jack0@example.com\r\n", card)
+        self.assertIn("TEL;TYPE=VOICE:+12025550100\r\n", card)
+        self.assertIn("ADR:;;0 Main St;Springfield;IL;62701;US\r\n", card)
+        self.assertIn("NOTE:Likes commas\\, semicolons\\; and x", card)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in card.split("\r\n")))
+
+    def test_propfind(self):
+        """test the collection properties and the members' ETags"""
+        response = self.client.generic("PROPFIND", self.url, "", HTTP_DEPTH="1")
+        self.assertEqual(response.status_code, 207)
+        root = ET.fromstring(response.content)
+        self.assertEqual(len(root.findall("{DAV:}response")), 4)
+        self.assertIsNotNone(root.find(".//{urn:ietf:params:xml:ns:carddav}addressbook"))
+        self.assertTrue(root.findtext(".//{DAV:}sync-token").startswith("urn:contacts:sync:"))
+        body = '<d:propfind xmlns:d="DAV:"><d:prop><d:displayname/><d:owner/></d:prop></d:propfind>'
+        response = self.client.generic("PROPFIND", self.url, body, content_type="application/xml", HTTP_DEPTH="0")
+        self.assertContains(response, "HTTP/1.1 404 Not Found", status_code=207)
+        self.assertNotContains(response, "getctag", status_code=207)
+        self.client.logout()
+        self.assertEqual(self.client.generic("PROPFIND", self.url, "").status_code, 403)
+
+    def test_sync_collection(self):
+        """test that a sync returns only the contacts changed or removed since the token"""
+        statuses, token = self.sync()
+        self.assertEqual(len(statuses), 3)
+        changed, deleted, archived = self.contacts
+        hrefs = [reverse("contacts:carddav_contact", args=(contact.pk,)) for contact in self.contacts]
+        with self.captureOnCommitCallbacks(execute=True):
+            email = changed.contact_email_addresses.get()
+            email.email_address = "jack@example.org"
+            email.save()
+            deleted.delete()
+        Contact.objects.filter(pk=archived.pk).archive()
+        response = self.client.generic("REPORT", self.url, SYNC_REPORT % token, content_type="application/xml")
+        self.assertContains(response, "EMAIL;TYPE=INTERNET:jack@example.org", status_code=207)
+        statuses, token = self.sync(token)
+        self.assertEqual(statuses, {hrefs[0]: "HTTP/1.1 200 OK", hrefs[1]: "HTTP/1.1 404 Not Found", hrefs[2]: "HTTP/1.1 404 Not Found"})
+        self.assertEqual(self.sync(token)[0], {})
+        response = self.client.generic("REPORT", self.url, SYNC_REPORT % "urn:contacts:sync:0", content_type="application/xml")
+        self.assertContains(response, "valid-sync-token", status_code=403)
+        for digits in (31, 400):  # out of range for a timestamp, and for a float
+            response = self.client.generic(
+                "REPORT", self.url, SYNC_REPORT % f"urn:contacts:sync:{'9' * digits}", content_type="application/xml",
+            )
+            self.assertContains(response, "valid-sync-token", status_code=403)
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test_vcard_etag"},
+    })
+    def test_vcard_etag(self):
+        """test the member's ETag, conditional GET and the rendered-card cache"""
+        url = reverse("contacts:carddav_contact", args=(self.contacts[0].pk,))
+        with mock.patch.object(vcard, "render", wraps=vcard.render) as render:
+            response = self.client.get(url)
+            self.assertContains(response, "FN:Jack Hoff0")
+            self.client.get(url)
+            self.assertEqual(render.call_count, 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        purge_contacts(Contact.objects.filter(pk=self.contacts[0].pk))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(ContactTombstone.objects.get().contact_id, self.contacts[0].pk)
+
+
+class TestOrgChart(TestCase):
+    """A test suite for the organizations, reporting lines and org chart queries
+    """
+
+    def setUp(self):
+        """Provide Acme > Sales > East, a CEO and a chain of four reports.
+        """
+        self.acme = Organization.objects.create(name="Acme")
+        self.sales = Organization.objects.create(name="Sales", parent=self.acme)
+        self.east = Organization.objects.create(name="East", parent=self.sales)
+        self.ceo, self.vp, self.lead, self.rep = (
+            Contact.objects.create(first_name=name, last_name="Hoff") for name in ("Ceo", "Vp", "Lead", "Rep")
+        )
+        for contact, organization in ((self.ceo, self.acme), (self.vp, self.sales), (self.lead, self.east), (self.rep, self.east)):
+            self.works_at(contact, organization)
+        self.reports_to(self.vp, self.ceo)
+        self.reports_to(self.lead, self.vp)
+        self.reports_to(self.rep, self.lead)
+        return super().setUp()
+
+    def works_at(self, contact, organization) -> ContactRelationship:
+        return ContactRelationship.objects.create(contact=contact, kind=ContactRelationship.Kind.WORKS_AT, organization=organization)
+
+    def reports_to(self, contact, manager) -> ContactRelationship:
+        return ContactRelationship.objects.create(contact=contact, kind=ContactRelationship.Kind.REPORTS_TO, manager=manager)
+
+    def lines(self) -> set[tuple[str, str, int]]:
+        return {
+            (line.ancestor.first_name, line.descendant.first_name, line.depth)
+            for line in ReportingLine.objects.select_related("ancestor", "descendant")
+        }
+
+    def test_closure(self):
+        """test that the closure holds every (manager, report) pair and follows reassignments"""
+        self.assertEqual(self.lines(), {
+            ("Ceo", "Vp", 1), ("Ceo", "Lead", 2), ("Ceo", "Rep", 3), ("Vp", "Lead", 1), ("Vp", "Rep", 2), ("Lead", "Rep", 1),
+        })
+        self.assertTrue(ReportingLine.objects.is_above(self.ceo, self.rep))
+        self.assertFalse(ReportingLine.objects.is_above(self.rep, self.ceo))
+        self.assertEqual(set(Contact.objects.reports(self.vp)), {self.lead, self.rep})
+        self.assertEqual(list(Contact.objects.reports(self.vp, depth=1)), [self.lead])
+
+        relationship = ContactRelationship.objects.get(contact=self.lead, kind=ContactRelationship.Kind.REPORTS_TO)
+        relationship.manager = self.ceo
+        relationship.save()
+        self.assertEqual(self.lines(), {("Ceo", "Vp", 1), ("Ceo", "Lead", 1), ("Ceo", "Rep", 2), ("Lead", "Rep", 1)})
+        relationship.delete()
+        self.assertEqual(self.lines(), {("Ceo", "Vp", 1), ("Lead", "Rep", 1)})
+        ContactRelationship.objects.filter(contact=self.rep).archive()
+        self.assertEqual(self.lines(), {("Ceo", "Vp", 1)})
+        ContactRelationship.all_objects.filter(contact=self.rep).restore()
+        self.assertEqual(ReportingLine.objects.rebuild(), 2)
+        self.assertEqual(self.lines(), {("Ceo", "Vp", 1), ("Lead", "Rep", 1)})
+
+    def test_cycles(self):
+        """test that a relationship closing a reporting cycle is refused"""
+        relationship = ContactRelationship(contact=self.ceo, kind=ContactRelationship.Kind.REPORTS_TO, manager=self.rep)
+        with self.assertRaises(ValidationError):
+            relationship.full_clean()
+        with self.assertRaises(ValueError):
+            relationship.save()
+        self.assertFalse(ContactRelationship.objects.filter(contact=self.ceo, kind=ContactRelationship.Kind.REPORTS_TO).exists())
+        self.assertEqual(len(self.lines()), 6)
+        with self.assertRaises(ValidationError):
+            ContactRelationship(contact=self.ceo, kind=ContactRelationship.Kind.REPORTS_TO, organization=self.acme).full_clean()
+
+    def test_queries(self):
+        """test the recursive org chart queries, each in one query"""
+        with self.assertNumQueries(1):
+            chain = Contact.objects.reports_to_chain(self.rep)
+        self.assertEqual([(contact.first_name, contact.depth) for contact in chain], [("Lead", 1), ("Vp", 2), ("Ceo", 3)])
+        Contact.objects.filter(pk=self.vp.pk).archive()
+        self.assertEqual([contact.first_name for contact in Contact.objects.reports_to_chain(self.rep)], ["Lead", "Ceo"])
+        self.assertEqual(Contact.objects.reports_to_chain(self.ceo), [])
+
+        with self.assertNumQueries(1):
+            members = {contact.first_name: contact.reports_to_id for contact in Contact.objects.org_members(self.sales, depth=1)}
+        self.assertEqual(members, {"Lead": self.vp.pk, "Rep": self.lead.pk})
+        self.assertEqual(set(Contact.objects.org_members(self.acme).values_list("first_name", flat=True)), {"Ceo"})
+        self.assertEqual(Contact.objects.org_members(self.acme, depth=None).count(), 3)
+
+    def test_deletes(self):
+        """test that deleting or purging a manager rebuilds their reports' lines"""
+        self.lead.delete()
+        self.assertEqual(self.lines(), {("Ceo", "Vp", 1)})
+        self.reports_to(self.rep, self.vp)
+        purge_contacts(Contact.objects.filter(pk=self.vp.pk))
+        self.assertEqual(self.lines(), set())
+        self.reports_to(self.rep, self.ceo)
+        self.assertEqual(self.lines(), {("Ceo", "Rep", 1)})
+
+    def test_archive_organization(self):
+        """test that archiving a sub-organization takes it and its subtree out of the org chart until restored"""
+        self.assertEqual(Organization.objects.filter(pk=self.sales.pk).archive(), 1)
+        self.assertEqual(set(Organization.objects.values_list("name", flat=True)), {"Acme", "East"})
+        self.assertEqual(set(Contact.objects.org_members(self.acme, depth=None).values_list("first_name", flat=True)), {"Ceo"})
+        self.assertEqual(Organization.all_objects.filter(pk=self.sales.pk).restore(), 1)
+        self.assertEqual(Contact.objects.org_members(self.acme, depth=None).count(), 4)
+
+
+class TestSegments(TestCase):
+    """A test suite for the tags, segment bitmaps and expressions of `contacts.segments`
+    """
+
+    def setUp(self):
+        """Provide contacts in CA and NV, with and without email addresses, and a vip tag.
+        """
+        self.vip = Tag.objects.create(name="vip")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contacts: list[Contact] = [
+                create_jack(i, emails=int(i % 2 == 0), phones=0, state=state, zipcode="90001")
+                for i, state in enumerate(("CA", "CA", "NV", "CA"))
+            ]
+            self.contacts[0].tags.add(self.vip)
+            self.contacts[1].tags.add(self.vip)
+        SegmentBitmap.objects.refresh()
+        return super().setUp()
+
+    def ids(self, *indexes) -> set[int]:
+        return {self.contacts[i].pk for i in indexes}
+
+    def test_int_bitmap(self):
+        """test the set operations and serialization of the fallback bitmap"""
+        a, b = IntBitmap([1, 5, 9, 200]), IntBitmap([5, 200, 7])
+        self.assertEqual(list(a & b), [5, 200])
+        self.assertEqual(list(a | b), [1, 5, 7, 9, 200])
+        self.assertEqual(list(a - b), [1, 9])
+        self.assertEqual((len(a), 9 in a, 8 in a), (4, True, False))
+        self.assertEqual(IntBitmap.deserialize(a.serialize()), a)
+        a.difference_update([1, 200])
+        self.assertEqual(list(a), [5, 9])
+        a.update(range(0, 100_000, 3))
+        self.assertEqual((len(a), 5 in a, 99_999 in a, 99_998 in a), (33_335, True, True, False))
+        with self.assertRaises(ValueError):
+            a.update([-1])
+
+    def test_parse(self):
+        """test operator precedence and syntax errors"""
+        self.assertEqual(
+            parse("state=ca and has email or not tag='big spender'"),
+            ("or", ("and", ("attribute", "state:CA"), ("attribute", "has:email")), ("not", ("tag", "big spender"))),
+        )
+        for expression in ("", "state=CA AND", "(has email", "has fax", "zip=90001", "state=CA tag=vip"):
+            with self.subTest(expression=expression), self.assertRaises(SegmentError):
+                parse(expression)
+        with self.assertRaises(ValidationError):
+            Segment(name="broken", expression="has").full_clean()
+
+    def test_evaluate(self):
+        """test boolean expressions over the bitmaps, read once per refresh"""
+        self.assertEqual(set(evaluate("state=CA AND has email AND tag=vip")), self.ids(0))
+        self.assertEqual(set(evaluate("state=NV OR tag=vip")), self.ids(0, 1, 2))
+        self.assertEqual(set(evaluate("state=CA AND NOT (has email OR tag=vip)")), self.ids(3))
+        self.assertEqual(set(evaluate("NOT tag=vip")), self.ids(2, 3))
+        self.assertEqual(set(evaluate("tag=unknown OR state=TX")), set())
+        with self.assertNumQueries(1):
+            self.assertEqual(len(evaluate("has email")), 2)
+        segment = Segment.objects.create(name="Californians", expression="state=CA")
+        self.assertEqual(set(segment.contact_ids()), self.ids(0, 1, 3))
+
+    @override_settings(CONTACTS_SYNC_TOKEN_OVERLAP_SECONDS=0)
+    def test_incremental_refresh(self):
+        """test that a refresh recomputes only the contacts changed since the last one"""
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactEmail.objects.create(contact=self.contacts[1], email_address="jack1@example.com")
+            self.contacts[3].tags.add(self.vip)
+            self.contacts[0].tags.remove(self.vip)
+        self.assertEqual(SegmentBitmap.objects.refresh(), 5)  # the changed contacts' all, has:*, state:CA and tag:vip
+        self.assertEqual(set(evaluate("has email")), self.ids(0, 1, 2))
+        self.assertEqual(set(evaluate("tag=vip")), self.ids(1, 3))
+
+        Contact.objects.filter(pk=self.contacts[2].pk).archive()
+        SegmentBitmap.objects.refresh()
+        self.assertEqual(set(evaluate("has email")), self.ids(0, 1))
+        self.assertFalse(SegmentBitmap.objects.filter(attribute="state:NV").exists())
+        self.vip.delete()
+        self.assertEqual(SegmentBitmap.objects.refresh(), 0)
+        self.assertEqual(set(SegmentBitmap.objects.values_list("attribute", flat=True)), {"all", "has:address", "has:email", "state:CA"})
+
+
+
+class TestConsent(TestCase):
+    """A test suite for the consent ledger, its current statuses and `eligible_recipients()`
+    """
+
+    def setUp(self):
+        """Provide three contacts, each with an email address and a phone number.
+        """
+        self.contacts: list[Contact] = [create_jack(i, addresses=0) for i in range(3)]
+        return super().setUp()
+
+    def email(self, i: int) -> ContactEmail:
+        return self.contacts[i].contact_email_addresses.get()
+
+    def test_record(self):
+        """test that the status follows the latest event and events cannot change"""
+        email = self.email(0)
+        self.assertIsNone(email.consent("newsletter"))
+        email.record_consent("newsletter", ConsentEvent.Status.OPT_IN, source="signup")
+        event = email.record_consent("newsletter", ConsentEvent.Status.OPT_OUT, source="unsubscribe link")
+        self.assertEqual(email.consent("newsletter"), "opt_out")
+        self.assertIsNone(email.consent("billing"))
+
+        ConsentEvent.objects.record(
+            "email", "Jack0@EXAMPLE.com", "newsletter", ConsentEvent.Status.OPT_IN,
+            recorded_on=event.recorded_on - timedelta(days=1),
+        )  # arrived late, so it does not override the opt-out
+        self.assertEqual(email.consent("newsletter"), "opt_out")
+        self.assertEqual(ConsentEvent.objects.filter(address="jack0@example.com").count(), 3)
+
+        with self.assertRaises(ValueError):
+            event.save()
+        with self.assertRaises(ValueError):
+            ConsentEvent.objects.update(status="opt_in")
+        with self.assertRaises(ValueError):
+            ConsentEvent.objects.record("fax", "+12025550100", "newsletter", "opt_in")
+
+    def test_eligible_recipients(self):
+        """test that only opted-in addresses of live channels are returned, in one query"""
+        for i, status in enumerate(("opt_in", "opt_out", "opt_in")):
+            self.email(i).record_consent("newsletter", status)
+        ConsentEvent.objects.record_many([
+            ConsentEvent(channel="email", address="stranger@example.com", purpose="newsletter", status="opt_in"),
+            ConsentEvent(channel="phone", address="+1 202-555-0101", purpose="newsletter", status="opt_in"),
+        ])
+        self.email(2).record_consent("billing", "opt_in")
+        Contact.objects.filter(pk=self.contacts[2].pk).archive()
+
+        with self.assertNumQueries(1):
+            recipients = list(ConsentStatus.objects.eligible_recipients("email", "newsletter").values_list("address", flat=True))
+        self.assertEqual(recipients, ["jack0@example.com"])
+        self.assertEqual(
+            list(ConsentStatus.objects.eligible_recipients("phone", "newsletter").values_list("address", flat=True)),
+            ["+12025550101"],
+        )
+        with use_tenant("other"):
+            self.assertFalse(ConsentStatus.objects.eligible_recipients("email", "newsletter").exists())
+
+    def test_rebuild(self):
+        """test that rebuilding the statuses from the ledger reproduces them"""
+        for i, status in enumerate(("opt_in", "opt_out", "opt_in")):
+            self.email(i).record_consent("newsletter", status)
+            self.email(i).record_consent("billing", "opt_in")
+        self.email(2).record_consent("newsletter", "opt_out")
+        rows = set(ConsentStatus.objects.values_list("channel", "address", "purpose", "status", "changed_on"))
+        self.assertEqual(ConsentStatus.objects.rebuild(batch_size=2), 6)
+        self.assertEqual(set(ConsentStatus.objects.values_list("channel", "address", "purpose", "status", "changed_on")), rows)
+
+    def test_survives_purge(self):
+        """test that an opt-out outlives its contact and applies to the address's next contact"""
+        self.email(0).record_consent("newsletter", "opt_out")
+        purge_contacts(Contact.objects.filter(pk=self.contacts[0].pk))
+        self.assertFalse(Contact.all_objects.filter(pk=self.contacts[0].pk).exists())
+        self.assertIsNone(ConsentEvent.objects.get().contact_id)
+
+        contact = create_contact(Contact(first_name="Jack", last_name="Again"), emails=[ContactEmail(email_address="jack0@example.com")])
+        self.assertEqual(contact.contact_email_addresses.get().consent("newsletter"), "opt_out")
+
+    def test_channel_tenant(self):
+        """test that a channel records and reads consent in its own tenant, whatever the current one"""
+        with use_tenant("acme"):
+            email = create_jack(9, phones=0, addresses=0).contact_email_addresses.get()
+        event = email.record_consent("newsletter", "opt_out")
+        self.assertEqual(event.tenant, "acme")
+        self.assertEqual(email.consent("newsletter"), "opt_out")
+        self.assertFalse(ConsentStatus.objects.exists())  # the blank tenant's
+        with use_tenant("acme"):
+            self.assertEqual(ConsentStatus.objects.get().status, "opt_out")
+
+    def test_refresh_keeps_newer_status(self):
+        """test that a refresh blind to a concurrent newer event does not overwrite the status it wrote"""
+        email = self.email(0)
+        opt_in = email.record_consent("newsletter", "opt_in")
+        status = ConsentStatus.objects.get()
+        # another transaction's opt-out, whose event this one cannot see yet
+        ConsentStatus.objects.filter(pk=status.pk).update(status="opt_out", changed_on=opt_in.recorded_on + timedelta(seconds=1))
+        self.assertEqual(ConsentStatus.objects.refresh([opt_in.key]), 1)
+        self.assertEqual(email.consent("newsletter"), "opt_out")
+        email.record_consent("newsletter", "opt_in", recorded_on=opt_in.recorded_on + timedelta(seconds=2))
+        self.assertEqual(email.consent("newsletter"), "opt_in")
+
+    def test_refresh_without_upsert(self):
+        """test that backends without `ON CONFLICT (...) DO UPDATE` lock, insert and compare instead"""
+        with mock.patch.object(type(connection.features), "supports_update_conflicts_with_target", False):
+            self.test_refresh_keeps_newer_status()
+            email = self.email(1)
+            email.record_consent("newsletter", "opt_in")
+            email.record_consent("newsletter", "opt_out")
+        self.assertEqual(email.consent("newsletter"), "opt_out")
+        self.assertEqual(ConsentStatus.objects.count(), 2)
+
+
+class TestMigrations(TransactionTestCase):
+    """A test suite for the data migrations
+    """
+
+    def migrate(self, target: str):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("contacts", target)])
+        return executor.loader.project_state([("contacts", target)]).apps
+
+    def tearDown(self):
+        self.migrate(MigrationLoader(connection).graph.leaf_nodes("contacts")[0][1])
+        return super().tearDown()
+
+    def test_summary_backfill(self):
+        """test that adding the summary table summarizes the existing contacts"""
+        apps = self.migrate("0008_addressrollup")
+        contact = apps.get_model("contacts", "Contact").objects.create(first_name="Jack", last_name="Hoff", sort_name="hoff, jack")
+        apps.get_model("contacts", "ContactEmail").objects.create(contact=contact, email_address="jack@example.com")
+        apps.get_model("contacts", "ContactAddress").objects.create(
+            contact=contact, street="1 Main St", unit_type="apt", unit_number="2", city="Springfield", state="IL", zipcode="62701",
+        )
+        apps = self.migrate("0009_contactsummary")
+        summary = apps.get_model("contacts", "ContactSummary").objects.get()
+        self.assertEqual(
+            (summary.contact_id, summary.display_name, summary.primary_email, summary.address, summary.email_count, summary.phone_count),
+            (contact.pk, "Jack Hoff", "jack@example.com", "1 Main St, apt 2, Springfield, IL 62701", 1, 0),
+        )
+
+
+class TestSeedContacts(TestCase):
+    """A test suite for `contacts.seeding` and the `seed_contacts` command
+    """
+
+    def test_deterministic(self):
+        """test that equal seeds build equal contacts and channels"""
+        def sample(seed):
+            factory = ContactFactory(seed)
+            rows = []
+            for serial in range(50):
+                contact = factory.contact()
+                channels = factory.channels(contact, serial)
+                rows.append((contact.sort_name, [str(o.phone_number) for o in channels[ContactPhoneNumber]],
+                             [o.zipcode for o in channels[ContactAddress]]))
+            return rows
+        self.assertEqual(sample(7), sample(7))
+        self.assertNotEqual(sample(7), sample(8))
 
+    def test_valid_rows(self):
+        """test that generated rows pass model validation"""
+        factory = ContactFactory(1, emails={1: 1}, phone_numbers={1: 1}, addresses={1: 1})
+        for serial in range(200):
+            contact = factory.contact()
+            contact.full_clean()
+            for instances in factory.channels(contact, serial).values():
+                for instance in instances:
+                    instance.full_clean(exclude=["contact"], validate_unique=False)
+
+    def test_many_emails_unique(self):
+        """test that contacts with ten or more emails still get distinct addresses"""
+        factory = ContactFactory(3, emails={12: 1})
+        addresses = [
+            email.email_address.split("@")[0]
+            for serial in range(20)
+            for email in factory.channels(Contact(first_name="Jack", last_name="Hoff"), serial)[ContactEmail]
+        ]
+        self.assertEqual(len(addresses), 240)
+        self.assertEqual(len(set(addresses)), 240)
+
+    def test_parse_distribution(self):
+        """test channel-count distributions"""
+        self.assertEqual(parse_distribution("0:0.1,1:0.7,2:0.2"), {0: 0.1, 1: 0.7, 2: 0.2})
+        self.assertEqual(parse_distribution("1"), {1: 1.0})
+        with self.assertRaises(ValueError):
+            parse_distribution("1:0")
+
+    def test_command(self):
+        """test that the command writes contacts with their derived fields"""
+        out = StringIO()
+        call_command("seed_contacts", 30, batch_size=7, emails="1", phones="2", addresses="0:1,1:1", stdout=out)
+        self.assertEqual(Contact.objects.count(), 30)
+        self.assertEqual(ContactEmail.objects.count(), 30)
+        self.assertEqual(ContactPhoneNumber.objects.count(), 60)
+        self.assertFalse(Contact.objects.filter(sort_name="").exists())
+        self.assertFalse(ContactPhoneNumber.objects.filter(national_format="").exists())
+        self.assertFalse(ContactAddress.objects.filter(lat__isnull=True).exists())
+        self.assertIn("Created 30 contact(s)", out.getvalue())
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    TEMPLATES=TEST_TEMPLATES,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+)
+class TestQueryBudgets(TestCase):
+    """Query-count guards for the views, admin pages and queryset APIs.
+
+    Each contact gets several rows per channel so a per-row query shows up as a
+    repeated shape. Budgets live in `contacts/query_budgets/`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Provide a superuser and three contacts with two rows per channel.
+        """
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.contacts: list[Contact] = []
+        for i in range(3):
+            with cls.captureOnCommitCallbacks(execute=True):  # write the summaries the list view reads
+                cls.contacts.append(create_jack(i, emails=2, phones=2, addresses=2))
+        cls.address_pk: int = cls.contacts[0].contact_addresses.all()[0].pk
+        parent = None
+        for name in ("Acme", "Sales", "East"):
+            parent = Organization.objects.create(name=name, parent=parent)
+        for i, expression in enumerate(("state=IL", "has email AND NOT has phone")):
+            Segment.objects.create(name=f"segment {i}", expression=expression)
+        SegmentBitmap.objects.refresh(full=True)
+        for contact in cls.contacts:
+            contact.contact_email_addresses.all()[0].record_consent("newsletter", "opt_in", recorded_by=cls.user)
+        for name in ("refresh_contact_summaries", "normalize_addresses"):
+            ContactJob.objects.create(name=name, created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        return super().setUp()
+
+    def get(self, url: str, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_fingerprint(self):
+        """test that literals, parameters and IN lists are collapsed"""
+        self.assertEqual(
+            fingerprint('SELECT "a" FROM "t" WHERE "b" = \'x\' AND "id" IN (%s, %s, %s) LIMIT 21'),
+            'SELECT "a" FROM "t" WHERE "b" = ? AND "id" IN (...) LIMIT ?',
+        )
+
+    @assert_query_budget()
+    def test_contact_list_view(self):
+        self.get(reverse("contacts:list"))
+
+    @assert_query_budget()
+    def test_contact_detail_view(self):
+        self.get(reverse("contacts:detail", args=[self.contacts[0].pk]))
+
+    @assert_query_budget()
+    def test_admin_contact_changelist(self):
+        self.get("/admin/contacts/contact/")
+
+    @assert_query_budget()
+    def test_admin_contact_change_form(self):
+        self.get(f"/admin/contacts/contact/{self.contacts[0].pk}/change/")
+
+    @assert_query_budget()
+    def test_admin_address_changelist(self):
+        self.get("/admin/contacts/contactaddress/")
+
+    @assert_query_budget()
+    def test_admin_address_change_form(self):
+        self.get(f"/admin/contacts/contactaddress/{self.address_pk}/change/")
+
+    @assert_query_budget()
+    def test_admin_email_changelist(self):
+        self.get("/admin/contacts/contactemail/")
+
+    @assert_query_budget()
+    def test_admin_phone_changelist(self):
+        self.get("/admin/contacts/contactphonenumber/")
+
+    @assert_query_budget()
+    def test_admin_contact_autocomplete(self):
+        self.get("/admin/autocomplete/", term="hoff", app_label="contacts", model_name="contactemail", field_name="contact")
+
+    @assert_query_budget()
+    def test_admin_organization_changelist(self):
+        self.get("/admin/contacts/organization/")
+
+    @assert_query_budget()
+    def test_admin_segment_changelist(self):
+        self.get("/admin/contacts/segment/")
+
+    @assert_query_budget()
+    def test_admin_consent_event_changelist(self):
+        self.get("/admin/contacts/consentevent/")
+
+    @assert_query_budget()
+    def test_admin_consent_status_changelist(self):
+        self.get("/admin/contacts/consentstatus/")
+
+    @assert_query_budget()
+    def test_admin_job_changelist(self):
+        self.get("/admin/contacts/contactjob/")
+
+    @assert_query_budget()
+    def test_autocomplete_view(self):
+        self.get(reverse("contacts:autocomplete"), term="hoff")
+
+    @assert_query_budget()
+    def test_carddav_propfind(self):
+        response = self.client.generic("PROPFIND", reverse("contacts:carddav"), "", HTTP_DEPTH="1")
+        self.assertEqual(response.status_code, 207)
+
+    @assert_query_budget()
+    def test_carddav_sync_report(self):
+        response = self.client.generic("REPORT", reverse("contacts:carddav"), SYNC_REPORT % "", content_type="application/xml")
+        self.assertEqual(response.status_code, 207)
+
+    @assert_query_budget()
+    def test_carddav_contact(self):
+        self.get(reverse("contacts:carddav_contact", args=[self.contacts[0].pk]))
+
+    @assert_query_budget()
+    def test_prefix_search(self):
+        list(Contact.objects.autocomplete("hoff", 20))
+
+    @assert_query_budget()
+    def test_address_matching(self):
+        list(ContactAddress.objects.matching("1 main street", zipcode="62701"))
+        ContactAddress.objects.within(39.8, -89.65, 10)
+
+    @assert_query_budget()
+    def test_address_rollup(self):
+        ContactAddress.objects.rollup(("state", "city", "zipcode"))
+
+    @assert_query_budget()
+    def test_summary_refresh(self):
+        ContactSummary.objects.refresh(contact.pk for contact in self.contacts)
+
+    @assert_query_budget()
+    def test_validate_contacts(self):
+        validate_contacts([{"first_name": "a", "last_name": "b", "emails": [{"email_address": f"{i}@example.com"}]} for i in range(10)])
+
+    @assert_query_budget()
+    def test_create_contact(self):
+        create_contact(
+            Contact(first_name="Jill", last_name="Hoff"),
+            emails=[ContactEmail(email_address="jill@example.com")],
+            phone_numbers=[ContactPhoneNumber(phone_number="+12025550199")],
+            addresses=[ContactAddress(street="1 Main St", city="Springfield", state="IL", zipcode="62701")],
+        )
@@ -0,0 +1,18 @@
+"""contacts.urls
+
+URL patterns for the contacts app.
+"""
+
+from django.urls import path
+from . import carddav, views
+
+
+app_name = "contacts"
+
+urlpatterns = [
+    path("", views.ContactList.as_view(), name="list"),
+    path("<int:pk>/", views.ContactDetail.as_view(), name="detail"),
+    path("autocomplete/", views.ContactAutocomplete.as_view(), name="autocomplete"),
+    path("carddav/", carddav.AddressBookView.as_view(), name="carddav"),
+    path("carddav/<int:pk>.vcf", carddav.VCardView.as_view(), name="carddav_contact"),
+]
@@ -16,3 +16,10 @@ def normalize_email(email):
     else:
         email = email_name.lower() + "@" + domain_part.lower()
     return email
+
+
+def make_sort_name(first_name, last_name):
+    """
+    Build the lowercased "last, first" key used for ordering and prefix searches.
+    """
+    return f"{last_name or ''}, {first_name or ''}".strip(", ").lower()
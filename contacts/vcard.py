@@ -0,0 +1,98 @@
+"""contacts.vcard
+
+vCard 3.0 (RFC 2426) rendering of contacts for the CardDAV collection.
+
+Rendered cards are cached under the contact's ETag, which changes whenever
+the contact or one of its channels does, so cached cards never need to be
+invalidated and a sync only renders the cards that changed.
+"""
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Contact, ContactAddress, ContactEmail, ContactPhoneNumber
+
+
+CACHE_PREFIX: str = "contacts:vcard"
+
+
+def etag(contact_id: int, updated_on) -> str:
+    """The quoted ETag of a contact's card, from its summary's `updated_on`.
+    """
+    return f'"{contact_id}-{int(updated_on.timestamp() * 1_000_000)}"'
+
+
+def _escape(value) -> str:
+    """Escape a text value (RFC 2426 section 4)."""
+    return (
+        str(value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line into lines of at most 75 octets, continuation lines starting with a space."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:  # never split a UTF-8 sequence
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def render(contact: Contact) -> str:
+    """The vCard of a contact with its channels prefetched, as served by CardDAV.
+    """
+    lines = [
+        "BEGIN:VCARD",
+        "VERSION:3.0",
+        f"UID:contact-{contact.pk}",
+        f"FN:{_escape(contact.full_name())}",
+        f"N:{_escape(contact.last_name)};{_escape(contact.first_name)};;;",
+    ]
+    if contact.job_title:
+        lines.append(f"TITLE:{_escape(contact.job_title)}")
+    if contact.description:
+        lines.append(f"NOTE:{_escape(contact.description)}")
+    for email in contact.contact_email_addresses.all():
+        lines.append(f"EMAIL;TYPE=INTERNET:{_escape(email.email_address)}")
+    for phone in contact.contact_phone_numbers.all():
+        lines.append(f"TEL;TYPE=VOICE:{_escape(phone.phone_number)}")
+    for address in contact.contact_addresses.all():
+        unit = address.unit() if address.has_unit else ""
+        lines.append(
+            f"ADR:;{_escape(unit)};{_escape(address.street)};{_escape(address.city)};"
+            f"{_escape(address.state)};{_escape(address.zipcode)};US"
+        )
+    lines.append(f"REV:{contact.updated_on:%Y-%m-%dT%H:%M:%SZ}")
+    lines.append("END:VCARD")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def cards(tags: dict[int, str]) -> dict[int, str]:
+    """The rendered cards of contacts, keyed by id, from the cache where their ETag matches.
+
+    Args:
+        tags (dict[int, str]): the ETag of each wanted contact, see `etag()`
+
+    Returns:
+        dict[int, str]: the cards of the contacts still live
+    """
+    keys = {f"{CACHE_PREFIX}:{tag.strip(chr(34))}": pk for pk, tag in tags.items()}
+    found = {keys[key]: card for key, card in cache.get_many(keys).items()}
+    missing = [pk for pk in tags if pk not in found]
+    if missing:
+        contacts = Contact.objects.filter(pk__in=missing).prefetch_related(
+            Prefetch("contact_email_addresses", ContactEmail.objects.order_by("pk")),
+            Prefetch("contact_phone_numbers", ContactPhoneNumber.objects.order_by("pk")),
+            Prefetch("contact_addresses", ContactAddress.objects.order_by("pk")),
+        )
+        rendered = {contact.pk: render(contact) for contact in contacts}
+        cache.set_many({f"{CACHE_PREFIX}:{tags[pk].strip(chr(34))}": card for pk, card in rendered.items()})
+        found.update(rendered)
+    return found
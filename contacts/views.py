@@ -3,17 +3,67 @@
 View modules for the contacts app.
 """
 
+from hashlib import md5
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views import View
 from django.views.generic import DetailView, ListView
-from .models import Contact
+from .conf import app_settings
+from .instrumentation import InstrumentedViewMixin
+from .models import Contact, ContactSummary
+from .tenants import get_current_tenant
 
 
-class ContactList(ListView):
-    model = Contact
+class ContactList(InstrumentedViewMixin, ListView):
+    """Contacts by name, read from the one-row-per-contact `ContactSummary` table.
+
+    The template's `objects` are `ContactSummary` rows, not `Contact`s: they
+    have `display_name`, `primary_email`, `primary_phone`, `address` and the
+    channel counts, and `contact_id` for links to `ContactDetail`.
+    """
+
+    queryset = ContactSummary.objects.order_by("sort_name")
     context_object_name = 'objects'
     template_name='contacts/list_view.html'
 
 
-class ContactDetail(DetailView):
+class ContactDetail(InstrumentedViewMixin, DetailView):
     model = Contact
     context_object_name = 'object'
     template_name='contacts/detail_view.html'
+
+
+class ContactAutocomplete(InstrumentedViewMixin, LoginRequiredMixin, View):
+    """Prefix search over contact names, email addresses and phone numbers.
+
+    Returns select2-compatible JSON (`{"results": [{"id", "text"}], "pagination": {"more"}}`)
+    for the `term` query parameter. Results are limited to
+    `CONTACTS_AUTOCOMPLETE_LIMIT` and cached for `CONTACTS_AUTOCOMPLETE_CACHE_TIMEOUT`
+    seconds.
+    """
+
+    cache_prefix: str = "contacts:autocomplete"
+
+    def get_cache_key(self, term: str, limit: int) -> str:
+        return f"{self.cache_prefix}:{get_current_tenant()}:{limit}:{md5(term.encode()).hexdigest()}"
+
+    def get_results(self, term: str, limit: int) -> list[dict]:
+        return [
+            {"id": contact.pk, "text": str(contact)}
+            for contact in Contact.objects.autocomplete(term, limit).only("first_name", "last_name")
+        ]
+
+    def get(self, request, *args, **kwargs):
+        term: str = request.GET.get("term", "").strip().lower()
+        limit: int = app_settings.AUTOCOMPLETE_LIMIT
+        if len(term) < app_settings.AUTOCOMPLETE_MIN_LENGTH:
+            return JsonResponse({"results": [], "pagination": {"more": False}})
+        key = self.get_cache_key(term, limit)
+        results = cache.get(key)
+        if results is None:
+            # fetch one extra row to tell the client whether more results exist
+            results = self.get_results(term, limit + 1)
+            cache.set(key, results, app_settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+        return JsonResponse({"results": results[:limit], "pagination": {"more": len(results) > limit}})